@@ -0,0 +1,38 @@
+"""Add unread notifications counter
+
+Revision ID: 73b4c89e82ba
+Revises: 3d971977fc53
+Create Date: 2026-01-12 10:15:42.381204+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '73b4c89e82ba'
+down_revision = '3d971977fc53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Contador de no leídas por usuario
+    op.add_column('users', sa.Column('unread_notifications', sa.Integer(), server_default='0', nullable=False))
+
+    # Índice compuesto para el listado unread_only y el job de reparación
+    op.create_index('idx_notifications_user_unread', 'notifications', ['user_id', 'is_read'])
+
+    # Inicializar contadores con los datos existentes
+    op.execute("""
+        UPDATE users SET unread_notifications = (
+            SELECT COUNT(*) FROM notifications
+            WHERE notifications.user_id = users.id
+              AND notifications.is_read = false
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_notifications_user_unread', table_name='notifications')
+    op.drop_column('users', 'unread_notifications')
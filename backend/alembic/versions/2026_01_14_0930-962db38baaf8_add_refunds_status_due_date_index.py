@@ -0,0 +1,25 @@
+"""Add refunds (status, due_date) index
+
+Revision ID: 962db38baaf8
+Revises: 73b4c89e82ba
+Create Date: 2026-01-14 09:30:11.904527+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '962db38baaf8'
+down_revision = '73b4c89e82ba'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Índice para el sweeper de devoluciones vencidas
+    op.create_index('idx_refunds_status_due_date', 'refunds', ['status', 'due_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_refunds_status_due_date', table_name='refunds')
@@ -0,0 +1,41 @@
+"""Add trip_id to reports
+
+Revision ID: 80598d3813c3
+Revises: 962db38baaf8
+Create Date: 2026-01-19 11:40:27.518843+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '80598d3813c3'
+down_revision = '962db38baaf8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('reports', sa.Column('trip_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'reports_trip_id_fkey', 'reports', 'trips',
+        ['trip_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(op.f('ix_reports_trip_id'), 'reports', ['trip_id'], unique=False)
+
+    # Backfill: resolver el viaje de cada reporte a partir de sus gastos
+    op.execute("""
+        UPDATE reports SET trip_id = (
+            SELECT MIN(expenses.trip_id) FROM expenses
+            WHERE expenses.report_id = reports.id
+              AND expenses.trip_id IS NOT NULL
+        )
+        WHERE trip_id IS NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reports_trip_id'), table_name='reports')
+    op.drop_constraint('reports_trip_id_fkey', 'reports', type_='foreignkey')
+    op.drop_column('reports', 'trip_id')
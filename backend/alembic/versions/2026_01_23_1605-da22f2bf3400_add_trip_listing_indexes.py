@@ -0,0 +1,29 @@
+"""Add trip listing indexes
+
+Revision ID: da22f2bf3400
+Revises: 80598d3813c3
+Create Date: 2026-01-23 16:05:48.120377+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'da22f2bf3400'
+down_revision = '80598d3813c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_trips_status_start_date', 'trips', ['status', 'start_date'])
+    op.create_index(op.f('ix_trips_user_id'), 'trips', ['user_id'], unique=False)
+    # Join trips -> expenses del listado agregado
+    op.create_index(op.f('ix_expenses_trip_id'), 'expenses', ['trip_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_expenses_trip_id'), table_name='expenses')
+    op.drop_index(op.f('ix_trips_user_id'), table_name='trips')
+    op.drop_index('idx_trips_status_start_date', table_name='trips')
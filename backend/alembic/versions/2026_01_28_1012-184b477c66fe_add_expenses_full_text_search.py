@@ -0,0 +1,68 @@
+"""Add expenses full text search
+
+Revision ID: 184b477c66fe
+Revises: da22f2bf3400
+Create Date: 2026-01-28 10:12:05.667310+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '184b477c66fe'
+down_revision = 'da22f2bf3400'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # En SQLite el índice FTS5 lo crea app.services.search_service al primer uso
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.add_column('expenses', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.create_index(
+        'idx_expenses_search_vector', 'expenses', ['search_vector'],
+        postgresql_using='gin'
+    )
+
+    # Trigger que mantiene el vector al insertar/editar comercio, descripción u OCR
+    op.execute("""
+        CREATE OR REPLACE FUNCTION expenses_search_vector_update()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            ocr_text TEXT := '';
+        BEGIN
+            BEGIN
+                ocr_text := COALESCE(NEW.ocr_data::json ->> 'raw_text', '');
+            EXCEPTION WHEN others THEN
+                ocr_text := '';
+            END;
+            NEW.search_vector :=
+                setweight(to_tsvector('spanish', COALESCE(NEW.merchant, '')), 'A') ||
+                setweight(to_tsvector('spanish', COALESCE(NEW.description, '')), 'B') ||
+                setweight(to_tsvector('spanish', ocr_text), 'C');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER trigger_expenses_search_vector
+            BEFORE INSERT OR UPDATE OF merchant, description, ocr_data ON expenses
+            FOR EACH ROW
+            EXECUTE FUNCTION expenses_search_vector_update();
+    """)
+
+    # Backfill: el UPDATE dispara el trigger en todas las filas existentes
+    op.execute("UPDATE expenses SET merchant = merchant")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS trigger_expenses_search_vector ON expenses")
+    op.execute("DROP FUNCTION IF EXISTS expenses_search_vector_update()")
+    op.drop_index('idx_expenses_search_vector', table_name='expenses')
+    op.drop_column('expenses', 'search_vector')
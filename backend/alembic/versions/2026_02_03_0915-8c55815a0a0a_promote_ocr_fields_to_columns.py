@@ -0,0 +1,131 @@
+"""Promote OCR fields to columns
+
+Revision ID: 8c55815a0a0a
+Revises: 184b477c66fe
+Create Date: 2026-02-03 09:15:27.904113+00:00
+
+"""
+import json
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '8c55815a0a0a'
+down_revision = '184b477c66fe'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Copia congelada de app.models.expense.parse_ocr_date/ocr_columns a la fecha
+# de esta revisión: cambios posteriores del modelo no alteran el backfill
+OCR_DATE_FORMATS = (
+    "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y",
+    "%Y-%m-%d", "%Y/%m/%d",
+    "%b %d, %Y", "%b %d %Y", "%B %d, %Y", "%B %d %Y",
+)
+
+
+def _parse_ocr_date(value):
+    if not value or not isinstance(value, str):
+        return None
+    for fmt in OCR_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _ocr_values(data: dict) -> dict:
+    amount = data.get("amount")
+    try:
+        ocr_amount = int(round(float(amount) * 100)) if amount is not None else None
+    except (TypeError, ValueError):
+        ocr_amount = None
+    merchant = data.get("merchant")
+    merchant = merchant.strip() if isinstance(merchant, str) else ""
+    return {
+        "ocr_amount": ocr_amount,
+        "ocr_date": _parse_ocr_date(data.get("date")),
+        "ocr_merchant": merchant[:255] or None,
+        "ocr_is_mock": bool(data.get("mock", False)),
+    }
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == 'postgresql'
+
+    # Texto JSON -> JSONB (en SQLite la columna JSON sigue siendo texto)
+    if is_postgres:
+        op.execute("""
+            ALTER TABLE expenses
+            ALTER COLUMN ocr_data TYPE JSONB USING NULLIF(ocr_data, '')::jsonb
+        """)
+
+    op.add_column('expenses', sa.Column('ocr_amount', sa.Integer(), nullable=True))
+    op.add_column('expenses', sa.Column('ocr_date', sa.Date(), nullable=True))
+    op.add_column('expenses', sa.Column('ocr_merchant', sa.String(length=255), nullable=True))
+    op.add_column('expenses', sa.Column('ocr_is_mock', sa.Boolean(), server_default='false', nullable=False))
+
+    op.create_index(op.f('ix_expenses_ocr_confidence'), 'expenses', ['ocr_confidence'], unique=False)
+    op.create_index(op.f('ix_expenses_ocr_amount'), 'expenses', ['ocr_amount'], unique=False)
+    op.create_index(op.f('ix_expenses_ocr_date'), 'expenses', ['ocr_date'], unique=False)
+    op.create_index(op.f('ix_expenses_ocr_merchant'), 'expenses', ['ocr_merchant'], unique=False)
+    op.create_index(op.f('ix_expenses_ocr_is_mock'), 'expenses', ['ocr_is_mock'], unique=False)
+
+    # Backfill por lotes (keyset sobre id) para no cargar toda la tabla
+    select_batch = sa.text("""
+        SELECT id, ocr_data FROM expenses
+        WHERE ocr_data IS NOT NULL AND id > :last_id
+        ORDER BY id LIMIT :limit
+    """)
+    update_row = sa.text("""
+        UPDATE expenses
+        SET ocr_amount = :ocr_amount, ocr_date = :ocr_date,
+            ocr_merchant = :ocr_merchant, ocr_is_mock = :ocr_is_mock
+        WHERE id = :id
+    """)
+    last_id = 0
+    while True:
+        rows = bind.execute(select_batch, {"last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        params = []
+        for expense_id, raw in rows:
+            try:
+                data = json.loads(raw) if isinstance(raw, str) else raw
+            except ValueError:
+                continue
+            if not isinstance(data, dict) or not data:
+                continue
+            params.append({"id": expense_id, **_ocr_values(data)})
+        if params:
+            bind.execute(update_row, params)
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_expenses_ocr_is_mock'), table_name='expenses')
+    op.drop_index(op.f('ix_expenses_ocr_merchant'), table_name='expenses')
+    op.drop_index(op.f('ix_expenses_ocr_date'), table_name='expenses')
+    op.drop_index(op.f('ix_expenses_ocr_amount'), table_name='expenses')
+    op.drop_index(op.f('ix_expenses_ocr_confidence'), table_name='expenses')
+
+    op.drop_column('expenses', 'ocr_is_mock')
+    op.drop_column('expenses', 'ocr_merchant')
+    op.drop_column('expenses', 'ocr_date')
+    op.drop_column('expenses', 'ocr_amount')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column(
+            'expenses', 'ocr_data',
+            type_=sa.Text(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using='ocr_data::text'
+        )
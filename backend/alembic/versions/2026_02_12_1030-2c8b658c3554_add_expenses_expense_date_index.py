@@ -0,0 +1,25 @@
+"""Add expenses expense_date index
+
+Revision ID: 2c8b658c3554
+Revises: 409e6c61ff42
+Create Date: 2026-02-12 10:30:42.318806+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c8b658c3554'
+down_revision = '409e6c61ff42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Exportación masiva por rango de fechas: recorre el índice sin ordenar
+    op.create_index(op.f('ix_expenses_expense_date'), 'expenses', ['expense_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_expenses_expense_date'), table_name='expenses')
@@ -0,0 +1,44 @@
+"""Add approval queue indexes
+
+Revision ID: e87cafea8063
+Revises: 2c8b658c3554
+Create Date: 2026-02-16 09:45:37.214806+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e87cafea8063'
+down_revision = '2c8b658c3554'
+branch_labels = None
+depends_on = None
+
+QUEUE_PREDICATE = sa.text("status = 'SUBMITTED'")
+
+
+def upgrade() -> None:
+    # total_amount solo se asignaba en memoria: recalcularlo antes de indexarlo
+    op.execute(
+        "UPDATE reports SET total_amount = ("
+        "SELECT COALESCE(SUM(expenses.amount), 0) FROM expenses "
+        "WHERE expenses.report_id = reports.id)"
+    )
+
+    # Cola de aprobación (solo reportes enviados): por antigüedad, por solicitante y por monto
+    op.create_index('idx_reports_queue_submitted_at', 'reports', ['submitted_at'],
+                    postgresql_where=QUEUE_PREDICATE, sqlite_where=QUEUE_PREDICATE)
+    op.create_index('idx_reports_queue_user', 'reports', ['user_id', 'submitted_at'],
+                    postgresql_where=QUEUE_PREDICATE, sqlite_where=QUEUE_PREDICATE)
+    op.create_index('idx_reports_queue_amount', 'reports', ['total_amount', 'submitted_at'],
+                    postgresql_where=QUEUE_PREDICATE, sqlite_where=QUEUE_PREDICATE)
+    # Join reports -> expenses (conteo y fecha del gasto más antiguo)
+    op.create_index(op.f('ix_expenses_report_id'), 'expenses', ['report_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_expenses_report_id'), table_name='expenses')
+    op.drop_index('idx_reports_queue_amount', table_name='reports')
+    op.drop_index('idx_reports_queue_user', table_name='reports')
+    op.drop_index('idx_reports_queue_submitted_at', table_name='reports')
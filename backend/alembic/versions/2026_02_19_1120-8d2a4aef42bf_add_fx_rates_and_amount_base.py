@@ -0,0 +1,60 @@
+"""Add fx_rates table and expenses.amount_base
+
+Revision ID: 8d2a4aef42bf
+Revises: e87cafea8063
+Create Date: 2026-02-19 11:20:08.503117+00:00
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2a4aef42bf'
+down_revision = 'e87cafea8063'
+branch_labels = None
+depends_on = None
+
+BASE_CURRENCY = os.getenv("BASE_CURRENCY", "USD")
+
+
+def upgrade() -> None:
+    op.create_table(
+        'fx_rates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('rate_date', sa.Date(), nullable=False),
+        sa.Column('rate', sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        # Búsqueda de la tasa vigente (currency = ? AND rate_date <= ? ORDER BY rate_date DESC)
+        sa.UniqueConstraint('currency', 'rate_date', name='uq_fx_rates_currency_date')
+    )
+    op.create_index(op.f('ix_fx_rates_id'), 'fx_rates', ['id'], unique=False)
+
+    op.add_column('expenses', sa.Column('amount_base', sa.Integer(), nullable=True))
+    # Gastos en la moneda base; el resto queda en NULL hasta cargar tasas y
+    # ejecutar scripts/recompute_amount_base.py
+    op.execute(
+        sa.text("UPDATE expenses SET amount_base = amount WHERE currency = :base")
+        .bindparams(base=BASE_CURRENCY)
+    )
+    # Solo reportes abiertos y con todos sus gastos convertidos: los decididos
+    # conservan su total y el resto se recalcula al cargar las tasas
+    op.execute(
+        "UPDATE reports SET total_amount = ("
+        "SELECT COALESCE(SUM(expenses.amount_base), 0) FROM expenses "
+        "WHERE expenses.report_id = reports.id) "
+        "WHERE reports.status IN ('DRAFT', 'SUBMITTED') AND NOT EXISTS ("
+        "SELECT 1 FROM expenses WHERE expenses.report_id = reports.id "
+        "AND expenses.amount_base IS NULL)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('expenses', 'amount_base')
+    op.drop_index(op.f('ix_fx_rates_id'), table_name='fx_rates')
+    op.drop_table('fx_rates')
@@ -1,15 +1,27 @@
 """
 API Routes - Authentication
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from datetime import timedelta
+from typing import Optional
 
 from app.core.database import get_db
-from app.core.security import get_password_hash, verify_password, create_access_token
-from app.core.config import settings
+from app.core.dependencies import get_current_admin_user, security
+from app.core.security import (
+    get_password_hash_async,
+    verify_password_async,
+    decode_access_token,
+    token_cache
+)
 from app.models import User
-from app.schemas import UserCreate, UserLogin, UserResponse, Token
+from app.schemas import UserCreate, UserLogin, UserResponse, Token, RefreshRequest
+from app.services.token_service import (
+    RefreshTokenError,
+    issue_tokens,
+    revoke_refresh_token,
+    rotate_refresh_token
+)
 
 router = APIRouter()
 
@@ -33,7 +45,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         user_role = "admin"
     
     # Crear nuevo usuario
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         email=user_data.email,
         full_name=user_data.full_name,
@@ -50,41 +62,84 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=Token)
 async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """
-    Iniciar sesión y obtener access token
+    Iniciar sesión y obtener access token + refresh token
     """
     # Buscar usuario
     user = db.query(User).filter(User.email == credentials.email).first()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    valid, new_hash = await verify_password_async(credentials.password, user.hashed_password)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Email o contraseña incorrectos",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # El costo de bcrypt cambió desde que se guardó el hash: re-hashear con el actual
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+    
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuario inactivo"
         )
     
-    # Crear access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email, "user_id": user.id, "role": user.role.value},
-        expires_delta=access_token_expires
-    )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Access token corto con claims + refresh token rotativo (nueva sesión)
+    return issue_tokens(db, user)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: Optional[RefreshRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Cerrar sesión: revocar el access token presentado y, si se envía,
+    el refresh token de la sesión
+    """
+    token = credentials.credentials
+    # Solo se revocan tokens verificados: un token cualquiera no debe crecer
+    # el conjunto de revocación (ni escribir en Redis)
+    payload = decode_access_token(token)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido o expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token_cache.revoke_token(token, payload)
+    if body:
+        revoke_refresh_token(db, body.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get("/token-cache")
+async def get_token_cache_metrics(current_user: User = Depends(get_current_admin_user)):
+    """
+    Métricas de la caché de tokens verificados de este worker (solo admin)
+    """
+    return token_cache.metrics()
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token():
+async def refresh_token(body: RefreshRequest, db: Session = Depends(get_db)):
     """
-    Refrescar access token
-    TODO: Implementar refresh token logic
+    Canjear un refresh token por un access token nuevo
+    El refresh token usado se revoca y se devuelve uno nuevo (rotación)
     """
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Refresh token no implementado aún"
-    )
+    try:
+        return rotate_refresh_token(db, body.refresh_token)
+    except RefreshTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
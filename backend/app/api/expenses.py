@@ -1,21 +1,43 @@
 """
 API Routes - Expenses
 """
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, RedirectResponse, StreamingResponse
+from sqlalchemy.orm import Session, load_only, undefer
+from starlette.background import BackgroundTask
 from typing import List, Optional
-import json
-from datetime import datetime
+from contextlib import ExitStack
+from datetime import date, datetime
+import orjson
 import shutil
 import os
+import tempfile
 from pathlib import Path
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_user
+from app.api.receipts import SIZE_QUERY, cached_file_response, resolve_receipt_file
+from app.api.reports import sync_report_totals
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.dependencies import get_current_admin_user, get_current_manager_or_admin, get_current_user
+from app.core.lifecycle import in_flight
+from app.core.serialization import FastSerializer
 from app.models import Expense, User, Category
+from app.models.expense import EXPENSE_FIELDS, EXPENSE_SUMMARY_COLUMNS, ocr_columns
 from app.models.trip import Trip
-from app.schemas import ExpenseCreate, ExpenseUpdate, ExpenseResponse, OCRScanResponse
-from app.services import ocr_service, storage_service
+from app.schemas import (
+    ExpenseCreate,
+    ExpenseUpdate,
+    ExpenseResponse,
+    ExpenseSearchResponse,
+    ExpenseSummary,
+    OCRScanResponse
+)
+from app.services import fx_service, ocr_service, storage_service
+from app.services.bulk_export import EXPORT_FORMATS, stream_expenses
+from app.services.search_service import expense_search
+from app.services.statement_import import STATEMENT_EXTENSIONS, StatementImportError, import_statement
+from app.services.thumbnail_service import THUMBNAIL_SIZES
 
 router = APIRouter()
 
@@ -26,29 +48,64 @@ RECEIPTS_DIR.mkdir(parents=True, exist_ok=True)
 import logging
 logger = logging.getLogger("uvicorn")
 
-@router.get("/", response_model=List[ExpenseResponse])
+expense_list_serializer = FastSerializer(List[ExpenseResponse])
+expense_summary_serializer = FastSerializer(List[ExpenseSummary])
+
+def _parse_fields(fields: str) -> list:
+    """
+    Convertir ?fields=id,amount,merchant en columnas de Expense
+    'id' siempre se incluye; lanza HTTPException 400 si hay campos desconocidos
+    """
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(EXPENSE_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos desconocidos: {', '.join(unknown)}"
+        )
+    if "id" not in names:
+        names.insert(0, "id")
+    return [EXPENSE_FIELDS[name] for name in dict.fromkeys(names)]
+
+@router.get("/", response_model=List[ExpenseSummary])
 async def get_expenses(
     skip: int = 0,
     limit: int = 100,
     category_id: Optional[int] = None,
     status: Optional[str] = None,
     trip_id: Optional[int] = None,
+    fields: Optional[str] = Query(
+        None,
+        description="Columnas separadas por coma (p. ej. id,expense_date,merchant,amount) "
+                    "o 'all' para el gasto completo con ocr_data. "
+                    "Por defecto: proyección resumida (ExpenseSummary)"
+    ),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Obtener gastos con filtros opcionales
     Los admins y managers pueden ver todos los gastos, los usuarios solo los suyos
+    Solo se leen de la base de datos las columnas de la proyección pedida
     """
     logger.info(f"🔍 GET /expenses/ - User: {current_user.email}, Role: {current_user.role.value}, trip_id: {trip_id}")
     
+    # Proyección: resumen (por defecto), completa o columnas sueltas
+    columns = None
+    if fields == "all":
+        query = db.query(Expense).options(undefer(Expense.ocr_data))
+    elif fields:
+        columns = _parse_fields(fields)
+        query = db.query(*columns)
+    else:
+        query = db.query(Expense).options(load_only(*EXPENSE_SUMMARY_COLUMNS))
+    
     # Si es admin o manager, puede ver todos los gastos
     if current_user.role.value in ["admin", "manager"]:
-        query = db.query(Expense)
         logger.info(f"✅ Admin/Manager query (all expenses)")
     else:
         # Los usuarios normales solo pueden ver sus propios gastos
-        query = db.query(Expense).filter(Expense.user_id == current_user.id)
+        query = query.filter(Expense.user_id == current_user.id)
         logger.info(f"👤 Employee query (user_id={current_user.id})")
     
     if category_id:
@@ -62,10 +119,47 @@ async def get_expenses(
     
     expenses = query.order_by(Expense.expense_date.desc()).offset(skip).limit(limit).all()
     logger.info(f"📊 Found {len(expenses)} expenses")
-    for exp in expenses:
-        logger.info(f"  💰 Expense ID {exp.id}: user_id={exp.user_id}, trip_id={exp.trip_id}, amount={exp.amount}")
     
-    return expenses
+    if columns is not None:
+        return ORJSONResponse([row._asdict() for row in expenses])
+    if fields == "all":
+        return expense_list_serializer.response(expenses)
+    return expense_summary_serializer.response(expenses)
+
+@router.get("/search", response_model=ExpenseSearchResponse)
+async def search_expenses(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar gastos por comercio, descripción y texto del recibo (OCR)
+    Resultados ordenados por relevancia y paginados con cursor
+    Los admins y managers buscan en todos los gastos, los usuarios solo en los suyos
+    """
+    scope_user_id = None if current_user.role.value in ["admin", "manager"] else current_user.id
+    
+    try:
+        ranked, next_cursor = expense_search.search(
+            db, q, user_id=scope_user_id, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    ids = [expense_id for expense_id, _ in ranked]
+    expenses_by_id = {}
+    if ids:
+        expenses = db.query(Expense).options(
+            load_only(*EXPENSE_SUMMARY_COLUMNS)
+        ).filter(Expense.id.in_(ids)).all()
+        expenses_by_id = {e.id: e for e in expenses}
+    
+    return {
+        "items": [expenses_by_id[i] for i in ids if i in expenses_by_id],
+        "next_cursor": next_cursor
+    }
 
 @router.post("/", response_model=ExpenseResponse, status_code=status.HTTP_201_CREATED)
 async def create_expense(
@@ -107,8 +201,7 @@ async def create_expense(
         # Procesar imagen del recibo si existe
         receipt_url = None
         receipt_original_name = None
-        ocr_data = None
-        ocr_confidence = None
+        ocr_result = None
         
         if receipt:
             # Validar extensión de archivo (más flexible que content_type)
@@ -146,16 +239,10 @@ async def create_expense(
                     f.write(file_bytes)
                 
                 ocr_result = ocr_service.extract_receipt_data_from_file(str(temp_path))
-                if ocr_result:
-                    ocr_data = json.dumps(ocr_result)
-                    ocr_confidence = ocr_result.get('confidence', 0)
                 
                 # Eliminar archivo temporal
                 if temp_path.exists():
                     temp_path.unlink()
-                if ocr_result:
-                    ocr_data = json.dumps(ocr_result)
-                    ocr_confidence = ocr_result.get('confidence', 0)
             except Exception as e:
                 print(f"⚠️  OCR processing failed: {str(e)}")
                 # Continuar sin OCR
@@ -165,6 +252,7 @@ async def create_expense(
             user_id=current_user.id,
             category_id=category_id,
             amount=amount,
+            amount_base=fx_service.amount_base(db, amount, currency, expense_date_obj),
             currency=currency,
             merchant=merchant,
             description=description,
@@ -172,8 +260,7 @@ async def create_expense(
             trip_id=trip_id,
             receipt_url=receipt_url,
             receipt_original_name=receipt_original_name,
-            ocr_data=ocr_data,
-            ocr_confidence=ocr_confidence
+            **ocr_columns(ocr_result)
         )
         
         db.add(new_expense)
@@ -262,6 +349,119 @@ async def scan_receipt(
         suggested_expense=suggested_expense
     )
 
+@router.post("/import")
+async def import_card_statement(
+    file: UploadFile = File(...),
+    user_id: Optional[int] = Form(None),
+    category_id: Optional[int] = Form(None),
+    current_user: User = Depends(get_current_manager_or_admin)
+):
+    """
+    Importar un estado de cuenta de tarjeta (CSV o XLSX) como gastos en borrador
+
+    Encabezados reconocidos: fecha, monto, moneda, comercio, descripción,
+    categoría (nombre o id), usuario (email) y viaje (nombre o id).
+    user_id y category_id se usan en las filas que no traen esa columna.
+
+    Responde en streaming (application/x-ndjson) una línea por bloque
+    insertado con el progreso y los errores por fila, y una línea final
+    con el resumen. Si el archivo deja de poder leerse (no es UTF-8, CSV mal
+    formado) se envía una línea {"event": "error"} antes del resumen.
+    """
+    file_extension = file.filename.split('.')[-1].lower()
+    if file_extension not in STATEMENT_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Extensión de archivo no permitida. Use: {', '.join(STATEMENT_EXTENSIONS)}"
+        )
+
+    with ExitStack() as stack:
+        stack.enter_context(in_flight.track("import"))
+
+        # El formulario se cierra antes de que termine el streaming: copiar a un
+        # archivo temporal propio (por bloques, sin cargarlo en memoria)
+        temp = tempfile.NamedTemporaryFile(suffix=f".{file_extension}", delete=False)
+        stack.callback(os.unlink, temp.name)
+        with temp:
+            await run_in_threadpool(shutil.copyfileobj, file.file, temp)
+
+        statement = stack.enter_context(open(temp.name, "rb"))
+        db = SessionLocal()
+        stack.callback(db.close)
+
+        events = import_statement(db, statement, file.filename, user_id, category_id)
+        try:
+            first_event = await run_in_threadpool(next, events)
+        except StatementImportError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        # Si el cliente se desconecta el generador no llega al final: la limpieza
+        # (temporal, sesión, contador de apagado) va en una tarea de fondo
+        stack.callback(events.close)
+        cleanup = stack.pop_all()
+
+    def stream():
+        # Al terminar o fallar; la desconexión la cubre la tarea de fondo
+        try:
+            yield orjson.dumps(first_event) + b"\n"
+            for event in events:
+                yield orjson.dumps(event) + b"\n"
+        finally:
+            cleanup.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(cleanup.close)
+    )
+
+@router.get("/export")
+async def export_expenses(
+    start_date: date = Query(..., description="Fecha de gasto inicial (inclusive)"),
+    end_date: date = Query(..., description="Fecha de gasto final (inclusive)"),
+    format: str = Query("parquet", pattern="^(parquet|csv)$"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Exportación masiva de gastos para BI (solo admin)
+
+    Incluye usuario, categoría, viaje y estado del reporte de cada gasto.
+    Se genera en streaming desde un cursor del servidor: un row group de
+    Parquet (o un bloque de CSV) por cada EXPORT_BATCH_SIZE filas.
+    """
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date debe ser posterior a start_date"
+        )
+
+    with ExitStack() as stack:
+        stack.enter_context(in_flight.track("export"))
+        # La sesión de get_db se cierra antes de terminar el streaming
+        db = SessionLocal()
+        stack.callback(db.close)
+        # Cierra el cursor del servidor antes que la sesión, también si el
+        # cliente se desconecta a mitad de la descarga
+        chunks = stream_expenses(db, start_date, end_date, format)
+        stack.callback(chunks.close)
+        cleanup = stack.pop_all()
+
+    def stream():
+        # Al terminar o fallar (error de la base o de pyarrow): Starlette no
+        # ejecuta la tarea de fondo si el cuerpo lanza; la desconexión sí la cubre
+        try:
+            yield from chunks
+        finally:
+            cleanup.close()
+
+    filename = f"gastos_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{format}"
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+        background=BackgroundTask(cleanup.close)
+    )
+
 @router.get("/{expense_id}", response_model=ExpenseResponse)
 async def get_expense(
     expense_id: int,
@@ -284,6 +484,61 @@ async def get_expense(
     
     return expense
 
+@router.get("/{expense_id}/receipt")
+async def get_expense_receipt(
+    expense_id: int,
+    request: Request,
+    size: Optional[str] = SIZE_QUERY,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Imagen del recibo de un gasto (original o miniatura con ?size=sm|md|lg)
+    Supabase: redirección a una URL firmada de corta duración, los bytes no pasan por la API
+    Local: archivo con ETag, Range y Cache-Control inmutable
+    Los admins y managers pueden ver cualquier recibo, los usuarios solo los suyos
+    """
+    query = db.query(Expense.user_id, Expense.receipt_url).filter(Expense.id == expense_id)
+    if current_user.role.value not in ["admin", "manager"]:
+        query = query.filter(Expense.user_id == current_user.id)
+    expense = query.first()
+    
+    if not expense or not expense.receipt_url:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recibo no encontrado"
+        )
+    
+    if storage_service.is_remote(expense.receipt_url):
+        if size is not None and size not in THUMBNAIL_SIZES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tamaño no válido. Use: {', '.join(THUMBNAIL_SIZES)}"
+            )
+        expires_in = settings.RECEIPT_SIGNED_URL_SECONDS
+        signed_url = await run_in_threadpool(
+            storage_service.signed_receipt_url,
+            expense.receipt_url,
+            expires_in,
+            THUMBNAIL_SIZES.get(size)
+        )
+        if not signed_url:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="No se pudo firmar la URL del recibo"
+            )
+        # Cachear la redirección menos tiempo del que dura la firma
+        return RedirectResponse(
+            signed_url,
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"Cache-Control": f"private, max-age={expires_in // 2}"}
+        )
+    
+    # URL local: receipts/{user_id}/{archivo}
+    filename = expense.receipt_url.rsplit("/", 1)[-1]
+    path = await resolve_receipt_file(expense.user_id, filename, size)
+    return cached_file_response(request, path, private=True)
+
 @router.put("/{expense_id}", response_model=ExpenseResponse)
 async def update_expense(
     expense_id: int,
@@ -310,6 +565,12 @@ async def update_expense(
     for field, value in update_data.items():
         setattr(expense, field, value)
     
+    if "amount" in update_data or "expense_date" in update_data:
+        expense.amount_base = fx_service.amount_base(db, expense.amount, expense.currency, expense.expense_date)
+        if expense.report_id:
+            db.flush()
+            sync_report_totals(db, expense.report_id)
+    
     db.commit()
     db.refresh(expense)
     
@@ -342,7 +603,10 @@ async def delete_expense(
         except Exception as e:
             print(f"Error deleting receipt: {e}")
     
+    report_id = expense.report_id
     db.delete(expense)
+    db.flush()
+    sync_report_totals(db, report_id)
     db.commit()
     
     return None
@@ -1,40 +1,128 @@
 """
 Report Export API - PDF and Excel generation
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, load_only
+from starlette.background import BackgroundTask
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
 from io import BytesIO
 from datetime import datetime
-from typing import Optional
+from types import SimpleNamespace
+from typing import List, Optional
+import logging
+import multiprocessing
+import re
+import zipfile
 
-# PDF generation
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-
-# Excel generation
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+# ReportLab y openpyxl se importan dentro de cada generador: son costosos
+# de importar y solo se usan al exportar (arranque en frío más rápido)
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.lazy import LazyService
+from app.core.lifecycle import in_flight
+from app.core.streaming import StreamSink
 from app.models.report import Report
 from app.models.expense import Expense
 
 from app.models.user import User
 from app.models.trip import Trip
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_current_manager_or_admin
+from app.schemas import ReportBulkExportRequest
 
 router = APIRouter()
 
-def generate_pdf_report(report: Report, expenses: list, user: User, trip: Trip = None) -> BytesIO:
+logger = logging.getLogger("uvicorn")
+
+# Anexo de recibos: una imagen por página o una cuadrícula de 2 × 3
+RECEIPT_LAYOUTS = {"page": "lg", "grid": "md"}  # diseño -> tamaño de miniatura
+
+
+def _receipt_appendix(expenses: list, layout: str, styles) -> list:
+    """
+    Elementos del anexo con las imágenes de los recibos
+
+    Las miniaturas se descargan en paralelo y quedan cacheadas en disco por
+    URL; las imágenes se insertan desde disco (lazy=2: cada archivo se abre
+    solo al dibujarlo), así la memoria no crece con el número de recibos.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import Image, PageBreak, Paragraph, Spacer, Table, TableStyle
+
+    from app.services.thumbnail_service import fetch_receipt_thumbnails
+
+    with_receipt = [e for e in expenses if e.receipt_url]
+    if not with_receipt:
+        return []
+    thumbnails = fetch_receipt_thumbnails((e.receipt_url for e in with_receipt), RECEIPT_LAYOUTS[layout])
+
+    def caption(expense) -> str:
+        fecha = expense.expense_date.strftime('%d/%m/%Y') if expense.expense_date else 'N/A'
+        return f"{fecha} · {expense.merchant or 'N/A'} · ${(expense.amount or 0) / 100:,.2f}"
+
+    def image(expense, max_width: float, max_height: float):
+        path = thumbnails.get(expense.receipt_url)
+        if not path:
+            return Paragraph("Recibo no disponible", styles['Italic'])
+        width, height = ImageReader(str(path)).getSize()
+        scale = min(max_width / width, max_height / height)
+        return Image(str(path), width=width * scale, height=height * scale, lazy=2)
+
+    elements = [PageBreak(), Paragraph("Anexo: Recibos", styles['Heading2'])]
+    if layout == "page":
+        for index, expense in enumerate(with_receipt):
+            if index:
+                elements.append(PageBreak())
+            elements.append(Paragraph(caption(expense), styles['Heading4']))
+            elements.append(Spacer(1, 0.1*inch))
+            elements.append(image(expense, 6.5*inch, 8.3*inch))
+        return elements
+
+    cell_width, cell_height = 3.2*inch, 2.6*inch
+    cells = [
+        [image(expense, cell_width - 0.2*inch, cell_height - 0.5*inch), Paragraph(caption(expense), styles['BodyText'])]
+        for expense in with_receipt
+    ]
+    rows = [cells[i:i + 2] for i in range(0, len(cells), 2)]
+    if len(rows[-1]) == 1:
+        rows[-1].append("")
+    grid = Table(rows, colWidths=[cell_width, cell_width], rowHeights=cell_height)
+    grid.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d1d5db')),
+    ]))
+    elements.append(grid)
+    return elements
+
+
+def generate_pdf_report(
+    report: Report,
+    expenses: list,
+    user: User,
+    trip: Trip = None,
+    receipts: Optional[str] = None
+) -> BytesIO:
     """
     Genera un PDF del reporte con todos los gastos
+
+    Args:
+        receipts: Anexar las imágenes de los recibos, "page" (una por página)
+            o "grid" (cuadrícula); None para solo la tabla
     """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter, A4
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+    
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter,
                            rightMargin=72, leftMargin=72,
@@ -71,7 +159,8 @@ def generate_pdf_report(report: Report, expenses: list, user: User, trip: Trip =
     info_data = [
         ['Usuario:', user.full_name],
         ['Viaje:', trip.name if trip else 'N/A'],
-        ['Período:', f"{report.start_date.strftime('%d/%m/%Y')} - {report.end_date.strftime('%d/%m/%Y')}"],
+        ['Período:', f"{report.start_date.strftime('%d/%m/%Y')} - {report.end_date.strftime('%d/%m/%Y')}"
+                     if report.start_date and report.end_date else 'N/A'],
         ['Generado:', datetime.now().strftime('%d/%m/%Y %H:%M')],
     ]
     
@@ -162,6 +251,9 @@ def generate_pdf_report(report: Report, expenses: list, user: User, trip: Trip =
     ]))
     elements.append(expenses_table)
     
+    if receipts:
+        elements.extend(_receipt_appendix(expenses, receipts, styles))
+    
     # Build PDF
     doc.build(elements)
     buffer.seek(0)
@@ -172,6 +264,10 @@ def generate_excel_report(report: Report, expenses: list, user: User) -> BytesIO
     """
     Genera un Excel del reporte con todos los gastos
     """
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    from openpyxl.utils import get_column_letter
+    
     buffer = BytesIO()
     wb = Workbook()
     ws = wb.active
@@ -277,14 +373,190 @@ def generate_excel_report(report: Report, expenses: list, user: User) -> BytesIO
 
 
 
+def _create_render_pool() -> ProcessPoolExecutor:
+    # spawn: hacer fork de un worker con hilos (threadpool de uvicorn) puede
+    # heredar locks tomados; cada proceso importa la app una sola vez
+    return ProcessPoolExecutor(
+        max_workers=settings.EXPORT_RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+# Pool de procesos para renderizar PDFs en paralelo (se crea en el primer uso);
+# su tamaño es el tope de renders simultáneos por worker web
+render_pool = LazyService(_create_render_pool)
+
+
+def render_report_pdf(report, expenses: list, user, trip=None, receipts: Optional[str] = None) -> bytes:
+    """Punto de entrada en el pool de procesos (argumentos serializables)"""
+    return generate_pdf_report(report, expenses, user, trip, receipts).getvalue()
+
+
+def _report_snapshot(report: Report, expenses: List[Expense], receipts: Optional[str] = None) -> tuple:
+    """Copia en objetos simples de lo que usa generate_pdf_report (se envía a otro proceso)"""
+    return (
+        SimpleNamespace(
+            id=report.id, title=report.title,
+            start_date=report.start_date, end_date=report.end_date
+        ),
+        [
+            SimpleNamespace(
+                expense_date=expense.expense_date,
+                description=expense.description,
+                merchant=expense.merchant,
+                amount=expense.amount,
+                receipt_url=expense.receipt_url,
+                category=SimpleNamespace(name=expense.category.name) if expense.category else None
+            )
+            for expense in expenses
+        ],
+        SimpleNamespace(full_name=report.user.full_name),
+        SimpleNamespace(name=report.trip.name) if report.trip else None,
+        receipts,
+    )
+
+
+def _zip_name(report) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", report.title).strip("_")[:50]
+    return f"reporte_{report.id}_{slug}.pdf" if slug else f"reporte_{report.id}.pdf"
+
+
+def stream_reports_zip(snapshots: List[tuple]):
+    """
+    ZIP en streaming: cada PDF se agrega y se envía en cuanto termina de renderizarse
+
+    A lo sumo EXPORT_RENDER_WORKERS PDFs de esta petición están en el pool o
+    en memoria a la vez. Si un reporte falla se agrega un .txt con el error.
+    """
+    sink = StreamSink()
+    pending = {}
+    remaining = iter(snapshots)
+
+    def submit_next() -> None:
+        for snapshot in remaining:
+            try:
+                future = render_pool.submit(render_report_pdf, *snapshot)
+            except BrokenProcessPool:
+                # Un proceso murió (p. ej. por memoria): crear un pool nuevo
+                logger.warning("⚠️ Pool de renderizado roto, recreándolo")
+                broken = render_pool.get()
+                render_pool.reset()
+                broken.shutdown(wait=False)
+                future = render_pool.submit(render_report_pdf, *snapshot)
+            pending[future] = snapshot[0]
+            if len(pending) >= settings.EXPORT_RENDER_WORKERS:
+                return
+
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            submit_next()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report = pending.pop(future)
+                    try:
+                        archive.writestr(_zip_name(report), future.result())
+                    except Exception as e:
+                        logger.error(f"❌ Error renderizando reporte {report.id}: {e}")
+                        archive.writestr(_zip_name(report)[:-4] + "_error.txt", str(e))
+                submit_next()
+                yield sink.drain()
+        # Directorio central del ZIP
+        yield sink.drain()
+    finally:
+        # Cliente desconectado: no renderizar lo que falta
+        for future in pending:
+            future.cancel()
+
+
+@router.post("/export/zip")
+async def export_reports_zip(
+    request: ReportBulkExportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_manager_or_admin)
+):
+    """
+    Exportar varios reportes en PDF dentro de un ZIP (solo managers y admins)
+
+    Recibe report_ids o un filtro (status, submitted_from/submitted_to, user_id)
+    y opcionalmente receipts ("page" o "grid") para anexar los recibos.
+    Los PDFs se renderizan en paralelo y el ZIP se envía en streaming.
+    """
+    filters = (request.status, request.submitted_from, request.submitted_to, request.user_id)
+    if not request.report_ids and all(value is None for value in filters):
+        raise HTTPException(status_code=400, detail="Indica report_ids o al menos un filtro")
+
+    query = db.query(Report).options(joinedload(Report.user), joinedload(Report.trip))
+    if request.report_ids:
+        query = query.filter(Report.id.in_(request.report_ids))
+    if request.status:
+        query = query.filter(Report.status == request.status)
+    if request.submitted_from:
+        query = query.filter(Report.submitted_at >= request.submitted_from)
+    if request.submitted_to:
+        query = query.filter(Report.submitted_at <= request.submitted_to)
+    if request.user_id:
+        query = query.filter(Report.user_id == request.user_id)
+
+    reports = query.order_by(Report.id).limit(settings.EXPORT_ZIP_MAX_REPORTS + 1).all()
+    if not reports:
+        raise HTTPException(status_code=404, detail="No hay reportes que coincidan")
+    if len(reports) > settings.EXPORT_ZIP_MAX_REPORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.EXPORT_ZIP_MAX_REPORTS} reportes por exportación"
+        )
+
+    # Gastos de todos los reportes en una consulta
+    expenses_by_report = {report.id: [] for report in reports}
+    expenses = db.query(Expense).options(
+        load_only(
+            Expense.report_id, Expense.expense_date, Expense.description,
+            Expense.merchant, Expense.amount, Expense.receipt_url
+        ),
+        joinedload(Expense.category)
+    ).filter(Expense.report_id.in_(expenses_by_report)).order_by(Expense.expense_date).all()
+    for expense in expenses:
+        expenses_by_report[expense.report_id].append(expense)
+
+    snapshots = [
+        _report_snapshot(report, expenses_by_report[report.id], request.receipts)
+        for report in reports
+    ]
+
+    with ExitStack() as stack:
+        stack.enter_context(in_flight.track("export"))
+        # Si el cliente se desconecta el generador no llega al final: cerrarlo
+        # (cancela los PDFs pendientes) y liberar el contador en una tarea de fondo
+        chunks = stream_reports_zip(snapshots)
+        stack.callback(chunks.close)
+        cleanup = stack.pop_all()
+
+    def stream():
+        # Al terminar o fallar: Starlette no ejecuta la tarea de fondo si el cuerpo lanza
+        try:
+            yield from chunks
+        finally:
+            cleanup.close()
+
+    filename = f"reportes_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
+    return StreamingResponse(
+        stream(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+        background=BackgroundTask(cleanup.close)
+    )
+
+
 @router.get("/{report_id}/export/pdf")
 async def export_report_pdf(
     report_id: int,
+    receipts: Optional[str] = Query(None, pattern="^(page|grid)$", description="Anexar recibos: page o grid"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Exportar reporte a PDF
+    Exportar reporte a PDF, opcionalmente con las imágenes de los recibos
     """
     report = db.query(Report).filter(Report.id == report_id).first()
     if not report:
@@ -296,14 +568,11 @@ async def export_report_pdf(
     expenses = db.query(Expense).filter(
         Expense.report_id == report_id
     ).all()
-    # Obtener el trip asociado (si existe) a partir del primer gasto
-    trip = None
-    for expense in expenses:
-        if expense.trip_id:
-            trip = db.query(Trip).filter(Trip.id == expense.trip_id).first()
-            break
-    # Generar PDF
-    pdf_buffer = generate_pdf_report(report, expenses, current_user, trip)
+    # Viaje asociado al reporte (reports.trip_id)
+    trip = report.trip
+    # Generar PDF fuera del event loop; el apagado del worker espera a que termine
+    with in_flight.track("export"):
+        pdf_buffer = await run_in_threadpool(generate_pdf_report, report, expenses, current_user, trip, receipts)
     filename = f"reporte_{report.id}_{datetime.now().strftime('%Y%m%d')}.pdf"
     return StreamingResponse(
         pdf_buffer,
@@ -335,8 +604,9 @@ async def export_report_excel(
         Expense.report_id == report_id
     ).all()
     
-    # Generar Excel
-    excel_buffer = generate_excel_report(report, expenses, current_user)
+    # Generar Excel fuera del event loop; el apagado del worker espera a que termine
+    with in_flight.track("export"):
+        excel_buffer = await run_in_threadpool(generate_excel_report, report, expenses, current_user)
     
     filename = f"reporte_{report.id}_{datetime.now().strftime('%Y%m%d')}.xlsx"
     
@@ -0,0 +1,93 @@
+"""
+API Routes - FX Rates (tipos de cambio hacia BASE_CURRENCY)
+"""
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+import logging
+
+from app.core.database import get_db
+from app.core.dependencies import get_current_admin_user, get_current_user
+from app.models import FxRate, User
+from app.schemas import FxRateResponse, FxRateUploadResponse
+from app.services import fx_service
+from app.services.statement_import import STATEMENT_EXTENSIONS
+
+router = APIRouter()
+logger = logging.getLogger("uvicorn")
+
+@router.get("/", response_model=List[FxRateResponse])
+def get_fx_rates(
+    currency: Optional[str] = Query(None, min_length=3, max_length=3),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Listar tipos de cambio (los más recientes primero)
+    """
+    query = db.query(FxRate)
+    if currency:
+        query = query.filter(FxRate.currency == currency.upper())
+    if start_date:
+        query = query.filter(FxRate.rate_date >= start_date)
+    if end_date:
+        query = query.filter(FxRate.rate_date <= end_date)
+    
+    return query.order_by(FxRate.rate_date.desc(), FxRate.currency)\
+        .offset(skip).limit(limit).all()
+
+def _load_and_recompute(db: Session, upload: UploadFile, recompute: bool) -> dict:
+    result = fx_service.load_rates(db, upload.file, upload.filename)
+    result["recomputed"] = 0
+    if recompute:
+        # Solo los gastos afectados: cada moneda desde su fecha más antigua cargada
+        for currency, since in result["since"].items():
+            result["recomputed"] += fx_service.recompute_amount_base(db, currency=currency, since=since)
+    return result
+
+@router.post("/upload", response_model=FxRateUploadResponse)
+async def upload_fx_rates(
+    file: UploadFile = File(...),
+    recompute: bool = Query(True, description="Recalcular amount_base de los gastos afectados"),
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cargar o corregir tipos de cambio desde un CSV o XLSX (solo admins)
+
+    Columnas: fecha, moneda y tasa (unidades de la moneda base por 1 unidad
+    de la moneda). Una fila existente (moneda, fecha) se sobrescribe.
+    """
+    file_extension = file.filename.split('.')[-1].lower()
+    if file_extension not in STATEMENT_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Extensión de archivo no permitida. Use: {', '.join(STATEMENT_EXTENSIONS)}"
+        )
+    
+    try:
+        return await run_in_threadpool(_load_and_recompute, db, file, recompute)
+    except fx_service.FxRateError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.post("/recompute")
+async def recompute_amount_base(
+    currency: Optional[str] = Query(None, min_length=3, max_length=3),
+    since: Optional[date] = None,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Recalcular amount_base con las tasas actuales (solo admins)
+    Sin filtros recalcula todos los gastos
+    """
+    updated = await run_in_threadpool(
+        fx_service.recompute_amount_base, db, currency.upper() if currency else None, since
+    )
+    return {"recomputed": updated}
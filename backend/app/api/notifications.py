@@ -1,17 +1,23 @@
 """
 Notifications API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List
+from sqlalchemy import case, desc, func, insert
+from typing import Iterable, List
 from pydantic import BaseModel
+from collections import Counter
 from datetime import datetime
+import asyncio
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.models.notification import Notification
 from app.models.user import User
 from app.core.dependencies import get_current_user
+from app.services.notification_broker import notification_broker, format_sse_event
 
 router = APIRouter()
 
@@ -62,12 +68,58 @@ async def get_unread_count(
     """
     Obtener contador de notificaciones no leídas
     """
-    count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    ).count()
+    # Lookup por primary key del contador: evita el COUNT(*) sobre notifications
+    return {"unread_count": _count_unread(db, current_user.id)}
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream SSE de notificaciones nuevas y cambios del contador de no leídas
+    Reemplaza el polling de /unread-count
+    """
+    user_id = current_user.id
+    # Leer el contador antes de tomar el cupo: un error aquí no deja la conexión registrada
+    unread_count = _count_unread(db, user_id)
+    
+    queue = notification_broker.subscribe(user_id)
+    if queue is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Demasiadas conexiones activas, intenta más tarde",
+            headers={"Retry-After": "30"}
+        )
     
-    return {"unread_count": count}
+    async def event_stream():
+        try:
+            yield format_sse_event("unread_count", {"unread_count": unread_count})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Heartbeat para mantener viva la conexión en proxies
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse_event(message["event"], message["data"])
+        finally:
+            notification_broker.unsubscribe(user_id, queue)
+    
+    # unsubscribe es idempotente: la tarea de fondo libera el cupo también si
+    # el cliente se desconecta antes de que empiece a leerse el cuerpo
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        },
+        background=BackgroundTask(notification_broker.unsubscribe, user_id, queue)
+    )
 
 @router.put("/{notification_id}/read")
 async def mark_as_read(
@@ -78,16 +130,25 @@ async def mark_as_read(
     """
     Marcar notificación como leída
     """
-    notification = db.query(Notification).filter(
+    # Update condicional: solo descuenta si realmente estaba sin leer
+    updated = db.query(Notification).filter(
         Notification.id == notification_id,
-        Notification.user_id == current_user.id
-    ).first()
+        Notification.user_id == current_user.id,
+        Notification.is_read == False
+    ).update({"is_read": True}, synchronize_session=False)
     
-    if not notification:
-        raise HTTPException(status_code=404, detail="Notificación no encontrada")
+    if not updated:
+        exists = db.query(Notification.id).filter(
+            Notification.id == notification_id,
+            Notification.user_id == current_user.id
+        ).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Notificación no encontrada")
+        return {"message": "Notificación marcada como leída"}
     
-    notification.is_read = True
+    _adjust_unread_count(db, current_user.id, -updated)
     db.commit()
+    publish_unread_count(db, current_user.id)
     
     return {"message": "Notificación marcada como leída"}
 
@@ -99,12 +160,15 @@ async def mark_all_as_read(
     """
     Marcar todas las notificaciones como leídas
     """
-    db.query(Notification).filter(
+    updated = db.query(Notification).filter(
         Notification.user_id == current_user.id,
         Notification.is_read == False
-    ).update({"is_read": True})
+    ).update({"is_read": True}, synchronize_session=False)
     
+    if updated:
+        _adjust_unread_count(db, current_user.id, -updated)
     db.commit()
+    publish_unread_count(db, current_user.id)
     
     return {"message": "Todas las notificaciones marcadas como leídas"}
 
@@ -117,20 +181,79 @@ async def delete_notification(
     """
     Eliminar notificación
     """
+    # Bloquear la fila para que un mark_as_read concurrente no descuente dos veces
     notification = db.query(Notification).filter(
         Notification.id == notification_id,
         Notification.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     
     if not notification:
         raise HTTPException(status_code=404, detail="Notificación no encontrada")
     
+    was_unread = not notification.is_read
     db.delete(notification)
+    if was_unread:
+        _adjust_unread_count(db, current_user.id, -1)
     db.commit()
+    if was_unread:
+        publish_unread_count(db, current_user.id)
     
     return {"message": "Notificación eliminada"}
 
 
+def _count_unread(db: Session, user_id: int) -> int:
+    """Leer el contador de no leídas (lookup por primary key)"""
+    count = db.query(User.unread_notifications).filter(User.id == user_id).scalar()
+    return max(count or 0, 0)
+
+
+def _adjust_unread_count(db: Session, user_id: int, delta: int):
+    """
+    Ajustar el contador de no leídas en la misma transacción que el cambio
+    Se hace con UPDATE ... SET x = x + delta para que sea atómico
+    """
+    db.query(User).filter(User.id == user_id).update(
+        {User.unread_notifications: User.unread_notifications + delta},
+        synchronize_session=False
+    )
+
+
+def recompute_unread_counts(db: Session, user_id: int | None = None) -> int:
+    """
+    Recalcular los contadores de no leídas desde la tabla de notificaciones
+    Job de reparación: corrige cualquier desviación del contador
+
+    Returns:
+        Número de usuarios actualizados
+    """
+    unread_subquery = db.query(func.count(Notification.id)).filter(
+        Notification.user_id == User.id,
+        Notification.is_read == False
+    ).scalar_subquery()
+    
+    query = db.query(User)
+    if user_id is not None:
+        query = query.filter(User.id == user_id)
+    
+    updated = query.update(
+        {User.unread_notifications: unread_subquery},
+        synchronize_session=False
+    )
+    db.commit()
+    return updated
+
+
+def publish_unread_count(db: Session, user_id: int):
+    """
+    Publicar el contador de no leídas a las conexiones SSE del usuario
+    """
+    notification_broker.publish(
+        user_id,
+        "unread_count",
+        {"unread_count": _count_unread(db, user_id)}
+    )
+
+
 # Helper function para crear notificaciones (usada por otros módulos)
 def create_notification(
     db: Session,
@@ -151,6 +274,61 @@ def create_notification(
         related_id=related_id
     )
     db.add(notification)
+    _adjust_unread_count(db, user_id, 1)
     db.commit()
     db.refresh(notification)
+    
+    # Notificar en tiempo real a las conexiones SSE abiertas
+    notification_broker.publish(
+        user_id,
+        "notification",
+        NotificationResponse.model_validate(notification).model_dump(mode="json")
+    )
+    publish_unread_count(db, user_id)
     return notification
+
+
+def add_notifications(db: Session, entries: List[dict]) -> List[tuple]:
+    """
+    Agregar varias notificaciones en la transacción actual (sin commit)
+
+    Un INSERT de varias filas y un solo UPDATE de los contadores de no leídas.
+    Publicarlas con publish_notifications después del commit.
+
+    Args:
+        entries: dicts con user_id, title, message, type y related_id
+
+    Returns:
+        [(user_id, payload SSE)] para publish_notifications
+    """
+    if not entries:
+        return []
+    now = datetime.utcnow()
+    rows = db.execute(
+        insert(Notification.__table__).returning(*Notification.__table__.c),
+        [{"related_id": None, **entry, "is_read": False, "created_at": now} for entry in entries]
+    ).all()
+
+    per_user = Counter(entry["user_id"] for entry in entries)
+    db.query(User).filter(User.id.in_(per_user)).update(
+        {User.unread_notifications: User.unread_notifications + case(per_user, value=User.id, else_=0)},
+        synchronize_session=False
+    )
+
+    return [
+        (row.user_id, NotificationResponse.model_validate(row).model_dump(mode="json"))
+        for row in rows
+    ]
+
+
+def publish_notifications(db: Session, published: Iterable[tuple]):
+    """Publicar por SSE las notificaciones de add_notifications y los contadores nuevos"""
+    published = list(published)
+    for user_id, payload in published:
+        notification_broker.publish(user_id, "notification", payload)
+
+    user_ids = {user_id for user_id, _ in published}
+    if user_ids:
+        counts = db.query(User.id, User.unread_notifications).filter(User.id.in_(user_ids))
+        for user_id, count in counts:
+            notification_broker.publish(user_id, "unread_count", {"unread_count": max(count or 0, 0)})
@@ -8,7 +8,8 @@ from datetime import datetime, timedelta
 import secrets
 from app.core.database import get_db
 from app.models.user import User
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
+from app.services.token_service import revoke_refresh_tokens
 
 router = APIRouter()
 
@@ -89,11 +90,14 @@ async def reset_password(
         )
     
     # Cambiar contraseña
-    user.hashed_password = get_password_hash(request.new_password)
+    user.hashed_password = await get_password_hash_async(request.new_password)
     user.reset_token = None
     user.reset_token_expires = None
     db.commit()
     
+    # Las sesiones abiertas con la contraseña anterior dejan de ser válidas
+    revoke_refresh_tokens(db, user_id=user.id)
+    
     return {
         "message": "Contraseña actualizada exitosamente"
     }
@@ -0,0 +1,142 @@
+"""
+API Routes - Receipts
+Entrega de imágenes de recibos guardados localmente (reemplaza StaticFiles):
+miniaturas por tamaño, HTTP Range, ETag y Cache-Control inmutable
+"""
+import mimetypes
+import re
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.core.config import settings
+from app.services import storage_service
+from app.services.thumbnail_service import THUMBNAIL_SIZES, thumbnail_service
+
+router = APIRouter()
+
+CHUNK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+SIZE_QUERY = Query(
+    None,
+    description=f"Miniatura en lugar del original: {', '.join(THUMBNAIL_SIZES)}"
+)
+
+
+def _etag(path: Path) -> str:
+    stat = path.stat()
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _parse_range(header: str, file_size: int) -> Optional[tuple]:
+    """
+    Rango (inicio, fin) inclusivo de un header Range de un solo tramo
+    None si el header no es válido (se ignora y se envía el archivo completo)
+    Lanza HTTPException 416 si el rango no se puede satisfacer
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # bytes=-N: los últimos N bytes
+        start, end = max(file_size - int(end), 0), file_size - 1
+    else:
+        start = int(start)
+        end = min(int(end), file_size - 1) if end else file_size - 1
+    if start >= file_size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Rango no válido",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    return start, end
+
+
+def _iter_file(path: Path, start: int, length: int):
+    with path.open("rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def cached_file_response(request: Request, path: Path, private: bool = False) -> Response:
+    """
+    Respuesta para un archivo inmutable con ETag, Cache-Control y soporte de Range
+    private=True para recibos servidos tras autenticación (no cachear en proxies)
+    """
+    etag = _etag(path)
+    file_size = path.stat().st_size
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"{'private' if private else 'public'}, "
+                         f"max-age={settings.RECEIPT_CACHE_MAX_AGE}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _parse_range(range_header, file_size)
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+            headers["Content-Length"] = str(length)
+            return StreamingResponse(
+                _iter_file(path, start, length),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers=headers
+            )
+
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+async def resolve_receipt_file(user_id: int, filename: str, size: Optional[str]) -> Path:
+    """
+    Archivo local (original o miniatura) de un recibo
+    Lanza HTTPException 400 con un tamaño desconocido y 404 si no existe
+    """
+    if size is not None and size not in THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tamaño no válido. Use: {', '.join(THUMBNAIL_SIZES)}"
+        )
+
+    path = storage_service.local_path(user_id, filename)
+    if path and size:
+        path = await run_in_threadpool(thumbnail_service.get_thumbnail, path, user_id, size)
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recibo no encontrado"
+        )
+    return path
+
+
+@router.api_route("/{user_id}/{filename}", methods=["GET", "HEAD"])
+async def get_receipt_file(
+    user_id: int,
+    filename: str,
+    request: Request,
+    size: Optional[str] = SIZE_QUERY
+):
+    """
+    Servir un recibo local (URL receipts/{user_id}/{archivo} guardada en el gasto)
+    Los nombres son UUID, así que la respuesta se puede cachear para siempre
+    """
+    path = await resolve_receipt_file(user_id, filename, size)
+    return cached_file_response(request, path)
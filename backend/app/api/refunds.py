@@ -2,13 +2,16 @@
 Refund API Endpoints - Gestión de devoluciones por excedentes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, or_, not_
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import logging
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, get_current_manager_or_admin
+from app.core.serialization import FastSerializer
 from app.models.user import User
 from app.models.refund import Refund, RefundStatus, RefundMethod
 from app.models.trip import Trip
@@ -26,10 +29,51 @@ from app.api.notifications import create_notification
 router = APIRouter()
 logger = logging.getLogger("uvicorn")
 
+refund_list_serializer = FastSerializer(List[RefundResponse])
+
+
+def _refund_query(db: Session):
+    """
+    Query de devoluciones con viaje y usuario cargados en el mismo SELECT
+    Evita dos lazy loads por fila al rellenar trip_name/user_name/user_email
+    """
+    return db.query(Refund).options(
+        joinedload(Refund.trip).load_only(Trip.name),
+        joinedload(Refund.user).load_only(User.full_name, User.email)
+    )
+
+
+def _overdue_condition(now: datetime):
+    """Vencida = ya marcada por el sweeper o pendiente con plazo cumplido"""
+    return or_(
+        Refund.status == RefundStatus.overdue,
+        and_(
+            Refund.status == RefundStatus.pending,
+            Refund.due_date.isnot(None),
+            Refund.due_date < now
+        )
+    )
+
+
+def _present_overdue(refund: Refund) -> None:
+    """
+    Mostrar como vencida una devolución pendiente fuera de plazo aunque el
+    sweeper aún no haya corrido (o no haya beat en el despliegue)
+    Solo cambia la respuesta: set_committed_value no deja cambios por guardar
+    """
+    if refund.is_overdue:
+        set_committed_value(refund, "status", RefundStatus.overdue)
+
+
 @router.get("/", response_model=List[RefundResponse])
 async def get_refunds(
     status: Optional[str] = None,
     user_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    min_amount: Optional[int] = None,
+    max_amount: Optional[int] = None,
+    overdue: Optional[bool] = None,
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
@@ -39,41 +83,60 @@ async def get_refunds(
     Obtener lista de devoluciones
     - Usuarios normales solo ven sus propias devoluciones
     - Admins/managers ven todas
+    - Filtros: rango de fechas de creación, rango de excedente (centavos) y vencidas
     """
     logger.info(f"📋 GET /refunds/ - User: {current_user.email}, Role: {current_user.role.value}")
     
     # Si es admin o manager, puede ver todas las devoluciones
     if current_user.role.value in ["admin", "manager"]:
-        query = db.query(Refund)
+        query = _refund_query(db)
         logger.info("✅ Admin/Manager query (all refunds)")
     else:
         # Los usuarios normales solo ven sus propias devoluciones
-        query = db.query(Refund).filter(Refund.user_id == current_user.id)
+        query = _refund_query(db).filter(Refund.user_id == current_user.id)
         logger.info(f"👤 Employee query (user_id={current_user.id})")
     
-    # Filtros
-    if status:
+    # Filtros (pending/overdue según el plazo, no solo según el último sweep)
+    now = datetime.utcnow()
+    if status == RefundStatus.overdue.value:
+        query = query.filter(_overdue_condition(now))
+    elif status == RefundStatus.pending.value:
+        query = query.filter(Refund.status == RefundStatus.pending, not_(_overdue_condition(now)))
+    elif status:
         query = query.filter(Refund.status == status)
     
     if user_id and current_user.role.value in ["admin", "manager"]:
         query = query.filter(Refund.user_id == user_id)
     
+    if start_date:
+        query = query.filter(Refund.created_at >= start_date)
+    
+    if end_date:
+        query = query.filter(Refund.created_at < end_date + timedelta(days=1))
+    
+    if min_amount is not None:
+        query = query.filter(Refund.excess_amount >= min_amount)
+    
+    if max_amount is not None:
+        query = query.filter(Refund.excess_amount <= max_amount)
+    
+    if overdue is not None:
+        overdue_condition = _overdue_condition(now)
+        query = query.filter(overdue_condition if overdue else not_(overdue_condition))
+    
     refunds = query.order_by(Refund.created_at.desc()).offset(skip).limit(limit).all()
     
     # Agregar información adicional
+    # (el estado "overdue" lo persiste el sweeper programado, no la lectura)
     for refund in refunds:
+        _present_overdue(refund)
         refund.trip_name = refund.trip.name if refund.trip else None
         refund.user_name = refund.user.full_name if refund.user else None
         refund.user_email = refund.user.email if refund.user else None
-        
-        # Actualizar status si está vencida
-        if refund.is_overdue and refund.status == RefundStatus.PENDING:
-            refund.status = RefundStatus.OVERDUE
     
-    db.commit()
     logger.info(f"📊 Found {len(refunds)} refunds")
     
-    return refunds
+    return refund_list_serializer.response(refunds)
 
 @router.get("/{refund_id}", response_model=RefundWithDetails)
 async def get_refund(
@@ -88,9 +151,9 @@ async def get_refund(
     
     # Buscar devolución
     if current_user.role.value in ["admin", "manager"]:
-        refund = db.query(Refund).filter(Refund.id == refund_id).first()
+        refund = _refund_query(db).filter(Refund.id == refund_id).first()
     else:
-        refund = db.query(Refund).filter(
+        refund = _refund_query(db).filter(
             Refund.id == refund_id,
             Refund.user_id == current_user.id
         ).first()
@@ -100,15 +163,11 @@ async def get_refund(
         raise HTTPException(status_code=404, detail="Devolución no encontrada")
     
     # Agregar información adicional
+    _present_overdue(refund)
     refund.trip_name = refund.trip.name if refund.trip else None
     refund.user_name = refund.user.full_name if refund.user else None
     refund.user_email = refund.user.email if refund.user else None
     
-    # Actualizar status si está vencida
-    if refund.is_overdue and refund.status == RefundStatus.pending:
-        refund.status = RefundStatus.overdue
-        db.commit()
-    
     logger.info(f"✅ Refund found: ID={refund.id}, Status={refund.status}")
     return refund
 
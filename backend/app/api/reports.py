@@ -1,28 +1,104 @@
 """
 API Routes - Reports
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session, load_only, undefer
+from sqlalchemy import func, insert, select
 from typing import List, Optional
 from datetime import datetime
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, get_current_manager_or_admin
-from app.models import Report, Expense, User, Approval
+from app.core.serialization import FastSerializer
+from app.models import Report, ReportStatus, Expense, ExpenseStatus, User, Approval
 from app.schemas import (
     ReportCreate, 
     ReportUpdate, 
     ReportResponse, 
     ReportWithExpenses, 
-    ExpenseResponse,
+    ApprovalQueueItem,
     ApprovalRequest,
-    ApprovalResponse
+    ApprovalResponse,
+    BulkDecisionRequest,
+    BulkDecisionResponse
 )
-from app.api.notifications import create_notification
+from app.api.notifications import add_notifications, create_notification, publish_notifications
+from app.services import fx_service
 
 router = APIRouter()
 
+report_list_serializer = FastSerializer(List[ReportResponse])
+report_detail_serializer = FastSerializer(ReportWithExpenses)
+approval_queue_serializer = FastSerializer(List[ApprovalQueueItem])
+
+# Orden de la cola de aprobación; cada uno recorre un índice parcial de reports
+QUEUE_SORTS = {
+    "newest": (Report.submitted_at.desc(),),
+    "oldest": (Report.submitted_at.asc(),),
+    "amount_desc": (Report.total_amount.desc(), Report.submitted_at.desc()),
+    "amount_asc": (Report.total_amount.asc(), Report.submitted_at.asc()),
+}
+
+def sync_report_totals(db: Session, *report_ids: int) -> None:
+    """
+    Recalcular reports.total_amount (en BASE_CURRENCY) en la base de datos (sin commit)
+
+    El total persistido respalda el orden y el filtro por monto de la cola de
+    aprobación; se actualiza cada vez que cambian los gastos de un reporte.
+    Solo reportes abiertos (borrador o enviados): los aprobados, rechazados o
+    pagados conservan el total con el que se decidieron.
+    """
+    report_ids = [report_id for report_id in report_ids if report_id is not None]
+    if not report_ids:
+        return
+    total = (
+        select(func.coalesce(func.sum(Expense.amount_base), 0))
+        .where(Expense.report_id == Report.id)
+        .scalar_subquery()
+    )
+    db.query(Report).filter(
+        Report.id.in_(report_ids),
+        Report.status.in_((ReportStatus.DRAFT, ReportStatus.SUBMITTED))
+    ).update({Report.total_amount: total}, synchronize_session=False)
+
+def _set_report_totals(report: Report, expenses: List[Expense]) -> None:
+    """
+    Totales para la respuesta: total_amount en BASE_CURRENCY sin los gastos
+    sin tipo de cambio, que se cuentan aparte en unconverted_count
+    """
+    report.expense_count = len(expenses)
+    report.total_amount = sum(e.amount_base or 0 for e in expenses)
+    report.unconverted_count = sum(e.amount_base is None for e in expenses)
+
+def _require_converted(db: Session, report_id: int) -> None:
+    """Enviar o aprobar fija el total: 409 si algún gasto no tiene tipo de cambio"""
+    unconverted = db.query(Expense).options(
+        load_only(Expense.id, Expense.currency, Expense.expense_date, Expense.amount_base)
+    ).filter(Expense.report_id == report_id, Expense.amount_base.is_(None)).all()
+    if unconverted:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=fx_service.unconverted_detail(unconverted)
+        )
+
+def _decision_notification(user_id: int, report_id: int, title: str, approved: bool, comments: Optional[str]) -> dict:
+    """Notificación para el dueño del reporte tras aprobarlo o rechazarlo"""
+    if approved:
+        return {
+            "user_id": user_id,
+            "title": "Reporte aprobado",
+            "message": f"Tu reporte '{title}' ha sido aprobado.",
+            "type": "report_approved",
+            "related_id": report_id,
+        }
+    return {
+        "user_id": user_id,
+        "title": "Reporte rechazado",
+        "message": f"Tu reporte '{title}' ha sido rechazado. {comments or ''}",
+        "type": "report_rejected",
+        "related_id": report_id,
+    }
+
 @router.get("/", response_model=List[ReportResponse])
 async def get_reports(
     skip: int = 0,
@@ -50,32 +126,67 @@ async def get_reports(
     # Calcular totales para cada reporte
     for report in reports:
         expenses = db.query(Expense).filter(Expense.report_id == report.id).all()
-        report.expense_count = len(expenses)
-        report.total_amount = sum(e.amount for e in expenses)
+        _set_report_totals(report, expenses)
     
-    return reports
+    return report_list_serializer.response(reports)
 
-@router.get("/pending", response_model=List[ReportResponse])
+@router.get("/pending", response_model=List[ApprovalQueueItem])
 async def get_pending_reports(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
+    sort: str = Query("newest", pattern="^(newest|oldest|amount_desc|amount_asc)$"),
+    user_id: Optional[int] = Query(None, description="Solo reportes de este solicitante"),
+    min_amount: Optional[int] = Query(None, ge=0, description="Total mínimo en centavos"),
     current_user: User = Depends(get_current_manager_or_admin),
     db: Session = Depends(get_db)
 ):
     """
-    Listar reportes pendientes de aprobación (solo managers y admins)
+    Cola de aprobación: reportes enviados (solo managers y admins)
+
+    Una sola consulta: la página se resuelve sobre los índices parciales de
+    reportes enviados y solo para esas filas se agregan los gastos (conteo y
+    fecha más antigua) y se une el nombre del solicitante.
     """
-    reports = db.query(Report).filter(
-        Report.status == "submitted"
-    ).order_by(Report.submitted_at.desc()).offset(skip).limit(limit).all()
-    
-    # Calcular totales para cada reporte
-    for report in reports:
-        expenses = db.query(Expense).filter(Expense.report_id == report.id).all()
-        report.expense_count = len(expenses)
-        report.total_amount = sum(e.amount for e in expenses)
-    
-    return reports
+    order = QUEUE_SORTS[sort]
+    page = db.query(Report.id).filter(Report.status == ReportStatus.SUBMITTED)
+    if user_id is not None:
+        page = page.filter(Report.user_id == user_id)
+    if min_amount is not None:
+        page = page.filter(Report.total_amount >= min_amount)
+    page = page.order_by(*order).offset(skip).limit(limit).cte("queue_page")
+
+    stats = (
+        select(
+            Expense.report_id,
+            func.count(Expense.id).label("expense_count"),
+            (func.count(Expense.id) - func.count(Expense.amount_base)).label("unconverted_count"),
+            func.min(Expense.expense_date).label("oldest_expense_date")
+        )
+        .where(Expense.report_id.in_(select(page.c.id)))
+        .group_by(Expense.report_id)
+        .subquery()
+    )
+    rows = (
+        db.query(
+            Report, User.full_name, stats.c.expense_count, stats.c.unconverted_count,
+            stats.c.oldest_expense_date
+        )
+        .join(page, page.c.id == Report.id)
+        .join(User, User.id == Report.user_id)
+        .outerjoin(stats, stats.c.report_id == Report.id)
+        .order_by(*order)
+        .all()
+    )
+
+    reports = []
+    for report, submitter_name, expense_count, unconverted_count, oldest_expense_date in rows:
+        report.submitter_name = submitter_name
+        report.expense_count = expense_count or 0
+        report.unconverted_count = unconverted_count or 0
+        report.oldest_expense_date = oldest_expense_date
+        reports.append(report)
+
+    return approval_queue_serializer.response(reports)
 
 @router.post("/", response_model=ReportResponse, status_code=status.HTTP_201_CREATED)
 async def create_report(
@@ -128,18 +239,18 @@ async def get_report(
             detail="Reporte no encontrado"
         )
     
-    # Obtener gastos del reporte
-    expenses = db.query(Expense).filter(Expense.report_id == report_id).all()
+    # Obtener gastos del reporte (con ocr_data: la respuesta usa ExpenseResponse)
+    expenses = db.query(Expense).options(undefer(Expense.ocr_data))\
+        .filter(Expense.report_id == report_id).all()
     
     # Calcular totales
-    report.expense_count = len(expenses)
-    report.total_amount = sum(e.amount for e in expenses)
+    _set_report_totals(report, expenses)
     
-    # Crear respuesta con gastos
-    report_dict = ReportWithExpenses.model_validate(report).model_dump()
-    report_dict['expenses'] = [ExpenseResponse.model_validate(e) for e in expenses]
+    # Crear respuesta con gastos (una sola validación por gasto)
+    report_data = ReportResponse.model_validate(report).model_dump()
+    report_data['expenses'] = expenses
     
-    return report_dict
+    return report_detail_serializer.response(report_data)
 
 @router.put("/{report_id}", response_model=ReportResponse)
 async def update_report(
@@ -177,8 +288,7 @@ async def update_report(
     
     # Calcular totales
     expenses = db.query(Expense).filter(Expense.report_id == report_id).all()
-    report.expense_count = len(expenses)
-    report.total_amount = sum(e.amount for e in expenses)
+    _set_report_totals(report, expenses)
     
     return report
 
@@ -230,13 +340,16 @@ async def add_expense_to_report(
     
     # Asignar el gasto al reporte
     expense.report_id = report_id
+    if report.trip_id is None and expense.trip_id:
+        report.trip_id = expense.trip_id
+    db.flush()
+    sync_report_totals(db, report_id)
     db.commit()
     db.refresh(report)
     
     # Calcular totales
     expenses = db.query(Expense).filter(Expense.report_id == report_id).all()
-    report.expense_count = len(expenses)
-    report.total_amount = sum(e.amount for e in expenses)
+    _set_report_totals(report, expenses)
     
     return report
 
@@ -283,13 +396,14 @@ async def remove_expense_from_report(
     
     # Quitar el gasto del reporte
     expense.report_id = None
+    db.flush()
+    sync_report_totals(db, report_id)
     db.commit()
     db.refresh(report)
     
     # Calcular totales
     expenses = db.query(Expense).filter(Expense.report_id == report_id).all()
-    report.expense_count = len(expenses)
-    report.total_amount = sum(e.amount for e in expenses)
+    _set_report_totals(report, expenses)
     
     return report
 
@@ -326,6 +440,7 @@ async def submit_report(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El reporte debe tener al menos un gasto"
         )
+    _require_converted(db, report_id)
     
     # Cambiar estado
     report.status = "submitted"
@@ -333,14 +448,14 @@ async def submit_report(
     
     # Cambiar estado de todos los gastos a pending
     db.query(Expense).filter(Expense.report_id == report_id).update({"status": "pending"})
+    sync_report_totals(db, report_id)
     
     db.commit()
     db.refresh(report)
     
     # Calcular totales
     expenses = db.query(Expense).filter(Expense.report_id == report_id).all()
-    report.expense_count = len(expenses)
-    report.total_amount = sum(e.amount for e in expenses)
+    _set_report_totals(report, expenses)
     
     return report
 
@@ -368,6 +483,7 @@ async def approve_report(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Solo se pueden aprobar reportes enviados"
         )
+    _require_converted(db, report_id)
     
     # Cambiar estado del reporte
     report.status = "approved"
@@ -388,19 +504,12 @@ async def approve_report(
     db.refresh(report)
     
     # Crear notificación para el usuario
-    create_notification(
-        db=db,
-        user_id=report.user_id,
-        title="Reporte aprobado",
-        message=f"Tu reporte '{report.title}' ha sido aprobado.",
-        notification_type="report_approved",
-        related_id=report_id
-    )
+    notification = _decision_notification(report.user_id, report_id, report.title, True, approval_data.comments)
+    create_notification(db=db, notification_type=notification.pop("type"), **notification)
     
     # Calcular totales
     expenses = db.query(Expense).filter(Expense.report_id == report_id).all()
-    report.expense_count = len(expenses)
-    report.total_amount = sum(e.amount for e in expenses)
+    _set_report_totals(report, expenses)
     
     return report
 
@@ -448,22 +557,114 @@ async def reject_report(
     db.refresh(report)
     
     # Crear notificación para el usuario
-    create_notification(
-        db=db,
-        user_id=report.user_id,
-        title="Reporte rechazado",
-        message=f"Tu reporte '{report.name}' ha sido rechazado. {approval_data.comments or ''}",
-        notification_type="report_rejected",
-        related_id=report_id
-    )
+    notification = _decision_notification(report.user_id, report_id, report.title, False, approval_data.comments)
+    create_notification(db=db, notification_type=notification.pop("type"), **notification)
     
     # Calcular totales
     expenses = db.query(Expense).filter(Expense.report_id == report_id).all()
-    report.expense_count = len(expenses)
-    report.total_amount = sum(e.amount for e in expenses)
+    _set_report_totals(report, expenses)
     
     return report
 
+@router.post("/bulk-decision", response_model=BulkDecisionResponse)
+async def bulk_decision(
+    request: BulkDecisionRequest,
+    current_user: User = Depends(get_current_manager_or_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Aprobar y/o rechazar varios reportes en una sola transacción (solo managers y admins)
+
+    Actualiza estados de reportes y gastos con un UPDATE por decisión, inserta
+    las aprobaciones y notificaciones en lote y hace un único commit.
+    Devuelve el resultado de cada reporte; los que no están enviados se omiten,
+    igual que las aprobaciones de reportes con gastos sin tipo de cambio.
+    """
+    # La primera decisión de cada reporte es la que cuenta
+    decisions = {}
+    for item in request.decisions:
+        decisions.setdefault(item.report_id, item)
+
+    # Bloquear las filas: una aprobación individual concurrente no puede intercalarse
+    reports = {
+        row.id: row
+        for row in db.query(Report.id, Report.user_id, Report.title, Report.status)
+        .filter(Report.id.in_(decisions))
+        .with_for_update()
+    }
+
+    # Aprobar fija el total: no con gastos sin tipo de cambio (ver _require_converted)
+    unconverted = dict(
+        db.query(Expense.report_id, func.count(Expense.id))
+        .filter(Expense.report_id.in_(reports), Expense.amount_base.is_(None))
+        .group_by(Expense.report_id)
+        .all()
+    )
+
+    approve_ids, reject_ids = [], []
+    approvals, notifications = [], []
+    outcomes = {}
+    for report_id, item in decisions.items():
+        report = reports.get(report_id)
+        if report is None:
+            outcomes[report_id] = ("not_found", "Reporte no encontrado")
+            continue
+        if report.status != ReportStatus.SUBMITTED:
+            outcomes[report_id] = ("invalid_status", f"Estado actual: {report.status.value}")
+            continue
+
+        approved = item.decision == "approve"
+        if approved and unconverted.get(report_id):
+            outcomes[report_id] = ("unconverted", f"{unconverted[report_id]} gastos sin tipo de cambio")
+            continue
+
+        (approve_ids if approved else reject_ids).append(report_id)
+        approvals.append({
+            "report_id": report_id,
+            "approver_id": current_user.id,
+            "approved": 1 if approved else 0,
+            "comments": item.comments,
+        })
+        notifications.append(_decision_notification(report.user_id, report_id, report.title, approved, item.comments))
+        outcomes[report_id] = ("approved" if approved else "rejected", None)
+
+    for ids, report_status, expense_status in (
+        (approve_ids, ReportStatus.APPROVED, ExpenseStatus.APPROVED),
+        (reject_ids, ReportStatus.REJECTED, ExpenseStatus.REJECTED),
+    ):
+        if not ids:
+            continue
+        db.query(Report).filter(Report.id.in_(ids)).update(
+            {Report.status: report_status}, synchronize_session=False
+        )
+        db.query(Expense).filter(Expense.report_id.in_(ids)).update(
+            {Expense.status: expense_status}, synchronize_session=False
+        )
+
+    if approvals:
+        db.execute(insert(Approval.__table__), approvals)
+    published = add_notifications(db, notifications)
+    db.commit()
+
+    # Después del commit: las conexiones SSE solo ven decisiones confirmadas
+    publish_notifications(db, published)
+
+    # Resultados en el orden de la petición
+    results = []
+    for item in request.decisions:
+        if decisions[item.report_id] is item:
+            outcome, detail = outcomes[item.report_id]
+        else:
+            outcome, detail = "duplicate", "Reporte repetido en la petición"
+        results.append({"report_id": item.report_id, "decision": item.decision, "outcome": outcome, "detail": detail})
+
+    return {
+        "approved": len(approve_ids),
+        "rejected": len(reject_ids),
+        "skipped": len(results) - len(approve_ids) - len(reject_ids),
+        "results": results,
+    }
+
 @router.get("/{report_id}/export")
 async def export_report(report_id: int, format: str = "pdf"):
     return {"message": f"Export report {report_id} as {format} - To be implemented"}
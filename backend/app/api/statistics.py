@@ -8,6 +8,7 @@ from typing import Optional
 from datetime import datetime, date, timedelta
 import logging
 
+from app.core.config import settings
 from app.core.dependencies import get_db, get_current_user
 from app.models.user import User
 from app.models.expense import Expense
@@ -52,12 +53,15 @@ async def get_overview_statistics(
         Expense.expense_date <= end_date
     )
     
-    # Total gastado
-    total_spent = expenses_query.with_entities(func.sum(Expense.amount)).scalar() or 0
+    # Total gastado (en BASE_CURRENCY)
+    total_spent = expenses_query.with_entities(func.sum(Expense.amount_base)).scalar() or 0
     
     # Cantidad de gastos
     expenses_count = expenses_query.count()
     
+    # Gastos sin tipo de cambio cargado (no suman en los totales)
+    unconverted_count = expenses_query.filter(Expense.amount_base.is_(None)).count()
+    
     # Cantidad de viajes
     trips_count = trips_query.count()
     active_trips = trips_query.filter(Trip.status == "active").count()
@@ -73,6 +77,8 @@ async def get_overview_statistics(
     return {
         "total_spent": total_spent,
         "expenses_count": expenses_count,
+        "unconverted_count": unconverted_count,
+        "base_currency": settings.BASE_CURRENCY,
         "trips_count": trips_count,
         "active_trips": active_trips,
         "completed_trips": completed_trips,
@@ -102,7 +108,7 @@ async def get_expenses_by_category(
     query = db.query(
         Category.name,
         Category.id,
-        func.sum(Expense.amount).label('total'),
+        func.coalesce(func.sum(Expense.amount_base), 0).label('total'),
         func.count(Expense.id).label('count')
     ).join(Expense, Expense.category_id == Category.id)
     
@@ -117,7 +123,7 @@ async def get_expenses_by_category(
     )
     
     # Agrupar y ordenar
-    results = query.group_by(Category.id, Category.name).order_by(func.sum(Expense.amount).desc()).all()
+    results = query.group_by(Category.id, Category.name).order_by(func.coalesce(func.sum(Expense.amount_base), 0).desc()).all()
     
     # Calcular total para porcentajes
     total = sum(r.total for r in results)
@@ -154,7 +160,7 @@ async def get_monthly_trend(
     query = db.query(
         extract('year', Expense.expense_date).label('year'),
         extract('month', Expense.expense_date).label('month'),
-        func.sum(Expense.amount).label('total'),
+        func.coalesce(func.sum(Expense.amount_base), 0).label('total'),
         func.count(Expense.id).label('count')
     )
     
@@ -199,11 +205,11 @@ async def get_top_users(
         User.id,
         User.full_name,
         User.email,
-        func.sum(Expense.amount).label('total'),
+        func.coalesce(func.sum(Expense.amount_base), 0).label('total'),
         func.count(Expense.id).label('count')
     ).join(Expense, Expense.user_id == User.id)\
      .group_by(User.id, User.full_name, User.email)\
-     .order_by(func.sum(Expense.amount).desc())\
+     .order_by(func.coalesce(func.sum(Expense.amount_base), 0).desc())\
      .limit(limit).all()
     
     top_users = []
@@ -252,7 +258,7 @@ async def get_budget_compliance(
     
     for trip in trips_with_budget:
         # Sumar gastos del viaje
-        total_expenses = db.query(func.sum(Expense.amount))\
+        total_expenses = db.query(func.sum(Expense.amount_base))\
             .filter(Expense.trip_id == trip.id)\
             .scalar() or 0
         
@@ -271,3 +277,59 @@ async def get_budget_compliance(
         "over_budget": over_budget,
         "compliance_rate": round(compliance_rate, 2)
     }
+
+@router.get("/ocr-discrepancies")
+async def get_ocr_discrepancies(
+    max_confidence: int = Query(default=70, ge=0, le=100),
+    min_difference: int = Query(default=1, ge=0, description="Diferencia mínima en centavos"),
+    include_mock: bool = False,
+    limit: int = Query(default=100, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Gastos con OCR de baja confianza cuyo monto detectado difiere del capturado
+    (solo admin/manager). Se resuelve en SQL con las columnas OCR promovidas
+    """
+    if current_user.role.value not in ["admin", "manager"]:
+        return {"error": "No autorizado"}
+    
+    logger.info(f"📊 GET /statistics/ocr-discrepancies - max_confidence: {max_confidence}")
+    
+    difference = func.abs(Expense.amount - Expense.ocr_amount)
+    query = db.query(
+        Expense.id,
+        Expense.user_id,
+        Expense.amount,
+        Expense.ocr_amount,
+        Expense.merchant,
+        Expense.ocr_merchant,
+        Expense.expense_date,
+        Expense.ocr_date,
+        Expense.ocr_confidence,
+        difference.label('difference')
+    ).filter(
+        Expense.ocr_confidence <= max_confidence,
+        Expense.ocr_amount.isnot(None),
+        difference >= min_difference
+    )
+    if not include_mock:
+        query = query.filter(Expense.ocr_is_mock.is_(False))
+    
+    results = query.order_by(difference.desc(), Expense.id).limit(limit).all()
+    
+    return [
+        {
+            "expense_id": r.id,
+            "user_id": r.user_id,
+            "amount": r.amount,
+            "ocr_amount": r.ocr_amount,
+            "difference": r.difference,
+            "merchant": r.merchant,
+            "ocr_merchant": r.ocr_merchant,
+            "expense_date": r.expense_date.isoformat(),
+            "ocr_date": r.ocr_date.isoformat() if r.ocr_date else None,
+            "ocr_confidence": r.ocr_confidence
+        }
+        for r in results
+    ]
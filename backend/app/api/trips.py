@@ -1,21 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, case
 from typing import List, Optional
 from datetime import date, datetime
 import logging
 
-from app.core.dependencies import get_db, get_current_user
+from app.core.config import settings
+from app.core.dependencies import get_db, get_current_manager_or_admin, get_current_user
+from app.core.serialization import FastSerializer
 from app.models.user import User
 from app.models.trip import Trip as TripModel
-from app.models.expense import Expense
+from app.models.expense import Expense, EXPENSE_SUMMARY_COLUMNS
+from app.models.category import Category
 from app.models.report import Report
-from app.schemas.trip import Trip, TripCreate, TripUpdate, TripWithExpenses
+from app.schemas.trip import (
+    Trip, TripCreate, TripUpdate, TripWithExpenses, TripSummary, CategorySubtotal, TripForecastResponse
+)
+from app.schemas.expense import ExpenseSummary
 from app.schemas.report import ReportResponse
 from app.api.notifications import create_notification
+from app.services import fx_service
+from app.services.forecast_service import spend_forecast
 
 router = APIRouter()
 logger = logging.getLogger("uvicorn")
 
+forecast_serializer = FastSerializer(TripForecastResponse)
+
 
 @router.get("/", response_model=List[Trip])
 def get_trips(
@@ -37,6 +48,98 @@ def get_trips(
     return trips
 
 
+@router.get("/summary", response_model=List[TripSummary])
+def get_trips_summary(
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    destination: Optional[str] = None,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Listado de viajes con gasto total, cantidad de gastos y % de presupuesto usado
+    Todo se calcula en una sola query agrupada (sin cargar los gastos)
+    - spent no incluye los gastos sin tipo de cambio (unconverted_count)
+    - start_date/end_date: viajes que se solapan con el rango
+    - destination: prefijo del destino (sin distinguir mayúsculas)
+    - user_id: dueño del viaje
+    """
+    spent = func.coalesce(func.sum(Expense.amount_base), 0)
+    unconverted = func.count(Expense.id) - func.count(Expense.amount_base)
+    budget_used_pct = case(
+        (TripModel.budget > 0, spent * 100.0 / TripModel.budget),
+        else_=None
+    )
+    
+    query = db.query(
+        TripModel,
+        spent.label("spent"),
+        func.count(Expense.id).label("expense_count"),
+        unconverted.label("unconverted_count"),
+        budget_used_pct.label("budget_used_pct")
+    ).outerjoin(Expense, Expense.trip_id == TripModel.id)
+    
+    if status:
+        query = query.filter(TripModel.status == status)
+    
+    if start_date:
+        query = query.filter(TripModel.end_date >= start_date)
+    
+    if end_date:
+        query = query.filter(TripModel.start_date <= end_date)
+    
+    if destination:
+        query = query.filter(TripModel.destination.ilike(f"{destination}%"))
+    
+    if user_id:
+        query = query.filter(TripModel.user_id == user_id)
+    
+    rows = query.group_by(TripModel.id)\
+        .order_by(TripModel.start_date.desc())\
+        .offset(skip).limit(limit).all()
+    
+    trips = []
+    for trip, trip_spent, expense_count, unconverted_count, used_pct in rows:
+        trip.spent = trip_spent
+        trip.expense_count = expense_count
+        trip.unconverted_count = unconverted_count
+        trip.budget_used_pct = round(float(used_pct), 2) if used_pct is not None else None
+        trips.append(trip)
+    
+    return trips
+
+
+@router.get("/forecast", response_model=TripForecastResponse)
+def get_trips_forecast(
+    over_budget_only: bool = False,
+    user_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=10000),
+    refresh: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_manager_or_admin)
+):
+    """
+    Proyección de gasto de todos los viajes activos (solo managers y admins)
+    - Gasto proyectado a fin de viaje y a fin de mes según el ritmo diario observado
+    - Viajes ordenados por excedente proyectado sobre el presupuesto
+    - Se calcula una vez al día; refresh=true fuerza el recálculo
+    - Los totales son de todos los viajes activos; los filtros solo acotan la lista
+    """
+    result = spend_forecast.forecast(db, refresh=refresh)
+    
+    trips = result["trips"]
+    if over_budget_only:
+        trips = [t for t in trips if t["projected_over_budget"]]
+    if user_id:
+        trips = [t for t in trips if t["user_id"] == user_id]
+    
+    return forecast_serializer.response({**result, "trips": trips[:limit]})
+
+
 @router.post("/", response_model=Trip)
 def create_trip(
     trip: TripCreate,
@@ -63,12 +166,17 @@ def create_trip(
 @router.get("/{trip_id}", response_model=TripWithExpenses)
 def get_trip(
     trip_id: int,
+    expenses_skip: int = Query(0, ge=0),
+    expenses_limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Obtener un viaje por ID con sus gastos
+    Obtener un viaje por ID con una página de sus gastos
     Los admins y managers pueden ver cualquier viaje
+    - Los gastos se devuelven sin datos de OCR (proyección ligera)
+    - Subtotales por categoría calculados en SQL; no incluyen los gastos sin
+      tipo de cambio (unconverted_count)
     """
     # Si es admin o manager, puede ver cualquier viaje
     if current_user.role.value in ["admin", "manager"]:
@@ -83,7 +191,47 @@ def get_trip(
     if not trip:
         raise HTTPException(status_code=404, detail="Viaje no encontrado")
     
-    return trip
+    # Página de gastos sin cargar las columnas pesadas de OCR
+    expenses = db.query(Expense).options(
+        load_only(*EXPENSE_SUMMARY_COLUMNS)
+    ).filter(
+        Expense.trip_id == trip_id
+    ).order_by(
+        Expense.expense_date.desc(), Expense.id.desc()
+    ).offset(expenses_skip).limit(expenses_limit).all()
+    
+    # Subtotales por categoría (también dan el total y el conteo del viaje)
+    subtotals = db.query(
+        Category.id,
+        Category.name,
+        func.coalesce(func.sum(Expense.amount_base), 0).label("total"),
+        func.count(Expense.id).label("count"),
+        (func.count(Expense.id) - func.count(Expense.amount_base)).label("unconverted")
+    ).join(Expense, Expense.category_id == Category.id)\
+     .filter(Expense.trip_id == trip_id)\
+     .group_by(Category.id, Category.name)\
+     .order_by(func.coalesce(func.sum(Expense.amount_base), 0).desc())\
+     .all()
+    
+    return TripWithExpenses(
+        **Trip.model_validate(trip).model_dump(),
+        expenses=[ExpenseSummary.model_validate(e) for e in expenses],
+        expenses_total=sum(r.count for r in subtotals),
+        expenses_skip=expenses_skip,
+        expenses_limit=expenses_limit,
+        spent=sum(r.total for r in subtotals),
+        category_subtotals=[
+            CategorySubtotal(
+                category_id=r.id,
+                category_name=r.name,
+                total_amount=r.total,
+                expenses_count=r.count,
+                unconverted_count=r.unconverted
+            )
+            for r in subtotals
+        ],
+        unconverted_count=sum(r.unconverted for r in subtotals)
+    )
 
 
 @router.put("/{trip_id}", response_model=Trip)
@@ -139,10 +287,10 @@ def delete_trip(
     if not db_trip:
         raise HTTPException(status_code=404, detail="Viaje no encontrado")
     
-    # Eliminar reportes asociados al viaje (buscar por título que contenga el nombre del viaje)
+    # Eliminar reportes asociados al viaje
     reports = db.query(Report).filter(
-        Report.user_id == current_user.id,
-        Report.title.like(f"%{db_trip.name}%")
+        Report.trip_id == trip_id,
+        Report.user_id == current_user.id
     ).all()
     
     for report in reports:
@@ -157,6 +305,21 @@ def delete_trip(
     return {"message": "Viaje eliminado correctamente"}
 
 
+def _trip_total_base(trip_id: int, expenses: List[Expense]) -> int:
+    """
+    Total del viaje en la moneda base para el reporte y el excedente de presupuesto
+
+    Un gasto sin tipo de cambio (amount_base NULL) no puede contarse como 0:
+    el total y la devolución saldrían de menos. Se rechaza con 409 hasta que
+    se carguen las tasas (la carga recalcula amount_base).
+    """
+    unconverted = sum(e.amount_base is None for e in expenses)
+    if unconverted:
+        logger.warning(f"⚠️ Viaje {trip_id}: {unconverted} gastos sin tipo de cambio a {settings.BASE_CURRENCY}")
+        raise HTTPException(status_code=409, detail=fx_service.unconverted_detail(expenses))
+    return sum(e.amount_base for e in expenses)
+
+
 @router.post("/{trip_id}/complete")
 async def complete_trip(
     trip_id: int,
@@ -190,13 +353,13 @@ async def complete_trip(
     
     # Buscar reporte existente para este viaje
     existing_report = db.query(Report).filter(
-        Report.user_id == current_user.id,
-        Report.title.like(f"%{db_trip.name}%")
+        Report.trip_id == trip_id,
+        Report.user_id == current_user.id
     ).first()
     
     if expenses:
         # Calcular el total
-        total_amount = sum(e.amount for e in expenses)
+        total_amount = _trip_total_base(trip_id, expenses)
         
         if existing_report:
             # Actualizar reporte existente
@@ -213,6 +376,7 @@ async def complete_trip(
             
             db_report = Report(
                 user_id=current_user.id,
+                trip_id=trip_id,
                 title=report_title,
                 description=report_description,
                 status="draft",
@@ -321,8 +485,8 @@ def generate_report_from_trip(
     
     # Verificar si ya existe un reporte para este viaje
     existing_report = db.query(Report).filter(
-        Report.user_id == current_user.id,
-        Report.title.like(f"%{db_trip.name}%")
+        Report.trip_id == trip_id,
+        Report.user_id == current_user.id
     ).first()
     
     if existing_report:
@@ -336,10 +500,11 @@ def generate_report_from_trip(
     report_description = f"Reporte generado automáticamente del viaje '{db_trip.name}' ({db_trip.start_date} a {db_trip.end_date})"
     
     # Calcular el total antes de crear el reporte
-    total_amount = sum(e.amount for e in expenses)
+    total_amount = _trip_total_base(trip_id, expenses)
     
     db_report = Report(
         user_id=current_user.id,
+        trip_id=trip_id,
         title=report_title,
         description=report_description,
         status="draft",
@@ -396,40 +561,23 @@ def get_trip_report(
     
     logger.info(f"🔍 Found trip: '{db_trip.name}', searching for report...")
     
-    # Buscar reportes que tengan gastos de este viaje
-    expenses_with_report = db.query(Expense).filter(
-        Expense.trip_id == trip_id,
-        Expense.report_id != None
-    ).first()
-    
-    if expenses_with_report and expenses_with_report.report_id:
-        logger.info(f"💡 Found expense with report_id={expenses_with_report.report_id}")
-        report = db.query(Report).filter(Report.id == expenses_with_report.report_id).first()
-        if report:
-            logger.info(f"✅ Report found! ID={report.id}, Title='{report.title}'")
-            # Calcular totales
-            expenses = db.query(Expense).filter(Expense.report_id == report.id).all()
-            report.expense_count = len(expenses)
-            report.total_amount = sum(e.amount for e in expenses)
-            return report
-        else:
-            logger.warning(f"⚠️ Report ID {expenses_with_report.report_id} referenced but not found in DB")
-    else:
-        logger.info(f"ℹ️ No expenses with report_id found for trip {trip_id}")
-    
-    # Si no se encontró por gastos, buscar por título como fallback
-    logger.info(f"🔎 Searching by title containing '{db_trip.name}'")
     report = db.query(Report).filter(
-        Report.title.ilike(f"%{db_trip.name}%")
-    ).first()
-    
-    if report:
-        logger.info(f"✅ Report found by title! ID={report.id}, Title='{report.title}'")
-        # Calcular totales
-        expenses = db.query(Expense).filter(Expense.report_id == report.id).all()
-        report.expense_count = len(expenses)
-        report.total_amount = sum(e.amount for e in expenses)
-        return report
-    
-    logger.error(f"❌ No report found for trip {trip_id} ('{db_trip.name}')")
-    raise HTTPException(status_code=404, detail="Este viaje no tiene un reporte asociado")
+        Report.trip_id == trip_id
+    ).order_by(Report.created_at.desc()).first()
+    
+    if not report:
+        logger.error(f"❌ No report found for trip {trip_id} ('{db_trip.name}')")
+        raise HTTPException(status_code=404, detail="Este viaje no tiene un reporte asociado")
+    
+    logger.info(f"✅ Report found! ID={report.id}, Title='{report.title}'")
+    
+    # Calcular totales en SQL
+    expense_count, total_amount, unconverted_count = db.query(
+        func.count(Expense.id),
+        func.coalesce(func.sum(Expense.amount_base), 0),
+        func.count(Expense.id) - func.count(Expense.amount_base)
+    ).filter(Expense.report_id == report.id).one()
+    report.expense_count = expense_count
+    report.total_amount = total_amount
+    report.unconverted_count = unconverted_count
+    return report
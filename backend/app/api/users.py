@@ -5,14 +5,14 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.core.dependencies import get_current_user, get_current_admin_user
+from app.core.dependencies import get_current_user, get_current_db_user, get_current_admin_user
 from app.models import User
 from app.schemas import UserResponse
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_db_user)):
     """
     Obtener información del usuario actual
     """
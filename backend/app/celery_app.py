@@ -0,0 +1,81 @@
+"""
+Celery Application - Tareas programadas en segundo plano
+"""
+from celery import Celery
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+celery_app = Celery(
+    "expense_control",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+)
+
+celery_app.conf.update(
+    timezone="UTC",
+    task_ignore_result=True,
+    beat_schedule={
+        "sweep-overdue-refunds": {
+            "task": "app.celery_app.sweep_overdue_refunds",
+            "schedule": 15 * 60,  # Cada 15 minutos
+        },
+        "recompute-unread-counts": {
+            "task": "app.celery_app.recompute_unread_counts",
+            "schedule": 24 * 60 * 60,  # Diario
+        },
+        "purge-expired-refresh-tokens": {
+            "task": "app.celery_app.purge_expired_refresh_tokens",
+            "schedule": 24 * 60 * 60,  # Diario
+        },
+    },
+)
+
+
+@celery_app.task
+def sweep_overdue_refunds() -> int:
+    """Marcar devoluciones vencidas"""
+    from app.services.refund_sweeper import mark_overdue_refunds
+
+    db = SessionLocal()
+    try:
+        return mark_overdue_refunds(db)
+    finally:
+        db.close()
+
+
+@celery_app.task
+def recompute_unread_counts() -> int:
+    """Reparar contadores de notificaciones no leídas"""
+    from app.api.notifications import recompute_unread_counts as recompute
+
+    db = SessionLocal()
+    try:
+        return recompute(db)
+    finally:
+        db.close()
+
+
+@celery_app.task
+def purge_expired_refresh_tokens() -> int:
+    """Borrar refresh tokens expirados"""
+    from app.services.token_service import purge_expired_refresh_tokens as purge
+
+    db = SessionLocal()
+    try:
+        return purge(db)
+    finally:
+        db.close()
+
+
+@celery_app.task
+def recompute_amount_base(currency: str = None, since: str = None) -> int:
+    """Recalcular amount_base tras corregir tipos de cambio (bajo demanda, sin programar)"""
+    from datetime import date
+    from app.services.fx_service import recompute_amount_base as recompute
+
+    db = SessionLocal()
+    try:
+        return recompute(db, currency=currency, since=date.fromisoformat(since) if since else None)
+    finally:
+        db.close()
@@ -8,16 +8,39 @@ from typing import Optional
 
 from app.core.database import get_db
 from app.core.security import decode_access_token
-from app.models import User
+from app.models import User, UserRole
 
 security = HTTPBearer()
 
+def _user_from_claims(payload: dict) -> Optional[User]:
+    """
+    Usuario transitorio (no ligado a la sesión) con las claims del access token
+    Solo trae id, email, full_name, role e is_active; None si faltan claims
+    (tokens emitidos antes de las claims de autorización)
+    """
+    if not all(claim in payload for claim in ("user_id", "role", "is_active")):
+        return None
+    try:
+        role = UserRole(payload["role"])
+    except ValueError:
+        return None
+    return User(
+        id=payload["user_id"],
+        email=payload.get("sub"),
+        full_name=payload.get("name"),
+        role=role,
+        is_active=payload["is_active"]
+    )
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     """
     Obtener el usuario actual desde el token JWT
+    Autoriza con las claims del token, sin leer la base de datos. El objeto
+    devuelto no está en la sesión: para el registro completo usar
+    get_current_db_user
     """
     token = credentials.credentials
     
@@ -38,8 +61,10 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Buscar usuario
-    user = db.query(User).filter(User.email == email).first()
+    user = _user_from_claims(payload)
+    if user is None:
+        # Token sin claims de autorización: buscar usuario
+        user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,6 +79,27 @@ async def get_current_user(
     
     return user
 
+async def get_current_db_user(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Registro completo del usuario actual, cargado en la sesión
+    Para endpoints que necesitan columnas fuera de las claims del token
+    """
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuario inactivo"
+        )
+    return user
+
 async def get_current_admin_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
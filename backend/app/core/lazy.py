@@ -0,0 +1,52 @@
+"""
+Lazy service providers
+Los servicios con dependencias pesadas o clientes de red se crean en el
+primer uso en lugar de al importar el módulo (arranque en frío más rápido)
+"""
+import threading
+from typing import Any, Callable
+
+
+class LazyService:
+    """
+    Proxy que construye el servicio real la primera vez que se accede a un atributo
+
+    Uso:
+        storage_service = LazyService(StorageService)
+        storage_service.upload_receipt(...)   # StorageService() se crea aquí
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def get(self) -> Any:
+        """Instancia real del servicio (la crea si hace falta)"""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def reset(self) -> None:
+        """Descartar la instancia; la siguiente llamada crea una nueva"""
+        with self._lock:
+            object.__setattr__(self, "_instance", None)
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.get(), name, value)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self.initialized else "pending"
+        return f"<LazyService {getattr(self._factory, '__name__', self._factory)} ({state})>"
@@ -0,0 +1,112 @@
+"""
+Application lifecycle: warmup por worker y drenado al apagar
+"""
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn")
+
+
+class InFlightTracker:
+    """
+    Contador de operaciones largas en curso (exportaciones) por worker
+
+    Al apagar, el worker deja de aceptar operaciones nuevas (503) y espera a
+    que terminen las que están en curso. El plazo es uno solo desde el inicio
+    del apagado (SHUTDOWN_DRAIN_SECONDS): la espera de uvicorn a las
+    conexiones abiertas y drain() lo comparten.
+    """
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.draining = False
+        self.deadline: Optional[float] = None  # time.monotonic()
+
+    @contextmanager
+    def track(self, kind: str):
+        with self._lock:
+            if self.draining:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="El servidor se está reiniciando, intenta de nuevo",
+                    headers={"Retry-After": "5"}
+                )
+            self._counts[kind] = self._counts.get(kind, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._counts[kind] -= 1
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(self._counts.values())
+
+    def begin_shutdown(self, timeout: float) -> float:
+        """
+        Marcar el inicio del apagado (rechaza operaciones nuevas) y fijar el
+        plazo; llamadas posteriores conservan el primero. Devuelve el plazo
+        """
+        with self._lock:
+            self.draining = True
+            if self.deadline is None:
+                self.deadline = time.monotonic() + timeout
+            return self.deadline
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Esperar a que terminen las operaciones en curso hasta el plazo fijado
+        por begin_shutdown (o timeout desde ahora); False si se agotó el tiempo
+        """
+        deadline = self.begin_shutdown(timeout)
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.25)
+        return self.in_flight == 0
+
+
+in_flight = InFlightTracker()
+
+
+def warm_up() -> None:
+    """
+    Preparar el worker antes de aceptar tráfico (bloqueante: ejecutar en un hilo)
+
+    - Abre WARMUP_DB_CONNECTIONS conexiones del pool a la vez y las devuelve
+    - Inicializa los servicios diferidos (clientes de Supabase y Google Vision)
+    """
+    from app.core.database import engine
+    from app.services import ocr_service, storage_service
+
+    start = time.perf_counter()
+
+    connections = []
+    try:
+        for _ in range(settings.WARMUP_DB_CONNECTIONS):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    except Exception as e:
+        logger.warning(f"⚠️ Warmup: no se pudo abrir el pool de la base de datos: {e}")
+    finally:
+        for connection in connections:
+            connection.close()
+
+    for service in (storage_service, ocr_service):
+        try:
+            service.get()
+        except Exception as e:
+            logger.warning(f"⚠️ Warmup: {service!r} no se pudo inicializar: {e}")
+
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"🔥 Worker listo en {elapsed:.0f} ms ({len(connections)} conexiones en el pool)")
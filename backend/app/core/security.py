@@ -1,13 +1,33 @@
 """
 Security utilities: password hashing, JWT tokens
 """
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__max_rounds=12)
+logger = logging.getLogger("uvicorn")
+
+# min = max = rounds: needs_update() marca los hashes con otro costo para re-hashearlos
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -23,22 +43,386 @@ def get_password_hash(password: str) -> str:
         password = password[:72]
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and return a new hash if the stored one uses another cost
+    Returns (valid, new_hash or None)
+    """
+    if len(plain_password) > 72:
+        plain_password = plain_password[:72]
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Pool de hilos dedicado y acotado para bcrypt
+    
+    bcrypt libera el GIL, así que el hashing corre en paralelo sin bloquear el
+    event loop. Si hay más de workers + max_queue operaciones en curso se
+    rechaza al instante con 503 en lugar de encolar sin límite.
+    """
+    
+    def __init__(self, workers: int, max_queue: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.capacity = workers + max_queue
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+    
+    def _acquire(self) -> None:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servidor ocupado, intenta de nuevo en unos segundos",
+                    headers={"Retry-After": "2"}
+                )
+            self.in_flight += 1
+    
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+    
+    async def run(self, fn, *args):
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self._release()
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password en el pool de hashing (503 si está saturado)"""
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash en el pool de hashing (503 si está saturado)"""
+    return await password_hasher.run(get_password_hash, password)
+
+REVOCATION_CHANNEL = "auth:revocations"
+REVOKED_TOKEN_KEY = "auth:revoked:{}"
+REVOKED_BEFORE_KEY = "auth:revoked_before:{}"
+REVOKED_SESSION_KEY = "auth:revoked_session:{}"
+
+
+class TokenCache:
+    """
+    LRU de tokens ya verificados, indexado por SHA-256 del token
+    
+    Evita repetir la decodificación y verificación HMAC de python-jose en cada
+    request: las claims se reutilizan hasta el exp del token.
+    
+    Revocaciones (logout, reset de contraseña, reutilización de refresh token):
+    - memory: solo en este worker (desarrollo con un único proceso)
+    - redis: se guardan en Redis con TTL (auth:revoked:<jti>,
+      auth:revoked_before:<user_id> y auth:revoked_session:<sid>) y se difunden por el canal
+      auth:revocations; cada worker las aplica a su caché al instante. Un
+      token que no está en caché se comprueba contra Redis al decodificarlo y
+      uno en caché se vuelve a comprobar cada TOKEN_REVOCATION_RECHECK_SECONDS
+      (por si se perdió un mensaje mientras el listener reconectaba)
+    """
+    
+    def __init__(self, max_size: int, shared: bool = False):
+        self.max_size = max_size
+        self.shared = shared
+        # digest -> (claims, último momento en que se comprobó contra Redis)
+        self._entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        # Conjunto de revocación compacto: jti (o digest si el token no trae jti) -> exp
+        self._revoked_tokens: Dict[str, float] = {}
+        self._revoked_before: Dict[int, float] = {}   # user_id -> timestamp (con fracción de segundo)
+        self._revoked_sessions: Dict[str, float] = {}  # sid (familia de refresh tokens) -> vence la marca
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_pid: Optional[int] = None
+        self._listener: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.decode_seconds = 0.0
+        self.store_errors = 0
+    
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    def get(self, token: str) -> Optional[dict]:
+        """Claims en caché si el token sigue vigente; None si hay que decodificarlo"""
+        key = self.digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, checked_at = entry
+            if payload.get("exp", 0) <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        
+        if self.shared and now - checked_at >= settings.TOKEN_REVOCATION_RECHECK_SECONDS:
+            if self._revoked_in_store(payload, key):
+                with self._lock:
+                    self._entries.pop(key, None)
+                    self.misses += 1
+                return None
+            with self._lock:
+                if key in self._entries:
+                    self._entries[key] = (payload, now)
+        
+        with self._lock:
+            self.hits += 1
+        return payload
+    
+    def put(self, token: str, payload: dict, decode_seconds: float) -> bool:
+        """
+        Guardar las claims de un token recién verificado
+        Devuelve False (y no lo guarda) si el token está revocado
+        """
+        key = self.digest(token)
+        with self._lock:
+            self.decode_seconds += decode_seconds
+            if self._revoked_locally(payload, key):
+                return False
+        
+        if self.shared and self._revoked_in_store(payload, key):
+            return False
+        
+        with self._lock:
+            # Una revocación pudo llegar por el canal mientras se consultaba Redis
+            if self._revoked_locally(payload, key):
+                return False
+            self._entries[key] = (payload, time.time())
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return True
+    
+    def revoke_token(self, token: str, payload: dict) -> None:
+        """
+        Revocar un token ya verificado (logout) en todos los workers
+        La marca se guarda por jti y dura lo que le queda de vida al token
+        """
+        key = self.digest(token)
+        exp = payload["exp"]
+        ttl = int(exp - time.time()) + 1
+        if ttl <= 0:
+            return
+        token_id = payload.get("jti") or key
+        message = {"type": "token", "id": token_id, "exp": exp, "digest": key}
+        self._apply(message)
+        if self.shared:
+            self._store(REVOKED_TOKEN_KEY.format(token_id), exp, ttl, message)
+    
+    def revoke_user(self, user_id: int) -> None:
+        """
+        Revocar en todos los workers los access tokens de un usuario emitidos
+        hasta ahora (reset de contraseña, cambio de rol o desactivación)
+        """
+        cutoff = time.time()
+        self._apply({"type": "user", "id": user_id, "cutoff": cutoff})
+        if self.shared:
+            self._store(REVOKED_BEFORE_KEY.format(user_id), cutoff,
+                        settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60 + 1,
+                        {"type": "user", "id": user_id, "cutoff": cutoff})
+    
+    def revoke_session(self, session_id: str) -> None:
+        """
+        Revocar en todos los workers los access tokens de una sesión (claim
+        sid = familia de refresh tokens): logout o refresh token reutilizado
+        """
+        max_age = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        message = {"type": "session", "id": session_id, "exp": time.time() + max_age}
+        self._apply(message)
+        if self.shared:
+            self._store(REVOKED_SESSION_KEY.format(session_id), message["exp"], max_age + 1, message)
+    
+    def _revoked_locally(self, payload: dict, key: str) -> bool:
+        """Llamar con el lock tomado"""
+        if (payload.get("jti") or key) in self._revoked_tokens:
+            return True
+        if payload.get("sid") in self._revoked_sessions:
+            return True
+        revoked_before = self._revoked_before.get(payload.get("user_id"))
+        # iat con fracción de segundo: <= también cubre tokens del mismo segundo
+        # emitidos antes de la revocación (tokens viejos con iat entero)
+        return revoked_before is not None and payload.get("iat", 0) <= revoked_before
+    
+    def _apply(self, message: dict) -> None:
+        """Aplicar una revocación (propia o recibida de otro worker) a la caché local"""
+        now = time.time()
+        with self._lock:
+            if message["type"] == "token":
+                self._entries.pop(message.get("digest"), None)
+                # Purgar revocaciones de tokens que ya expiraron por sí solos
+                for expired in [k for k, e in self._revoked_tokens.items() if e <= now]:
+                    del self._revoked_tokens[expired]
+                self._revoked_tokens[message["id"]] = message["exp"]
+                for key in [k for k, (p, _) in self._entries.items() if p.get("jti") == message["id"]]:
+                    del self._entries[key]
+            elif message["type"] == "session":
+                for expired in [k for k, e in self._revoked_sessions.items() if e <= now]:
+                    del self._revoked_sessions[expired]
+                self._revoked_sessions[message["id"]] = message["exp"]
+                for key in [k for k, (p, _) in self._entries.items() if p.get("sid") == message["id"]]:
+                    del self._entries[key]
+            else:
+                user_id, cutoff = message["id"], message["cutoff"]
+                # Marcas más viejas que la vida de un access token ya no afectan a ninguno
+                max_age = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+                for stale in [u for u, ts in self._revoked_before.items() if ts < now - max_age]:
+                    del self._revoked_before[stale]
+                self._revoked_before[user_id] = max(cutoff, self._revoked_before.get(user_id, 0))
+                for key in [k for k, (p, _) in self._entries.items() if p.get("user_id") == user_id]:
+                    del self._entries[key]
+    
+    # --- Redis (AUTH_REVOCATION_BACKEND=redis) ---
+    
+    def _get_redis(self):
+        # Un cliente por proceso: las conexiones no sobreviven al fork de gunicorn
+        if self._redis is None or self._redis_pid != os.getpid():
+            import redis
+            self._redis = redis.Redis.from_url(
+                settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+            self._redis_pid = os.getpid()
+        self._ensure_listener()
+        return self._redis
+    
+    def _store(self, key: str, value: float, ttl: int, message: dict) -> None:
+        try:
+            pipe = self._get_redis().pipeline()
+            pipe.set(key, repr(value), ex=ttl)
+            pipe.publish(REVOCATION_CHANNEL, json.dumps(message))
+            pipe.execute()
+        except Exception as e:
+            self.store_errors += 1
+            logger.error(f"❌ No se pudo guardar la revocación en Redis (solo aplica en este worker): {e}")
+    
+    def _revoked_in_store(self, payload: dict, key: str) -> bool:
+        """Consultar las revocaciones compartidas (un MGET); False si Redis no responde"""
+        try:
+            token_revoked, revoked_before, session_revoked = self._get_redis().mget(
+                REVOKED_TOKEN_KEY.format(payload.get("jti") or key),
+                REVOKED_BEFORE_KEY.format(payload.get("user_id")),
+                REVOKED_SESSION_KEY.format(payload.get("sid"))
+            )
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"⚠️ Redis no disponible para revisar revocaciones: {e}")
+            return False
+        if token_revoked is not None:
+            self._apply({"type": "token", "id": payload.get("jti") or key,
+                         "exp": payload.get("exp", time.time()), "digest": key})
+            return True
+        if session_revoked is not None and payload.get("sid"):
+            self._apply({"type": "session", "id": payload["sid"], "exp": float(session_revoked)})
+            return True
+        if revoked_before is not None and payload.get("iat", 0) <= float(revoked_before):
+            self._apply({"type": "user", "id": payload.get("user_id"), "cutoff": float(revoked_before)})
+            return True
+        return False
+    
+    def _ensure_listener(self) -> None:
+        if self._listener is not None and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name="token-revocations", daemon=True)
+            self._listener.start()
+    
+    def _listen(self) -> None:
+        """Suscripción por worker al canal de revocaciones (reconecta si se cae)"""
+        import redis
+        
+        while True:
+            try:
+                client = redis.Redis.from_url(settings.REDIS_URL, health_check_interval=30)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REVOCATION_CHANNEL)
+                for item in pubsub.listen():
+                    try:
+                        self._apply(json.loads(item["data"]))
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning(f"⚠️ Mensaje de revocación inválido: {e}")
+            except Exception as e:
+                logger.warning(f"⚠️ Listener de revocaciones desconectado, reintentando: {e}")
+                time.sleep(1)
+    
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            decodes = self.misses or 1
+            avg_decode_ms = self.decode_seconds / decodes * 1000
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "avg_decode_ms": round(avg_decode_ms, 4),
+                "time_saved_ms": round(self.hits * avg_decode_ms, 2),
+                "revoked_tokens": len(self._revoked_tokens),
+                "revoked_sessions": len(self._revoked_sessions),
+                "revocation_backend": "redis" if self.shared else "memory",
+                "store_errors": self.store_errors,
+            }
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, shared=settings.AUTH_REVOCATION_BACKEND == "redis")
+
+def access_token_claims(user) -> dict:
+    """
+    Claims del access token: bastan para autorizar sin leer la fila del usuario
+    (ver get_current_user)
+    """
+    return {
+        "sub": user.email,
+        "user_id": user.id,
+        "role": user.role.value,
+        "is_active": bool(user.is_active),
+        "name": user.full_name,
+    }
+
+def create_refresh_token() -> Tuple[str, str]:
+    """Refresh token opaco y su SHA-256 (lo único que se guarda en la base)"""
+    token = secrets.token_urlsafe(48)
+    return token, hashlib.sha256(token.encode()).hexdigest()
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # iat con fracción de segundo: un token emitido justo después de revoke_user
+    # en el mismo segundo sigue siendo válido (y uno anterior no)
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": secrets.token_urlsafe(8)})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 def decode_access_token(token: str) -> Optional[dict]:
-    """Decode and verify JWT token"""
+    """Decode and verify JWT token (cached until exp, honoring revocations)"""
+    # Las revocaciones sacan el token de la caché: un acierto siempre es válido
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    
+    start = time.perf_counter()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+    if not token_cache.put(token, payload, time.perf_counter() - start):
+        return None
+    return payload
@@ -0,0 +1,37 @@
+"""
+Fast JSON serialization for large responses
+"""
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+class FastSerializer:
+    """
+    Serializador precompilado (TypeAdapter) para respuestas grandes
+
+    Valida los datos una sola vez desde filas ORM o tuplas Row
+    (from_attributes) y genera el JSON en pydantic-core, sin pasar por
+    jsonable_encoder ni por la segunda validación de response_model que
+    hace FastAPI. El endpoint conserva response_model para la documentación.
+
+    Uso:
+        expense_list_serializer = FastSerializer(List[ExpenseResponse])
+        return expense_list_serializer.response(expenses)
+    """
+
+    def __init__(self, type_: Any):
+        self.adapter = TypeAdapter(type_)
+
+    def dump_json(self, data: Any) -> bytes:
+        value = self.adapter.validate_python(data, from_attributes=True)
+        return self.adapter.dump_json(value)
+
+    def response(self, data: Any, status_code: int = 200) -> Response:
+        """Respuesta JSON lista para devolver desde un endpoint"""
+        return Response(
+            content=self.dump_json(data),
+            status_code=status_code,
+            media_type="application/json"
+        )
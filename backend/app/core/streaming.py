@@ -0,0 +1,39 @@
+"""
+Streaming helpers para respuestas generadas por bloques
+"""
+from typing import List
+
+
+class StreamSink:
+    """
+    Archivo de solo escritura que acumula bytes hasta que se drenan
+
+    Permite que escritores que esperan un archivo (ParquetWriter, ZipFile)
+    generen una respuesta en streaming: se escribe un bloque, se drena y se
+    envía. Sin seek(): ZipFile lo detecta y usa descriptores de datos.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -1,19 +1,41 @@
 """
 FastAPI Application Entry Point
 """
+from contextlib import asynccontextmanager
+import logging
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse
 import os
 from app.core.config import settings
-from app.api import auth, expenses, reports, categories, users, trips, refunds, statistics, password_reset, export, notifications
+from app.core.lifecycle import in_flight, warm_up
+from app.api import auth, expenses, reports, categories, users, trips, refunds, statistics, password_reset, export, notifications, receipts, fx_rates
+
+logger = logging.getLogger("uvicorn")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cada worker abre su pool y sus clientes antes de aceptar tráfico
+    await run_in_threadpool(warm_up)
+    yield
+    # Apagado: uvicorn ya dejó de aceptar conexiones y esperó las peticiones
+    # abiertas; aquí se espera a las exportaciones que sigan generándose en hilos
+    if in_flight.in_flight:
+        logger.info(f"⏳ Esperando {in_flight.in_flight} exportaciones en curso antes de apagar")
+    if not await in_flight.drain(settings.SHUTDOWN_DRAIN_SECONDS):
+        logger.warning(f"⚠️ Apagado con {in_flight.in_flight} exportaciones sin terminar")
+    if export.render_pool.initialized:
+        export.render_pool.shutdown(wait=False, cancel_futures=True)
 
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.PROJECT_NAME,
     version="0.1.0",
     description="API para Control de Gastos - OCR Intelligence",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # CORS Configuration
@@ -25,11 +47,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Servir archivos estáticos de recibos
+# Servir recibos locales (miniaturas, Range, ETag y caché inmutable)
 # Usar disco persistente en Render (/data/receipts) o carpeta local en desarrollo
 RECEIPTS_DIR = os.getenv("RECEIPTS_DIR", "/data/receipts")
 os.makedirs(RECEIPTS_DIR, exist_ok=True)
-app.mount("/receipts", StaticFiles(directory=RECEIPTS_DIR), name="receipts")
+app.include_router(receipts.router, prefix="/receipts", tags=["Receipts"])
 
 # Health Check
 @app.get("/health")
@@ -100,6 +122,7 @@ app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(trips.router, prefix="/api/trips", tags=["Trips"])
 app.include_router(refunds.router, prefix="/api/refunds", tags=["Refunds"])
 app.include_router(statistics.router, prefix="/api/statistics", tags=["Statistics"])
+app.include_router(fx_rates.router, prefix="/api/fx-rates", tags=["FX Rates"])
 
 if __name__ == "__main__":
     import uvicorn
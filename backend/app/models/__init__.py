@@ -7,6 +7,8 @@ from app.models.expense import Expense, ExpenseStatus
 from app.models.report import Report, ReportStatus
 from app.models.approval import Approval
 from app.models.trip import Trip
+from app.models.refresh_token import RefreshToken
+from app.models.fx_rate import FxRate
 
 __all__ = [
     "User",
@@ -18,4 +20,6 @@ __all__ = [
     "ReportStatus",
     "Approval",
     "Trip",
+    "RefreshToken",
+    "FxRate",
 ]
@@ -1,9 +1,11 @@
 """
 Expense Model
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum as SQLEnum
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Date, Boolean, ForeignKey, Text, JSON, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred, relationship
+from datetime import date, datetime
+from typing import Optional
 import enum
 from app.core.database import Base
 
@@ -19,21 +21,32 @@ class Expense(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
-    report_id = Column(Integer, ForeignKey("reports.id"), nullable=True)
-    trip_id = Column(Integer, ForeignKey("trips.id"), nullable=True)
+    report_id = Column(Integer, ForeignKey("reports.id"), nullable=True, index=True)
+    trip_id = Column(Integer, ForeignKey("trips.id"), nullable=True, index=True)
     
     # Datos del gasto
     amount = Column(Integer, nullable=False)  # En centavos para precisión
     currency = Column(String(3), default="USD", nullable=False)
+    # amount convertido a BASE_CURRENCY con la tasa de expense_date (fx_service);
+    # NULL si aún no hay tasa para la moneda. Los agregados suman esta columna
+    amount_base = Column(Integer, nullable=True)
     merchant = Column(String(255), nullable=True)  # Comercio/Proveedor
     description = Column(Text, nullable=True)
-    expense_date = Column(DateTime, nullable=False)
+    expense_date = Column(DateTime, nullable=False, index=True)
     
     # OCR y recibo
     receipt_url = Column(String(500), nullable=True)
     receipt_original_name = Column(String(255), nullable=True)
-    ocr_data = Column(Text, nullable=True)  # JSON con datos extraídos
-    ocr_confidence = Column(Integer, nullable=True)  # 0-100
+    # Resultado completo del OCR (incluye raw_text); JSONB en Postgres, JSON en SQLite
+    # Diferido: solo se carga al acceder o con undefer(Expense.ocr_data)
+    ocr_data = deferred(Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True))
+    ocr_confidence = Column(Integer, nullable=True, index=True)  # 0-100
+    
+    # Campos detectados por el OCR, promovidos a columnas (ver ocr_columns)
+    ocr_amount = Column(Integer, nullable=True, index=True)  # En centavos
+    ocr_date = Column(Date, nullable=True, index=True)
+    ocr_merchant = Column(String(255), nullable=True, index=True)
+    ocr_is_mock = Column(Boolean, default=False, server_default="false", nullable=False, index=True)
     
     # Estado
     status = Column(SQLEnum(ExpenseStatus), default=ExpenseStatus.DRAFT, nullable=False)
@@ -47,3 +60,80 @@ class Expense(Base):
     category = relationship("Category", back_populates="expenses")
     report = relationship("Report", back_populates="expenses")
     trip = relationship("Trip", back_populates="expenses")
+
+
+# Formatos de fecha que reconoce OCRService._extract_date (día primero)
+OCR_DATE_FORMATS = (
+    "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y",
+    "%Y-%m-%d", "%Y/%m/%d",
+    "%b %d, %Y", "%b %d %Y", "%B %d, %Y", "%B %d %Y",
+)
+
+
+def parse_ocr_date(value: Optional[str]) -> Optional[date]:
+    """Convertir la fecha detectada por el OCR; None si no se reconoce"""
+    if not value:
+        return None
+    for fmt in OCR_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def ocr_columns(ocr_result: Optional[dict]) -> dict:
+    """
+    Valores de las columnas OCR de Expense a partir del resultado de OCRService
+
+    Uso: Expense(..., **ocr_columns(ocr_result))
+    """
+    if not ocr_result:
+        return {
+            "ocr_data": None, "ocr_confidence": None, "ocr_amount": None,
+            "ocr_date": None, "ocr_merchant": None, "ocr_is_mock": False,
+        }
+
+    amount = ocr_result.get("amount")
+    merchant = (ocr_result.get("merchant") or "").strip()
+    return {
+        "ocr_data": ocr_result,
+        "ocr_confidence": ocr_result.get("confidence", 0),
+        "ocr_amount": int(round(float(amount) * 100)) if amount is not None else None,
+        "ocr_date": parse_ocr_date(ocr_result.get("date")),
+        "ocr_merchant": merchant[:255] or None,
+        "ocr_is_mock": bool(ocr_result.get("mock", False)),
+    }
+
+
+# Columnas de la proyección ligera (ExpenseSummary): excluye ocr_data y
+# receipt_original_name, que no se muestran en listados
+EXPENSE_SUMMARY_COLUMNS = (
+    Expense.id,
+    Expense.user_id,
+    Expense.category_id,
+    Expense.report_id,
+    Expense.trip_id,
+    Expense.amount,
+    Expense.amount_base,
+    Expense.currency,
+    Expense.merchant,
+    Expense.description,
+    Expense.expense_date,
+    Expense.receipt_url,
+    Expense.ocr_confidence,
+    Expense.status,
+    Expense.created_at,
+)
+
+# Columnas que se pueden pedir con ?fields= en los listados de gastos
+EXPENSE_FIELDS = {
+    name: getattr(Expense, name)
+    for name in (
+        "id", "user_id", "category_id", "report_id", "trip_id", "amount",
+        "amount_base", "currency", "merchant", "description", "expense_date", "receipt_url",
+        "receipt_original_name", "ocr_data", "ocr_confidence", "ocr_amount",
+        "ocr_date", "ocr_merchant", "ocr_is_mock", "status",
+        "created_at", "updated_at",
+    )
+}
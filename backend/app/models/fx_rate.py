@@ -0,0 +1,21 @@
+"""
+FX Rate Model - Tipos de cambio diarios hacia la moneda base
+"""
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, UniqueConstraint
+from datetime import datetime
+from app.core.database import Base
+
+class FxRate(Base):
+    __tablename__ = "fx_rates"
+    __table_args__ = (
+        # También resuelve "la tasa más reciente con rate_date <= fecha del gasto"
+        UniqueConstraint("currency", "rate_date", name="uq_fx_rates_currency_date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    currency = Column(String(3), nullable=False)
+    rate_date = Column(Date, nullable=False)
+    rate = Column(Numeric(18, 8), nullable=False)  # Unidades de BASE_CURRENCY por 1 unidad de currency
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
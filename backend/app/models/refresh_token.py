@@ -0,0 +1,24 @@
+"""
+Refresh Token Model
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.core.database import Base
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("idx_refresh_tokens_user_active", "user_id", "revoked_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    
+    # Solo se guarda el SHA-256 del token; el valor en claro lo tiene el cliente
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    # Todos los tokens de una misma sesión (rotaciones sucesivas) comparten familia
+    family_id = Column(String(32), nullable=False, index=True)
+    
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,7 +1,7 @@
 """
 Refund Model - Devoluciones por excedentes de presupuesto
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -24,6 +24,10 @@ class RefundMethod(str, enum.Enum):
 
 class Refund(Base):
     __tablename__ = "refunds"
+    __table_args__ = (
+        # Soporta el sweeper de vencidas: WHERE status='pending' AND due_date < now()
+        Index("idx_refunds_status_due_date", "status", "due_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     trip_id = Column(Integer, ForeignKey("trips.id"), nullable=False)
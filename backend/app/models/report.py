@@ -1,7 +1,7 @@
 """
 Report Model - Agrupación de gastos para aprobación
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -14,18 +14,31 @@ class ReportStatus(str, enum.Enum):
     REJECTED = "rejected"
     PAID = "paid"
 
+# Cola de aprobación: índices parciales solo sobre reportes enviados
+QUEUE_PREDICATE = text("status = 'SUBMITTED'")
+
+
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("idx_reports_queue_submitted_at", "submitted_at",
+              postgresql_where=QUEUE_PREDICATE, sqlite_where=QUEUE_PREDICATE),
+        Index("idx_reports_queue_user", "user_id", "submitted_at",
+              postgresql_where=QUEUE_PREDICATE, sqlite_where=QUEUE_PREDICATE),
+        Index("idx_reports_queue_amount", "total_amount", "submitted_at",
+              postgresql_where=QUEUE_PREDICATE, sqlite_where=QUEUE_PREDICATE),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    trip_id = Column(Integer, ForeignKey("trips.id", ondelete="SET NULL"), nullable=True, index=True)
     
     # Datos del reporte
     title = Column(String(255), nullable=False)
     description = Column(String(500), nullable=True)
     start_date = Column(DateTime, nullable=True)
     end_date = Column(DateTime, nullable=True)
-    total_amount = Column(Integer, default=0)  # Suma de gastos en centavos
+    total_amount = Column(Integer, default=0)  # Suma de gastos en centavos (sync_report_totals)
     currency = Column(String(3), default="USD")
     
     # Estado y fechas
@@ -38,6 +51,7 @@ class Report(Base):
     
     # Relationships
     user = relationship("User", back_populates="reports")
+    trip = relationship("Trip", back_populates="reports")
     expenses = relationship("Expense", back_populates="report")
     refund = relationship("Refund", back_populates="report", uselist=False, cascade="all, delete-orphan")
     approvals = relationship("Approval", back_populates="report", cascade="all, delete-orphan")
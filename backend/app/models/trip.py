@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,9 +6,12 @@ from app.core.database import Base
 
 class Trip(Base):
     __tablename__ = "trips"
+    __table_args__ = (
+        Index("idx_trips_status_start_date", "status", "start_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=False)  # Ej: "Viaje a Madrid"
     destination = Column(String, nullable=True)  # Ciudad/país destino
     start_date = Column(Date, nullable=False)
@@ -22,4 +25,5 @@ class Trip(Base):
     # Relationships
     user = relationship("User", back_populates="trips")
     expenses = relationship("Expense", back_populates="trip", cascade="all, delete-orphan")
+    reports = relationship("Report", back_populates="trip", passive_deletes=True)
     refund = relationship("Refund", back_populates="trip", uselist=False, cascade="all, delete-orphan")
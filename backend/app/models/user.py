@@ -23,6 +23,9 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     company_id = Column(Integer, nullable=True)  # Para multi-tenancy futuro
     
+    # Contador de notificaciones no leídas (mantenido por app.api.notifications)
+    unread_notifications = Column(Integer, default=0, server_default="0", nullable=False)
+    
     # Password reset
     reset_token = Column(String(255), nullable=True)
     reset_token_expires = Column(DateTime, nullable=True)
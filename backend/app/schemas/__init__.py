@@ -1,23 +1,30 @@
 """
 Schemas package
 """
-from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, TokenData
+from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, TokenData, RefreshRequest
 from app.schemas.expense import (
     ExpenseCreate, 
     ExpenseUpdate, 
     ExpenseResponse, 
+    ExpenseSummary,
+    ExpenseSearchResponse,
     OCRScanResponse
 )
 from app.schemas.report import (
     ReportCreate,
     ReportUpdate,
     ReportResponse,
-    ReportWithExpenses
+    ReportWithExpenses,
+    ReportBulkExportRequest,
+    ApprovalQueueItem
 )
 from app.schemas.approval import (
     ApprovalRequest,
-    ApprovalResponse
+    ApprovalResponse,
+    BulkDecisionRequest,
+    BulkDecisionResponse
 )
+from app.schemas.fx_rate import FxRateResponse, FxRateUploadResponse
 
 __all__ = [
     "UserCreate", 
@@ -25,14 +32,23 @@ __all__ = [
     "UserResponse", 
     "Token", 
     "TokenData",
+    "RefreshRequest",
     "ExpenseCreate",
     "ExpenseUpdate",
     "ExpenseResponse",
+    "ExpenseSummary",
+    "ExpenseSearchResponse",
     "OCRScanResponse",
     "ReportCreate",
     "ReportUpdate",
     "ReportResponse",
     "ReportWithExpenses",
+    "ReportBulkExportRequest",
+    "ApprovalQueueItem",
     "ApprovalRequest",
     "ApprovalResponse",
+    "BulkDecisionRequest",
+    "BulkDecisionResponse",
+    "FxRateResponse",
+    "FxRateUploadResponse",
 ]
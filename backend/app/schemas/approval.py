@@ -1,8 +1,8 @@
 """
 Pydantic Schemas for Approvals
 """
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class ApprovalRequest(BaseModel):
@@ -20,3 +20,26 @@ class ApprovalResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class ReportDecision(BaseModel):
+    """Decisión sobre un reporte dentro de una decisión masiva"""
+    report_id: int
+    decision: Literal["approve", "reject"]
+    comments: Optional[str] = None
+
+class BulkDecisionRequest(BaseModel):
+    """Request body for POST /api/reports/bulk-decision"""
+    decisions: List[ReportDecision] = Field(..., min_length=1, max_length=500)
+
+class ReportDecisionResult(BaseModel):
+    """Resultado por reporte: approved, rejected, not_found, invalid_status, unconverted o duplicate"""
+    report_id: int
+    decision: str
+    outcome: str
+    detail: Optional[str] = None
+
+class BulkDecisionResponse(BaseModel):
+    approved: int
+    rejected: int
+    skipped: int
+    results: List[ReportDecisionResult]
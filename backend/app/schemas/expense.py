@@ -2,8 +2,8 @@
 Pydantic Schemas for Expenses
 """
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 
 class ExpenseBase(BaseModel):
     category_id: int
@@ -16,7 +16,7 @@ class ExpenseBase(BaseModel):
 
 class ExpenseCreate(ExpenseBase):
     receipt_url: Optional[str] = None
-    ocr_data: Optional[str] = None
+    ocr_data: Optional[Dict[str, Any]] = None
     ocr_confidence: Optional[int] = None
 
 class ExpenseUpdate(BaseModel):
@@ -33,10 +33,15 @@ class ExpenseResponse(ExpenseBase):
     user_id: int
     report_id: Optional[int]
     trip_id: Optional[int]
+    amount_base: Optional[int] = Field(None, description="Amount in base currency cents")
     receipt_url: Optional[str]
     receipt_original_name: Optional[str]
-    ocr_data: Optional[str]
+    ocr_data: Optional[Dict[str, Any]]
     ocr_confidence: Optional[int]
+    ocr_amount: Optional[int] = None
+    ocr_date: Optional[date] = None
+    ocr_merchant: Optional[str] = None
+    ocr_is_mock: bool = False
     status: str
     created_at: datetime
     updated_at: datetime
@@ -44,6 +49,32 @@ class ExpenseResponse(ExpenseBase):
     class Config:
         from_attributes = True
 
+class ExpenseSummary(BaseModel):
+    """Proyección ligera de un gasto para listados (sin columnas de OCR)"""
+    id: int
+    user_id: int
+    category_id: int
+    report_id: Optional[int]
+    trip_id: Optional[int]
+    amount: int
+    amount_base: Optional[int] = None
+    currency: str
+    merchant: Optional[str]
+    description: Optional[str]
+    expense_date: datetime
+    receipt_url: Optional[str]
+    ocr_confidence: Optional[int]
+    status: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class ExpenseSearchResponse(BaseModel):
+    """Resultados de búsqueda ordenados por relevancia"""
+    items: List[ExpenseSummary]
+    next_cursor: Optional[str] = None
+
 class OCRScanResponse(BaseModel):
     """Response from OCR scan endpoint"""
     merchant: Optional[str]
@@ -0,0 +1,24 @@
+"""
+Pydantic Schemas for FX Rates
+"""
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import date, datetime
+from decimal import Decimal
+
+class FxRateResponse(BaseModel):
+    currency: str
+    rate_date: date
+    rate: Decimal = Field(..., description="Units of base currency per unit of currency")
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class FxRateUploadResponse(BaseModel):
+    """Resultado de cargar un archivo de tasas"""
+    loaded: int
+    failed: int
+    errors: List[dict] = []
+    since: Dict[str, date] = Field(default_factory=dict, description="Fecha más antigua cargada por moneda")
+    recomputed: int = Field(0, description="Gastos con amount_base recalculado")
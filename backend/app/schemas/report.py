@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
+from app.schemas.expense import ExpenseResponse
+
 class ReportBase(BaseModel):
     title: str = Field(..., max_length=255)
     description: Optional[str] = None
@@ -23,9 +25,11 @@ class ReportUpdate(BaseModel):
 class ReportResponse(ReportBase):
     id: int
     user_id: int
+    trip_id: Optional[int] = None
     status: str
     total_amount: int = Field(default=0, description="Total amount in cents")
     expense_count: int = Field(default=0, description="Number of expenses")
+    unconverted_count: int = Field(default=0, description="Expenses without an FX rate (not in total_amount)")
     submitted_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
@@ -35,4 +39,18 @@ class ReportResponse(ReportBase):
 
 class ReportWithExpenses(ReportResponse):
     """Report with list of expenses included"""
-    expenses: List = []  # Will be populated with ExpenseResponse objects
+    expenses: List[ExpenseResponse] = []
+
+class ApprovalQueueItem(ReportResponse):
+    """Reporte de la cola de aprobación con datos del solicitante y antigüedad"""
+    submitter_name: Optional[str] = None
+    oldest_expense_date: Optional[datetime] = None
+
+class ReportBulkExportRequest(BaseModel):
+    """Reportes a exportar en ZIP: lista de ids o filtro (estado y período de envío)"""
+    report_ids: Optional[List[int]] = None
+    status: Optional[str] = Field(None, description="draft, submitted, approved, rejected o paid")
+    submitted_from: Optional[datetime] = None
+    submitted_to: Optional[datetime] = None
+    user_id: Optional[int] = None
+    receipts: Optional[str] = Field(None, pattern="^(page|grid)$", description="Anexar recibos: page o grid")
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
+
+from app.schemas.expense import ExpenseSummary
 
 
 class TripBase(BaseModel):
@@ -34,19 +36,67 @@ class Trip(TripBase):
     status: str
     created_at: datetime
     updated_at: datetime
-    
-    @property
-    def total_expenses(self) -> int:
-        """Calcula el total de gastos del viaje"""
-        return sum(expense.amount for expense in self.expenses) if hasattr(self, 'expenses') else 0
-    
-    @property
-    def budget_used_percentage(self) -> float:
-        """Calcula el porcentaje del presupuesto utilizado"""
-        if not self.budget or self.budget == 0:
-            return 0.0
-        return (self.total_expenses / self.budget) * 100
+
+
+class TripSummary(Trip):
+    """Viaje con gasto agregado en SQL (listado con barras de progreso)"""
+    spent: int = 0  # En centavos, sin los gastos sin tipo de cambio
+    expense_count: int = 0
+    unconverted_count: int = 0  # Gastos sin tipo de cambio (no suman en spent)
+    budget_used_pct: Optional[float] = None
+
+
+class CategorySubtotal(BaseModel):
+    category_id: int
+    category_name: str
+    total_amount: int  # En centavos
+    expenses_count: int
+    unconverted_count: int = 0
 
 
 class TripWithExpenses(Trip):
-    expenses: list = []
+    """Detalle del viaje con una página de gastos y subtotales por categoría"""
+    expenses: List[ExpenseSummary] = []
+    expenses_total: int = 0
+    expenses_skip: int = 0
+    expenses_limit: int = 50
+    spent: int = 0  # En centavos, sin los gastos sin tipo de cambio
+    unconverted_count: int = 0
+    category_subtotals: List[CategorySubtotal] = []
+
+
+class TripForecast(BaseModel):
+    """Proyección de gasto de un viaje activo (montos en centavos de BASE_CURRENCY)"""
+    trip_id: int
+    user_id: int
+    name: str
+    destination: Optional[str] = None
+    start_date: date
+    end_date: date
+    budget: Optional[int] = None
+    spent: int
+    daily_rate: float
+    elapsed_days: int
+    remaining_days: int
+    projected_total: int
+    projected_excess: int
+    projected_over_budget: bool
+    budget_used_pct: Optional[float] = None
+    projected_budget_pct: Optional[float] = None
+    month_spent: int
+    projected_month_total: int
+    unconverted_count: int = 0  # Gastos sin tipo de cambio: no entran en la proyección
+
+
+class TripForecastResponse(BaseModel):
+    """Proyección de todos los viajes activos, calculada una vez al día"""
+    as_of: date
+    month_end: date
+    generated_at: datetime
+    trips_count: int
+    over_budget_count: int
+    spent: int
+    projected_total: int
+    projected_month_total: int
+    unconverted_count: int = 0
+    trips: List[TripForecast] = []
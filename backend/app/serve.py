@@ -0,0 +1,229 @@
+"""
+Production server entrypoint: python -m app.serve
+
+- Número de workers según CPU y memoria disponibles (cgroup en contenedores)
+- Precarga la app en el proceso maestro antes de hacer fork (PRELOAD_APP)
+- Cada worker hace warmup (pool de DB, servicios) antes de aceptar tráfico
+- Apagado ordenado: SIGTERM deja de aceptar conexiones y espera peticiones y
+  exportaciones en curso hasta SHUTDOWN_DRAIN_SECONDS
+
+Usa gunicorn + UvicornWorker; si gunicorn no está disponible (Windows) arranca
+un único proceso de uvicorn con el mismo apagado ordenado.
+"""
+import logging
+import os
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn")
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn no instalado
+    UvicornWorker = None
+
+
+def _draining_server_class():
+    from uvicorn.server import Server
+
+    from app.core.lifecycle import in_flight
+
+    class DrainingServer(Server):
+        """
+        Fija el plazo de apagado al empezar: la espera de uvicorn a las
+        conexiones abiertas (timeout_graceful_shutdown) y el drenado de
+        exportaciones del lifespan comparten SHUTDOWN_DRAIN_SECONDS en lugar
+        de sumarse (gunicorn mata al worker en graceful_timeout)
+        """
+
+        async def shutdown(self, sockets=None) -> None:
+            in_flight.begin_shutdown(settings.SHUTDOWN_DRAIN_SECONDS)
+            await super().shutdown(sockets=sockets)
+
+    return DrainingServer
+
+
+if UvicornWorker is not None:
+    import sys
+
+    from gunicorn.arbiter import Arbiter
+
+    class DrainingUvicornWorker(UvicornWorker):
+        # Sin esto uvicorn espera indefinidamente a conexiones largas (SSE) y
+        # gunicorn termina matando al worker sin ejecutar el apagado de la app
+        CONFIG_KWARGS = {
+            **UvicornWorker.CONFIG_KWARGS,
+            "timeout_graceful_shutdown": settings.SHUTDOWN_DRAIN_SECONDS,
+        }
+
+        # Igual que UvicornWorker._serve (uvicorn 0.27) pero con DrainingServer
+        async def _serve(self) -> None:
+            self.config.app = self.wsgi
+            server = _draining_server_class()(config=self.config)
+            self._install_sigquit_handler()
+            await server.serve(sockets=self.sockets)
+            if not server.started:
+                sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            value = f.read().strip().split()[0]
+        return None if value == "max" else int(value)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def available_cpus() -> float:
+    """CPUs utilizables: cuota de cgroup si existe, si no afinidad del proceso"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(int(quota) / int(period), 1.0)
+    except (OSError, ValueError):
+        pass
+    quota = _read_int("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+    period = _read_int("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and quota > 0:
+        return max(quota / period, 1.0)
+    if hasattr(os, "sched_getaffinity"):
+        return float(len(os.sched_getaffinity(0)))
+    return float(os.cpu_count() or 1)
+
+
+def available_memory_mb() -> Optional[int]:
+    """Límite de memoria del contenedor (cgroup v2/v1) o memoria total del host"""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        limit = _read_int(path)
+        # cgroup v1 sin límite reporta un valor enorme
+        if limit and limit < 1 << 50:
+            return limit // (1024 * 1024)
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def db_connections_per_worker() -> int:
+    """Máximo de conexiones que puede abrir un worker (pool + overflow; el warmup sale del pool)"""
+    return settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+
+def worker_count() -> int:
+    """
+    WEB_CONCURRENCY si está definido; si no, 2 × CPU + 1 acotado por la
+    memoria disponible (WORKER_MEMORY_MB por worker, reservando uno para el
+    maestro) y por las conexiones a Postgres (DB_MAX_CONNECTIONS entre el
+    pool + overflow de cada worker)
+    """
+    db_limit = max(settings.DB_MAX_CONNECTIONS // db_connections_per_worker(), 1)
+    if settings.WEB_CONCURRENCY > 0:
+        if settings.WEB_CONCURRENCY > db_limit:
+            logger.warning(
+                f"⚠️ WEB_CONCURRENCY={settings.WEB_CONCURRENCY} puede abrir "
+                f"{settings.WEB_CONCURRENCY * db_connections_per_worker()} conexiones "
+                f"(DB_MAX_CONNECTIONS={settings.DB_MAX_CONNECTIONS}): reduce DB_POOL_SIZE/DB_MAX_OVERFLOW"
+            )
+        return settings.WEB_CONCURRENCY
+
+    workers = int(2 * available_cpus()) + 1
+    memory_mb = available_memory_mb()
+    if memory_mb:
+        workers = min(workers, memory_mb // settings.WORKER_MEMORY_MB - 1)
+    return max(min(workers, db_limit), 1)
+
+
+def check_shared_backends(workers: int) -> None:
+    """
+    Con más de un worker el estado compartido tiene que pasar por Redis: un
+    evento publicado en memoria solo llega a los clientes SSE de ese worker y
+    una revocación de token en memoria solo aplica en el worker que la recibió
+    """
+    if workers <= 1:
+        return
+    missing = [
+        name for name, value in (
+            ("NOTIFICATIONS_BACKEND", settings.NOTIFICATIONS_BACKEND),
+            ("AUTH_REVOCATION_BACKEND", settings.AUTH_REVOCATION_BACKEND),
+        ) if value != "redis"
+    ]
+    if missing:
+        raise SystemExit(
+            f"❌ {workers} workers requieren {'=redis, '.join(missing)}=redis (y REDIS_URL); "
+            "usa WEB_CONCURRENCY=1 para un solo worker con backends en memoria"
+        )
+
+
+def _post_fork(server, worker):
+    # Conexiones abiertas en el maestro no se comparten entre procesos
+    from app.core.database import engine
+    engine.dispose(close=False)
+
+
+def run_gunicorn(host: str, port: int, workers: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "worker_class": "app.serve.DrainingUvicornWorker",
+                "preload_app": settings.PRELOAD_APP,
+                # Plazo único de drenado (DrainingServer) + margen antes de matar al worker
+                "graceful_timeout": settings.SHUTDOWN_DRAIN_SECONDS + 5,
+                "timeout": max(settings.SHUTDOWN_DRAIN_SECONDS, 120),
+                "keepalive": 5,
+                "post_fork": _post_fork,
+                "accesslog": "-",
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Server().run()
+
+
+def run_uvicorn(host: str, port: int) -> None:
+    import uvicorn
+
+    config = uvicorn.Config(
+        "app.main:app",
+        host=host,
+        port=port,
+        timeout_graceful_shutdown=settings.SHUTDOWN_DRAIN_SECONDS,
+    )
+    _draining_server_class()(config).run()
+
+
+def main():
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "8000"))
+    workers = worker_count()
+
+    if UvicornWorker is None:
+        logger.warning("⚠️ gunicorn no disponible: un solo proceso de uvicorn")
+        run_uvicorn(host, port)
+        return
+
+    print(
+        f"🚀 {workers} workers (CPU {available_cpus():g}, memoria {available_memory_mb()} MB, "
+        f"hasta {workers * db_connections_per_worker()}/{settings.DB_MAX_CONNECTIONS} conexiones a la base, "
+        f"preload {'sí' if settings.PRELOAD_APP else 'no'})"
+    )
+    check_shared_backends(workers)
+    run_gunicorn(host, port, workers)
+
+
+if __name__ == "__main__":
+    main()
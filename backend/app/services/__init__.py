@@ -3,5 +3,6 @@ Services package
 """
 from app.services.ocr_service import ocr_service
 from app.services.storage_service import storage_service
+from app.services.notification_broker import notification_broker
 
-__all__ = ["ocr_service", "storage_service"]
+__all__ = ["ocr_service", "storage_service", "notification_broker"]
@@ -0,0 +1,223 @@
+"""
+Forecast Service - Proyección de gasto de los viajes activos
+
+- Una consulta agrupada trae la serie de gasto diario (amount_base) de todos
+  los viajes activos a la vez, y otra sus datos (fechas y presupuesto)
+- La proyección se calcula por columnas con NumPy para todos los viajes
+  a la vez: ritmo diario observado × días restantes del viaje y del mes
+- El resultado se guarda en memoria por día (cada worker lo calcula una vez)
+"""
+import logging
+import threading
+import time
+from calendar import monthrange
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.models.expense import Expense
+from app.models.trip import Trip
+
+logger = logging.getLogger("uvicorn")
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def active_trips_query():
+    """Viajes activos ordenados por id (índice (status, start_date))"""
+    return select(
+        Trip.id, Trip.user_id, Trip.name, Trip.destination,
+        Trip.start_date, Trip.end_date, Trip.budget
+    ).where(Trip.status == "active").order_by(Trip.id)
+
+
+def daily_spend_query():
+    """
+    Serie de gasto diario de todos los viajes activos:
+    (trip_id, 'YYYY-MM-DD', amount_base, gastos sin tipo de cambio)
+
+    El día se lee como texto para que NumPy lo convierta en bloque a
+    datetime64 (mucho más rápido que crear un objeto date por fila).
+    """
+    day = func.date(Expense.expense_date)
+    return (
+        select(
+            Expense.trip_id,
+            cast(day, String).label("day"),
+            func.coalesce(func.sum(Expense.amount_base), 0).label("amount"),
+            (func.count(Expense.id) - func.count(Expense.amount_base)).label("unconverted"),
+        )
+        .join(Trip, Trip.id == Expense.trip_id)
+        .where(Trip.status == "active")
+        .group_by(Expense.trip_id, day)
+    )
+
+
+def _columns(rows: list, width: int) -> list:
+    """Filas -> columnas (índice por columna; zip(*rows) sobre Row es ~10x más lento)"""
+    return [[row[i] for row in rows] for i in range(width)]
+
+
+def project_trips(trip_rows: list, spend_rows: list, today: date) -> dict:
+    """
+    Proyección vectorizada a fin de viaje y a fin de mes
+
+    - spent: gasto total registrado (incluye gastos anteriores al viaje o con
+      fecha futura, p. ej. vuelos y hoteles prepagados)
+    - daily_rate: gasto con fecha entre el inicio del viaje y hoy / días
+      transcurridos del viaje; lo anterior al inicio no entra en el ritmo
+    - projected_total: spent (los prepagos cuentan una sola vez, como monto
+      fijo) + daily_rate × días que faltan del viaje
+    - projected_month_total: gasto del mes en curso + daily_rate × días del
+      viaje que quedan en el mes
+    - unconverted_count: gastos sin tipo de cambio, que no entran en ningún
+      monto (el viaje puede ir más excedido de lo que muestra)
+
+    trip_rows debe venir ordenado por id (active_trips_query).
+    """
+    import numpy as np
+
+    trip_ids, user_ids, names, destinations, starts, ends, budgets = _columns(trip_rows, 7)
+    trip_ids = np.array(trip_ids, dtype="int64")
+    start = (np.array([d.toordinal() for d in starts], dtype="int64") - EPOCH_ORDINAL).astype("datetime64[D]")
+    end = (np.array([d.toordinal() for d in ends], dtype="int64") - EPOCH_ORDINAL).astype("datetime64[D]")
+    budget = np.array([np.nan if b is None else b for b in budgets], dtype="float64")
+
+    series_ids, days, amounts, unconverted = _columns(spend_rows, 4)
+    series_ids = np.array(series_ids, dtype="int64")
+    days = np.array(days, dtype="datetime64[D]")
+    amounts = np.array(amounts, dtype="float64")
+    unconverted = np.array(unconverted, dtype="float64")
+
+    last_day = today.replace(day=monthrange(today.year, today.month)[1])
+    month_start = np.datetime64(today.replace(day=1), "D")
+    month_end = np.datetime64(last_day, "D")
+    today64 = np.datetime64(today, "D")
+
+    # Posición de cada fila de la serie en trip_ids; descarta viajes que dejaron
+    # de estar activos entre las dos consultas
+    position = np.searchsorted(trip_ids, series_ids)
+    known = position < len(trip_ids)
+    known[known] = trip_ids[position[known]] == series_ids[known]
+
+    def total(mask, weights=amounts) -> np.ndarray:
+        mask = mask & known
+        return np.rint(np.bincount(position[mask], weights=weights[mask], minlength=len(trip_ids))).astype("int64")
+
+    # Ventana del ritmo diario de cada fila: [inicio del viaje, min(hoy, fin)];
+    # el NaT final cubre las filas descartadas (position == len(trip_ids))
+    window_start = np.append(start, np.datetime64("NaT"))[position]
+    window_end = np.minimum(np.append(end, np.datetime64("NaT"))[position], today64)
+
+    spent = total(np.ones(len(series_ids), dtype=bool))
+    unconverted_count = total(np.ones(len(series_ids), dtype=bool), unconverted)
+    observed = total((days >= window_start) & (days <= window_end))
+    month_spent = total((days >= month_start) & (days <= month_end))
+
+    duration = (end - start).astype("int64") + 1
+    elapsed = np.clip((today64 - start).astype("int64") + 1, 0, duration)
+    # Días posteriores a hoy dentro del viaje (todos si aún no empieza)
+    last_seen = np.maximum(today64, start - np.timedelta64(1, "D"))
+    remaining = np.clip((end - last_seen).astype("int64"), 0, duration)
+    month_remaining = np.clip((np.minimum(end, month_end) - last_seen).astype("int64"), 0, None)
+
+    daily_rate = np.where(elapsed > 0, observed / np.maximum(elapsed, 1), 0.0)
+    projected_total = np.rint(spent + daily_rate * remaining).astype("int64")
+    projected_month = np.rint(month_spent + daily_rate * month_remaining).astype("int64")
+
+    has_budget = ~np.isnan(budget) & (budget > 0)
+    safe_budget = np.where(has_budget, budget, 1.0)
+    excess = np.where(has_budget, projected_total - safe_budget, 0).astype("int64")
+    over_budget = has_budget & (excess > 0)
+    used_pct = np.where(has_budget, np.round(spent / safe_budget * 100, 2), np.nan)
+    projected_pct = np.where(has_budget, np.round(projected_total / safe_budget * 100, 2), np.nan)
+
+    # Mayor excedente proyectado primero
+    order = np.lexsort((trip_ids, -excess))
+
+    def ordered(values) -> list:
+        if isinstance(values, list):
+            return [values[i] for i in order.tolist()]
+        values = values[order].tolist()
+        if values and isinstance(values[0], float):
+            return [None if v != v else v for v in values]
+        return values
+
+    columns = {
+        "trip_id": trip_ids,
+        "user_id": user_ids,
+        "name": names,
+        "destination": destinations,
+        "start_date": start,
+        "end_date": end,
+        "budget": budgets,
+        "spent": spent,
+        "daily_rate": np.round(daily_rate, 2),
+        "elapsed_days": elapsed,
+        "remaining_days": remaining,
+        "projected_total": projected_total,
+        "projected_excess": excess,
+        "projected_over_budget": over_budget,
+        "budget_used_pct": used_pct,
+        "projected_budget_pct": projected_pct,
+        "month_spent": month_spent,
+        "projected_month_total": projected_month,
+        "unconverted_count": unconverted_count,
+    }
+    names = list(columns)
+    forecasts = [dict(zip(names, record)) for record in zip(*map(ordered, columns.values()))]
+
+    return {
+        "as_of": today,
+        "month_end": last_day,
+        "trips_count": len(forecasts),
+        "over_budget_count": int(over_budget.sum()),
+        "spent": int(spent.sum()),
+        "projected_total": int(projected_total.sum()),
+        "projected_month_total": int(projected_month.sum()),
+        "unconverted_count": int(unconverted_count.sum()),
+        "trips": forecasts,
+    }
+
+
+class SpendForecastService:
+    """Proyección de todos los viajes activos, calculada una vez al día por worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day: Optional[date] = None
+        self._result: Optional[dict] = None
+
+    def forecast(self, db: Session, today: Optional[date] = None, refresh: bool = False) -> dict:
+        """
+        Proyección del día (desde la caché salvo que cambie el día o refresh=True)
+        """
+        today = today or date.today()
+        with self._lock:
+            if not refresh and self._day == today and self._result is not None:
+                return self._result
+
+            start = time.perf_counter()
+            trip_rows = db.execute(active_trips_query()).all()
+            spend_rows = db.execute(daily_spend_query()).all()
+            query_ms = (time.perf_counter() - start) * 1000
+            result = project_trips(trip_rows, spend_rows, today)
+            result["generated_at"] = datetime.utcnow()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            logger.info(
+                f"🔮 Proyección de {result['trips_count']} viajes activos en {elapsed_ms:.0f} ms "
+                f"(consultas {query_ms:.0f} ms, {len(spend_rows)} filas viaje-día); "
+                f"{result['over_budget_count']} se exceden del presupuesto"
+            )
+            self._day, self._result = today, result
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._day = self._result = None
+
+
+spend_forecast = SpendForecastService()
@@ -0,0 +1,260 @@
+"""
+FX Service - Tipos de cambio y montos normalizados a la moneda base
+
+- Tabla fx_rates: una tasa por (moneda, fecha), cargada desde un archivo
+  CSV/XLSX local (scripts/load_fx_rates.py) o subido por un admin
+- Expense.amount_base se calcula al escribir con la tasa vigente en la fecha
+  del gasto (la más reciente con rate_date <= expense_date); los agregados
+  suman amount_base sin convertir fila a fila al consultar
+- recompute_amount_base: recálculo masivo en SQL por rangos de id cuando se
+  corrigen o se cargan tasas con retraso
+"""
+import bisect
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.expense import Expense
+from app.models.fx_rate import FxRate
+from app.services.statement_import import StatementImportError, iter_statement_rows, parse_date
+
+logger = logging.getLogger("uvicorn")
+
+# Campo -> encabezados aceptados (en minúsculas)
+RATE_COLUMNS = {
+    "rate_date": ("rate_date", "date", "fecha"),
+    "currency": ("currency", "moneda", "divisa"),
+    "rate": ("rate", "tasa", "tipo de cambio", "tipo_cambio"),
+}
+
+RATE_CHUNK_SIZE = 1000
+
+
+class FxRateError(Exception):
+    """Archivo de tasas ilegible o sin las columnas mínimas"""
+
+
+def convert(amount: int, rate: Decimal) -> int:
+    """Centavos en la moneda del gasto -> centavos en BASE_CURRENCY"""
+    return int((Decimal(amount) * rate).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def rate_for(db: Session, currency: str, on_date: date) -> Optional[Decimal]:
+    """Tasa vigente para currency en on_date; None si no hay ninguna anterior"""
+    if currency == settings.BASE_CURRENCY:
+        return Decimal(1)
+    return db.query(FxRate.rate).filter(
+        FxRate.currency == currency,
+        FxRate.rate_date <= on_date
+    ).order_by(FxRate.rate_date.desc()).limit(1).scalar()
+
+
+def amount_base(db: Session, amount: int, currency: str, expense_date: datetime) -> Optional[int]:
+    """Valor de Expense.amount_base para un gasto que se crea o se modifica"""
+    rate = rate_for(db, currency, expense_date.date() if isinstance(expense_date, datetime) else expense_date)
+    if rate is None:
+        logger.warning(f"⚠️ Sin tipo de cambio {currency}->{settings.BASE_CURRENCY} para {expense_date:%Y-%m-%d}")
+        return None
+    return convert(amount, Decimal(rate))
+
+
+def unconverted_detail(expenses: List[Expense], limit: int = 20) -> str:
+    """
+    Mensaje del 409 de las operaciones que fijan un total (enviar o aprobar un
+    reporte, completar un viaje) mientras hay gastos sin tipo de cambio
+    """
+    unconverted = [e for e in expenses if e.amount_base is None]
+    listed = ", ".join(f"#{e.id} ({e.currency} {e.expense_date:%Y-%m-%d})" for e in unconverted[:limit])
+    if len(unconverted) > limit:
+        listed += f" y {len(unconverted) - limit} más"
+    return (
+        f"{len(unconverted)} gastos sin tipo de cambio a {settings.BASE_CURRENCY}: {listed}. "
+        f"Carga las tasas y vuelve a intentarlo"
+    )
+
+
+class RateTable:
+    """Todas las tasas en memoria (una consulta) para convertir en bloque"""
+
+    def __init__(self, db: Session):
+        self._dates: Dict[str, List[date]] = defaultdict(list)
+        self._rates: Dict[str, List[Decimal]] = defaultdict(list)
+        rows = db.query(FxRate.currency, FxRate.rate_date, FxRate.rate)\
+            .order_by(FxRate.currency, FxRate.rate_date)
+        for currency, rate_date, rate in rows:
+            self._dates[currency].append(rate_date)
+            self._rates[currency].append(Decimal(rate))
+
+    def convert(self, amount: int, currency: str, expense_date: datetime) -> Optional[int]:
+        if currency == settings.BASE_CURRENCY:
+            return amount
+        on_date = expense_date.date() if isinstance(expense_date, datetime) else expense_date
+        index = bisect.bisect_right(self._dates.get(currency, ()), on_date) - 1
+        if index < 0:
+            return None
+        return convert(amount, self._rates[currency][index])
+
+
+def _parse_rate_row(row: Tuple[Any, ...], columns: Dict[str, int]) -> dict:
+    def cell(field: str) -> Any:
+        value = row[columns[field]] if columns[field] < len(row) else None
+        return value.strip() if isinstance(value, str) else value
+
+    currency = str(cell("currency") or "").upper()
+    if len(currency) != 3 or not currency.isalpha():
+        raise ValueError(f"Moneda inválida: {currency}")
+    try:
+        rate = Decimal(str(cell("rate")).replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"Tasa inválida: {cell('rate')}")
+    if not rate.is_finite() or rate <= 0:
+        raise ValueError(f"Tasa inválida: {cell('rate')}")
+    return {"currency": currency, "rate_date": parse_date(cell("rate_date")).date(), "rate": rate}
+
+
+def _upsert_rates(db: Session, rows: List[dict]) -> None:
+    """INSERT ... ON CONFLICT (currency, rate_date) DO UPDATE (Postgres y SQLite)"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(FxRate.__table__)
+    now = datetime.utcnow()
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["currency", "rate_date"],
+            set_={"rate": statement.excluded.rate, "updated_at": now}
+        ),
+        [{**row, "created_at": now, "updated_at": now} for row in rows]
+    )
+
+
+def load_rates(db: Session, fileobj: BinaryIO, filename: str) -> dict:
+    """
+    Cargar (o corregir) tasas desde un CSV/XLSX con columnas fecha, moneda y tasa
+
+    Returns:
+        {"loaded", "failed", "errors", "since": {moneda: fecha más antigua cargada}}
+
+    Raises:
+        FxRateError: Archivo ilegible o sin las columnas obligatorias
+    """
+    try:
+        rows = iter_statement_rows(fileobj, filename)
+    except StatementImportError as e:
+        raise FxRateError(str(e))
+    try:
+        header = next(rows, None)
+    except Exception as e:
+        raise FxRateError(f"No se pudo leer el archivo: {e}")
+
+    names = [str(name or "").strip().lower() for name in header or ()]
+    columns = {}
+    for field, aliases in RATE_COLUMNS.items():
+        index = next((i for i, name in enumerate(names) if name in aliases), None)
+        if index is not None:
+            columns[field] = index
+    missing = [field for field in RATE_COLUMNS if field not in columns]
+    if missing:
+        rows.close()
+        raise FxRateError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+
+    loaded = 0
+    errors = []
+    since: Dict[str, date] = {}
+    chunk: Dict[Tuple[str, date], dict] = {}
+    for row_number, row in enumerate(rows, start=2):
+        if all(value in (None, "") for value in row):
+            continue
+        try:
+            rate = _parse_rate_row(row, columns)
+        except ValueError as e:
+            errors.append({"row": row_number, "error": str(e)})
+            continue
+        # La última fila gana si el archivo repite (moneda, fecha)
+        chunk[(rate["currency"], rate["rate_date"])] = rate
+        since[rate["currency"]] = min(since.get(rate["currency"], rate["rate_date"]), rate["rate_date"])
+        if len(chunk) >= RATE_CHUNK_SIZE:
+            _upsert_rates(db, list(chunk.values()))
+            loaded += len(chunk)
+            chunk.clear()
+    if chunk:
+        _upsert_rates(db, list(chunk.values()))
+        loaded += len(chunk)
+    db.commit()
+
+    logger.info(f"💱 {loaded} tipos de cambio cargados desde {filename} ({len(errors)} filas con error)")
+    return {"loaded": loaded, "failed": len(errors), "errors": errors[:100], "since": since}
+
+
+def recompute_amount_base(
+    db: Session,
+    currency: Optional[str] = None,
+    since: Optional[date] = None,
+    batch_size: Optional[int] = None
+) -> int:
+    """
+    Recalcular Expense.amount_base en SQL con las tasas actuales
+
+    Un UPDATE con la tasa como subconsulta correlacionada (índice único
+    (currency, rate_date)) por cada rango de FX_RECOMPUTE_BATCH_SIZE ids, con
+    commit por rango para no bloquear la tabla. Después actualiza el total de
+    los reportes afectados.
+
+    Args:
+        currency: Solo gastos en esta moneda (todas por defecto)
+        since: Solo gastos con expense_date desde esta fecha
+
+    Returns:
+        Número de gastos recalculados
+    """
+    from app.api.reports import sync_report_totals
+
+    batch_size = batch_size or settings.FX_RECOMPUTE_BATCH_SIZE
+    filters = []
+    if currency:
+        filters.append(Expense.currency == currency)
+    if since:
+        filters.append(Expense.expense_date >= since)
+
+    rate = (
+        select(FxRate.rate)
+        .where(FxRate.currency == Expense.currency, FxRate.rate_date <= Expense.expense_date)
+        .order_by(FxRate.rate_date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    value = case(
+        (Expense.currency == settings.BASE_CURRENCY, Expense.amount),
+        else_=cast(func.round(Expense.amount * rate), Integer)
+    )
+
+    first_id, last_id = db.query(func.min(Expense.id), func.max(Expense.id)).filter(*filters).one()
+    updated = 0
+    if first_id is not None:
+        for start in range(first_id, last_id + 1, batch_size):
+            updated += db.query(Expense).filter(
+                *filters, Expense.id >= start, Expense.id < start + batch_size
+            ).update({Expense.amount_base: value}, synchronize_session=False)
+            db.commit()
+
+    report_ids = [
+        report_id for report_id, in
+        db.query(Expense.report_id).filter(*filters, Expense.report_id.isnot(None)).distinct()
+    ]
+    for start in range(0, len(report_ids), batch_size):
+        sync_report_totals(db, *report_ids[start:start + batch_size])
+        db.commit()
+
+    logger.info(
+        f"💱 amount_base recalculado: {updated} gastos, {len(report_ids)} reportes "
+        f"(moneda {currency or 'todas'}, desde {since or 'el inicio'})"
+    )
+    return updated
@@ -0,0 +1,144 @@
+"""
+Notification Broker - Pub/sub de notificaciones en tiempo real (SSE)
+"""
+import asyncio
+import json
+import logging
+import threading
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn")
+
+REDIS_CHANNEL_PREFIX = "notifications:"
+
+
+def format_sse_event(event: str, data: dict) -> str:
+    """Formatear un evento en el protocolo text/event-stream"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class NotificationBroker:
+    def __init__(self):
+        """
+        Broker en memoria por worker.
+        Con NOTIFICATIONS_BACKEND=redis los eventos se publican en Redis y cada
+        worker los reparte a sus propias conexiones SSE.
+        """
+        self.use_redis = settings.NOTIFICATIONS_BACKEND == "redis"
+        self.max_connections = settings.SSE_MAX_CONNECTIONS
+        self.connection_count = 0
+
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._redis = None
+        self._listener_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, user_id: int) -> Optional[asyncio.Queue]:
+        """
+        Registrar una conexión SSE del usuario (llamar desde el event loop)
+
+        Returns:
+            Cola de eventos o None si el worker alcanzó el límite de conexiones
+        """
+        with self._lock:
+            if self.connection_count >= self.max_connections:
+                return None
+            self._loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+            self._subscribers.setdefault(user_id, set()).add(queue)
+            self.connection_count += 1
+
+        if self.use_redis:
+            self._ensure_redis_listener()
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        """Eliminar una conexión SSE"""
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues and queue in queues:
+                queues.discard(queue)
+                self.connection_count -= 1
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id: int, event: str, data: dict) -> None:
+        """
+        Publicar un evento para un usuario.
+        Es seguro llamarlo desde handlers síncronos (threadpool) o asíncronos.
+        """
+        message = {"user_id": user_id, "event": event, "data": data}
+
+        if self.use_redis:
+            try:
+                self._get_redis().publish(
+                    f"{REDIS_CHANNEL_PREFIX}{user_id}",
+                    json.dumps(message, default=str)
+                )
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Redis no disponible, publicando solo en este worker: {e}")
+
+        self._dispatch(message)
+
+    def _dispatch(self, message: dict) -> None:
+        """Entregar un mensaje a las conexiones locales del usuario"""
+        with self._lock:
+            queues = list(self._subscribers.get(message["user_id"], ()))
+
+        loop = self._loop
+        if not queues or loop is None or loop.is_closed():
+            return
+
+        for queue in queues:
+            loop.call_soon_threadsafe(self._put_nowait, queue, message)
+
+    @staticmethod
+    def _put_nowait(queue: asyncio.Queue, message: dict) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Cliente lento: descartar, el siguiente unread_count lo resincroniza
+            pass
+
+    def _get_redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    def _ensure_redis_listener(self) -> None:
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.get_running_loop().create_task(self._redis_listener())
+
+    async def _redis_listener(self) -> None:
+        """Suscripción única por worker a todos los canales de notificaciones"""
+        import redis.asyncio as aioredis
+
+        client = aioredis.from_url(settings.REDIS_URL)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.psubscribe(f"{REDIS_CHANNEL_PREFIX}*")
+            logger.info("✅ Notification broker suscrito a Redis")
+            async for item in pubsub.listen():
+                if item.get("type") != "pmessage":
+                    continue
+                try:
+                    self._dispatch(json.loads(item["data"]))
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"⚠️ Mensaje de notificación inválido: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # La siguiente suscripción vuelve a lanzar el listener
+            logger.error(f"❌ Redis listener detenido: {e}")
+        finally:
+            await pubsub.close()
+            await client.close()
+
+
+# Singleton instance
+notification_broker = NotificationBroker()
@@ -2,12 +2,12 @@
 Google Cloud Vision OCR Service
 """
 from typing import Dict, Optional
-import io
-from PIL import Image
 import re
 from datetime import datetime
 import os
 
+from app.core.lazy import LazyService
+
 class OCRService:
     def __init__(self):
         """
@@ -145,5 +145,5 @@ class OCRService:
             image_bytes = f.read()
         return self.extract_receipt_data(image_bytes)
 
-# Singleton instance
-ocr_service = OCRService()
+# Singleton instance (el cliente de Google Vision se crea en el primer uso)
+ocr_service = LazyService(OCRService)
@@ -0,0 +1,38 @@
+"""
+Refund Sweeper - Marca como vencidas las devoluciones fuera de plazo
+"""
+from datetime import datetime
+from typing import Optional
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.models.refund import Refund, RefundStatus
+
+logger = logging.getLogger("uvicorn")
+
+
+def mark_overdue_refunds(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Marcar como vencidas todas las devoluciones pendientes con due_date pasada
+
+    Un único UPDATE ... WHERE status='pending' AND due_date < now()
+    apoyado en el índice (status, due_date).
+
+    Returns:
+        Número de devoluciones marcadas como vencidas
+    """
+    now = now or datetime.utcnow()
+    
+    updated = db.query(Refund).filter(
+        Refund.status == RefundStatus.pending,
+        Refund.due_date < now
+    ).update(
+        {Refund.status: RefundStatus.overdue, Refund.updated_at: now},
+        synchronize_session=False
+    )
+    db.commit()
+    
+    if updated:
+        logger.info(f"⏰ {updated} devoluciones marcadas como vencidas")
+    return updated
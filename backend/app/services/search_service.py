@@ -0,0 +1,164 @@
+"""
+Search Service - Búsqueda de texto completo sobre gastos
+Postgres: tsvector + índice GIN (mantenido por trigger, ver migración 184b477c66fe)
+SQLite: tabla virtual FTS5 mantenida por triggers (desarrollo local y tests)
+"""
+import base64
+import json
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Float, and_, cast, column, func, literal_column, or_, select, table, text
+from sqlalchemy.orm import Session
+
+from app.models.expense import Expense
+
+logger = logging.getLogger("uvicorn")
+
+SQLITE_FTS_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+        merchant, description, raw_text,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts(rowid, merchant, description, raw_text) VALUES (
+            new.id, new.merchant, new.description,
+            CASE WHEN json_valid(new.ocr_data) THEN json_extract(new.ocr_data, '$.raw_text') END
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_update
+    AFTER UPDATE OF merchant, description, ocr_data ON expenses BEGIN
+        DELETE FROM expenses_fts WHERE rowid = old.id;
+        INSERT INTO expenses_fts(rowid, merchant, description, raw_text) VALUES (
+            new.id, new.merchant, new.description,
+            CASE WHEN json_valid(new.ocr_data) THEN json_extract(new.ocr_data, '$.raw_text') END
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+        DELETE FROM expenses_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    INSERT INTO expenses_fts(rowid, merchant, description, raw_text)
+    SELECT id, merchant, description,
+           CASE WHEN json_valid(ocr_data) THEN json_extract(ocr_data, '$.raw_text') END
+    FROM expenses
+    WHERE id NOT IN (SELECT rowid FROM expenses_fts)
+    """,
+]
+
+
+def encode_cursor(rank: float, expense_id: int) -> str:
+    """Cursor opaco con la posición (rank, id) del último resultado"""
+    raw = json.dumps([rank, expense_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Decodificar un cursor; lanza ValueError si es inválido"""
+    try:
+        rank, expense_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(expense_id)
+    except Exception as e:
+        raise ValueError("Cursor inválido") from e
+
+
+class ExpenseSearchService:
+    def __init__(self):
+        self._sqlite_ready = False
+        self._lock = threading.Lock()
+
+    def search(
+        self,
+        db: Session,
+        q: str,
+        user_id: Optional[int] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple[int, float]], Optional[str]]:
+        """
+        Buscar gastos por comercio, descripción y texto OCR
+
+        Args:
+            user_id: Restringir a los gastos de este usuario (None = todos)
+            cursor: Cursor devuelto por la página anterior
+
+        Returns:
+            ([(expense_id, rank), ...] ordenados por relevancia, next_cursor)
+
+        Raises:
+            ValueError: Búsqueda vacía (solo espacios) o cursor inválido
+        """
+        q = q.strip()
+        if not q:
+            # FTS5 rechaza un MATCH vacío
+            raise ValueError("La búsqueda no puede estar vacía")
+        after = decode_cursor(cursor) if cursor else None
+
+        if db.get_bind().dialect.name == "postgresql":
+            ranked = self._postgres_query(q)
+        else:
+            self._ensure_sqlite_index(db)
+            ranked = self._sqlite_query(q)
+
+        if user_id is not None:
+            ranked = ranked.where(Expense.user_id == user_id)
+
+        sub = ranked.subquery()
+        stmt = select(sub.c.id, sub.c.rank)
+        if after:
+            after_rank, after_id = after
+            stmt = stmt.where(or_(
+                sub.c.rank < after_rank,
+                and_(sub.c.rank == after_rank, sub.c.id < after_id)
+            ))
+        stmt = stmt.order_by(sub.c.rank.desc(), sub.c.id.desc()).limit(limit + 1)
+
+        rows = [(row.id, row.rank) for row in db.execute(stmt)]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+        return rows, next_cursor
+
+    def _postgres_query(self, q: str):
+        tsquery = func.websearch_to_tsquery("spanish", q)
+        search_vector = literal_column("expenses.search_vector")
+        # float8 para que el rank del cursor compare exactamente
+        rank = cast(func.ts_rank_cd(search_vector, tsquery), Float)
+        return select(Expense.id.label("id"), rank.label("rank")).where(
+            search_vector.op("@@")(tsquery)
+        )
+
+    def _sqlite_query(self, q: str):
+        # Cada término entre comillas: evita que la sintaxis FTS5 del usuario falle
+        match = " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+        fts = table("expenses_fts", column("rowid"))
+        rank = -func.bm25(literal_column("expenses_fts"))
+        return select(Expense.id.label("id"), rank.label("rank"))\
+            .join(fts, fts.c.rowid == Expense.id)\
+            .where(literal_column("expenses_fts").op("MATCH")(match))
+
+    def _ensure_sqlite_index(self, db: Session) -> None:
+        if self._sqlite_ready:
+            return
+        with self._lock:
+            if self._sqlite_ready:
+                return
+            for statement in SQLITE_FTS_SETUP:
+                db.execute(text(statement))
+            db.commit()
+            self._sqlite_ready = True
+            logger.info("✅ Índice FTS5 de gastos listo (SQLite)")
+
+
+# Singleton instance
+expense_search = ExpenseSearchService()
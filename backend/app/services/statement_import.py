@@ -0,0 +1,355 @@
+"""
+Statement Import Service - Importación de estados de cuenta de tarjeta (CSV/XLSX)
+
+- Lee el archivo fila a fila (csv / openpyxl en modo read_only): memoria
+  constante sin importar el tamaño del archivo
+- Resuelve usuarios, categorías y viajes con tablas en memoria cargadas una vez
+- Inserta por bloques de IMPORT_CHUNK_SIZE filas (un INSERT y un commit por bloque)
+- Emite un evento de progreso por bloque con los errores de sus filas
+"""
+import csv
+import logging
+import unicodedata
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.category import Category
+from app.models.expense import Expense, ExpenseStatus, parse_ocr_date
+from app.models.trip import Trip
+from app.models.user import User
+
+logger = logging.getLogger("uvicorn")
+
+STATEMENT_EXTENSIONS = ("csv", "xlsx")
+
+# Campo de Expense -> encabezados aceptados (normalizados: minúsculas, sin acentos)
+COLUMN_ALIASES = {
+    "expense_date": ("expense_date", "date", "fecha", "fecha de operacion", "fecha operacion", "transaction date"),
+    "amount": ("amount", "monto", "importe", "cargo", "total"),
+    "currency": ("currency", "moneda", "divisa"),
+    "merchant": ("merchant", "comercio", "establecimiento", "proveedor", "concepto"),
+    "description": ("description", "descripcion", "detalle", "notas"),
+    "category": ("category", "categoria", "category_id"),
+    "user": ("user", "email", "usuario", "correo", "user_email"),
+    "trip": ("trip", "viaje", "trip_id"),
+}
+
+
+class StatementImportError(Exception):
+    """Archivo ilegible o sin las columnas mínimas (no se importa nada)"""
+
+
+def _read_error(error: Exception) -> str:
+    """Mensaje para un archivo que deja de poder leerse a mitad de la importación"""
+    if isinstance(error, UnicodeDecodeError):
+        return "El archivo no está en UTF-8 (guárdalo como CSV UTF-8); se detuvo la importación"
+    return f"CSV inválido: {error}; se detuvo la importación"
+
+
+def _normalize(value: Any) -> str:
+    text = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode()
+    return " ".join(text.lower().replace("_", " ").split())
+
+
+def _map_columns(header: Tuple[Any, ...]) -> Dict[str, int]:
+    """Índice de columna por campo de Expense según los encabezados del archivo"""
+    aliases = {
+        _normalize(alias): field
+        for field, names in COLUMN_ALIASES.items()
+        for alias in names
+    }
+    mapping = {}
+    for index, name in enumerate(header):
+        field = aliases.get(_normalize(name))
+        if field and field not in mapping:
+            mapping[field] = index
+    return mapping
+
+
+def _decode_lines(fileobj: BinaryIO) -> Iterator[str]:
+    """
+    Líneas en UTF-8 decodificadas una a una: un byte inválido falla en su
+    propia fila (no en el bloque de 8 KB que lo contiene) y lo anterior se importa
+    """
+    for number, line in enumerate(fileobj):
+        yield line.decode("utf-8-sig" if number == 0 else "utf-8")
+
+
+def _iter_csv(fileobj: BinaryIO) -> Iterator[Tuple[Any, ...]]:
+    sample = fileobj.read(4096).decode("utf-8-sig", errors="ignore")
+    fileobj.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    for row in csv.reader(_decode_lines(fileobj), dialect):
+        yield tuple(row)
+
+
+def _iter_xlsx(fileobj: BinaryIO) -> Iterator[Tuple[Any, ...]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_statement_rows(fileobj: BinaryIO, filename: str) -> Iterator[Tuple[Any, ...]]:
+    """Filas del archivo (la primera es el encabezado) sin cargarlo completo"""
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return _iter_csv(fileobj)
+    if extension == "xlsx":
+        return _iter_xlsx(fileobj)
+    raise StatementImportError(f"Formato no soportado. Use: {', '.join(STATEMENT_EXTENSIONS)}")
+
+
+def parse_amount(value: Any) -> int:
+    """
+    Monto a centavos; acepta "1,234.56", "1.234,56", "$ 99.90" o números de Excel
+
+    Raises:
+        ValueError
+    """
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        number = Decimal(str(value))
+    else:
+        text = "".join(ch for ch in str(value or "") if ch.isdigit() or ch in ",.-")
+        if not text.strip("-"):
+            raise ValueError("Monto vacío")
+        # El último separador es el decimal; una coma sola es decimal si le siguen 1-2 dígitos
+        if "," in text and "." in text:
+            decimal_sep = "," if text.rfind(",") > text.rfind(".") else "."
+        elif "," in text:
+            decimal_sep = "," if len(text) - text.rfind(",") - 1 in (1, 2) else "."
+        else:
+            decimal_sep = "."
+        thousands_sep = "." if decimal_sep == "," else ","
+        text = text.replace(thousands_sep, "").replace(decimal_sep, ".")
+        try:
+            number = Decimal(text)
+        except InvalidOperation:
+            raise ValueError(f"Monto inválido: {value}")
+    return int((number * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def parse_date(value: Any) -> datetime:
+    """
+    Fecha de la operación (datetime de Excel, ISO o día primero)
+
+    Raises:
+        ValueError
+    """
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    text = str(value or "").strip()
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        pass
+    parsed = parse_ocr_date(text)
+    if parsed is None:
+        raise ValueError(f"Fecha inválida: {value}" if text else "Fecha vacía")
+    return datetime.combine(parsed, datetime.min.time())
+
+
+class LookupTables:
+    """Usuarios, categorías, viajes abiertos y tipos de cambio en memoria (una consulta por tabla)"""
+
+    def __init__(self, db: Session):
+        from app.services.fx_service import RateTable  # fx_service usa los lectores de este módulo
+
+        self.rates = RateTable(db)
+        self.users = {
+            email.lower(): user_id
+            for user_id, email in db.query(User.id, User.email).filter(User.is_active == True)
+        }
+        self.categories: Dict[str, int] = {}
+        for category_id, name in db.query(Category.id, Category.name).filter(Category.is_active == True):
+            self.categories[_normalize(name)] = category_id
+            self.categories[str(category_id)] = category_id
+
+        self.trips: Dict[int, int] = {}
+        self.trip_names: Dict[Tuple[int, str], int] = {}
+        open_trips = db.query(Trip.id, Trip.user_id, Trip.name).filter(Trip.status != "completed")
+        for trip_id, user_id, name in open_trips:
+            self.trips[trip_id] = user_id
+            self.trip_names[(user_id, _normalize(name))] = trip_id
+
+    def user_id(self, value: Any, default: Optional[int]) -> int:
+        email = str(value or "").strip().lower()
+        if not email:
+            if default is None:
+                raise ValueError("Falta el usuario")
+            return default
+        if email not in self.users:
+            raise ValueError(f"Usuario no encontrado o inactivo: {email}")
+        return self.users[email]
+
+    def category_id(self, value: Any, default: Optional[int]) -> int:
+        key = _normalize(value)
+        if not key:
+            if default is None:
+                raise ValueError("Falta la categoría")
+            return default
+        if key.endswith(".0"):  # IDs numéricos leídos de Excel
+            key = key[:-2]
+        if key not in self.categories:
+            raise ValueError(f"Categoría no encontrada: {value}")
+        return self.categories[key]
+
+    def trip_id(self, value: Any, user_id: int) -> Optional[int]:
+        key = _normalize(value)
+        if not key:
+            return None
+        if key.endswith(".0"):
+            key = key[:-2]
+        trip_id = int(key) if key.isdigit() else self.trip_names.get((user_id, key))
+        if trip_id is None or self.trips.get(trip_id) != user_id:
+            raise ValueError(f"Viaje no encontrado, completado o de otro usuario: {value}")
+        return trip_id
+
+
+def _build_expense(
+    row: Tuple[Any, ...],
+    columns: Dict[str, int],
+    lookups: LookupTables,
+    default_user_id: Optional[int],
+    default_category_id: Optional[int]
+) -> dict:
+    def cell(field: str) -> Any:
+        index = columns.get(field)
+        if index is None or index >= len(row):
+            return None
+        value = row[index]
+        return value.strip() if isinstance(value, str) else value
+
+    amount = parse_amount(cell("amount"))
+    if amount <= 0:
+        raise ValueError("El monto debe ser mayor a cero (abonos y pagos no se importan)")
+
+    currency = str(cell("currency") or "USD").upper()
+    if len(currency) != 3 or not currency.isalpha():
+        raise ValueError(f"Moneda inválida: {currency}")
+
+    user_id = lookups.user_id(cell("user"), default_user_id)
+    expense_date = parse_date(cell("expense_date"))
+    now = datetime.utcnow()
+    return {
+        "user_id": user_id,
+        "category_id": lookups.category_id(cell("category"), default_category_id),
+        "trip_id": lookups.trip_id(cell("trip"), user_id),
+        "amount": amount,
+        "amount_base": lookups.rates.convert(amount, currency, expense_date),
+        "currency": currency,
+        "merchant": (str(cell("merchant") or "")[:255]) or None,
+        "description": str(cell("description") or "") or None,
+        "expense_date": expense_date,
+        "status": ExpenseStatus.DRAFT,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def import_statement(
+    db: Session,
+    fileobj: BinaryIO,
+    filename: str,
+    default_user_id: Optional[int] = None,
+    default_category_id: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> Iterator[dict]:
+    """
+    Importar un estado de cuenta como gastos en borrador
+
+    Genera un evento {"event": "progress", ...} por bloque insertado, con los
+    errores de las filas de ese bloque, y al final {"event": "summary", ...}.
+    Las filas con error se omiten; el resto del bloque se inserta igual.
+    Si el archivo deja de poder leerse (bytes que no son UTF-8, CSV mal
+    formado) se guarda lo leído hasta ahí, se emite {"event": "error", ...}
+    y se termina con el resumen.
+
+    Args:
+        default_user_id: Usuario de las filas sin columna de usuario
+        default_category_id: Categoría de las filas sin columna de categoría
+
+    Raises:
+        StatementImportError: Archivo sin encabezado o sin fecha/monto
+    """
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    rows = iter_statement_rows(fileobj, filename)
+
+    try:
+        header = next(rows, None)
+    except Exception as e:
+        raise StatementImportError(f"No se pudo leer el archivo: {e}")
+    columns = _map_columns(header or ())
+    missing = [field for field in ("expense_date", "amount") if field not in columns]
+    if missing:
+        rows.close()
+        raise StatementImportError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+
+    lookups = LookupTables(db)
+    totals = {"processed": 0, "imported": 0, "failed": 0}
+    chunk: List[dict] = []
+    chunk_rows: List[int] = []
+    errors: List[dict] = []
+
+    def flush() -> dict:
+        if chunk:
+            try:
+                db.execute(insert(Expense), chunk)
+                db.commit()
+                totals["imported"] += len(chunk)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"❌ Error insertando bloque de importación: {e}")
+                errors.extend({"row": row, "error": "Error al guardar el bloque"} for row in chunk_rows)
+        totals["failed"] += len(errors)
+        event = {"event": "progress", **totals, "errors": list(errors)}
+        chunk.clear()
+        chunk_rows.clear()
+        errors.clear()
+        return event
+
+    row_number = 1
+    read_error = None
+    try:
+        for row_number, row in enumerate(rows, start=2):
+            if all(value in (None, "") for value in row):
+                continue
+            totals["processed"] += 1
+            try:
+                chunk.append(_build_expense(row, columns, lookups, default_user_id, default_category_id))
+                chunk_rows.append(row_number)
+            except ValueError as e:
+                errors.append({"row": row_number, "error": str(e)})
+            if len(chunk) + len(errors) >= chunk_size:
+                yield flush()
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Lanzado por el lector al pedir la fila siguiente
+        logger.warning(f"⚠️ Estado de cuenta {filename} ilegible desde la fila {row_number + 1}: {e}")
+        read_error = {"event": "error", "row": row_number + 1, "error": _read_error(e)}
+    finally:
+        rows.close()
+
+    if chunk or errors:
+        yield flush()
+    if read_error:
+        yield read_error
+
+    logger.info(
+        f"📥 Estado de cuenta {filename}: {totals['imported']} gastos importados, "
+        f"{totals['failed']} filas con error"
+    )
+    yield {"event": "summary", **totals}
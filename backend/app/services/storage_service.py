@@ -5,9 +5,10 @@ import os
 from typing import Optional
 import uuid
 from pathlib import Path
-from supabase import create_client, Client
 import logging
 
+from app.core.lazy import LazyService
+
 logger = logging.getLogger("uvicorn")
 
 class StorageService:
@@ -19,15 +20,19 @@ class StorageService:
         logger.info(f"🔧 Storage Service Init - SUPABASE_URL: {'SET' if supabase_url else 'NOT SET'}")
         logger.info(f"🔧 Storage Service Init - SUPABASE_KEY: {'SET' if supabase_key else 'NOT SET'}")
         
+        # Carpeta local: destino de subidas sin Supabase y de recibos antiguos
+        self.receipts_dir = os.getenv("RECEIPTS_DIR", "/data/receipts")
+        
         if supabase_url and supabase_key:
+            # Import diferido: el cliente de Supabase es costoso de importar
+            from supabase import create_client
             self.use_supabase = True
-            self.supabase: Client = create_client(supabase_url, supabase_key)
+            self.supabase = create_client(supabase_url, supabase_key)
             self.bucket_name = os.getenv("SUPABASE_BUCKET", "receipts")
             logger.info(f"✅ Using Supabase Storage - Bucket: {self.bucket_name}")
         else:
             self.use_supabase = False
             # Fallback a almacenamiento local
-            self.receipts_dir = os.getenv("RECEIPTS_DIR", "/data/receipts")
             os.makedirs(self.receipts_dir, exist_ok=True)
             logger.warning(f"⚠️  Using LOCAL storage - Dir: {self.receipts_dir}")
     
@@ -75,15 +80,71 @@ class StorageService:
             print(f"❌ Error uploading file: {e}")
             return None
     
+    def _supabase_path(self, file_url: str) -> Optional[str]:
+        """
+        Extract the object path from a Supabase URL
+        URL format: https://xxx.supabase.co/storage/v1/object/public/receipts/path
+        """
+        parts = file_url.split("?")[0].split(f"/{self.bucket_name}/")
+        return parts[1] if len(parts) == 2 else None
+    
+    def is_remote(self, file_url: str) -> bool:
+        """True if the receipt lives in Supabase Storage"""
+        return self.use_supabase and "supabase" in file_url
+    
+    def signed_receipt_url(self, file_url: str, expires_in: int, width: Optional[int] = None) -> Optional[str]:
+        """
+        Short-lived signed URL for a Supabase receipt
+        With width, Supabase image transformation returns a resized copy
+        """
+        file_path = self._supabase_path(file_url)
+        if not file_path:
+            return None
+        options = {"transform": {"width": width, "height": width, "resize": "contain"}} if width else {}
+        try:
+            signed = self.supabase.storage.from_(self.bucket_name).create_signed_url(
+                file_path, expires_in, options
+            )
+            return signed.get("signedURL") or signed.get("signedUrl")
+        except Exception as e:
+            logger.error(f"❌ Error signing receipt URL: {e}")
+            return None
+    
+    def local_path(self, user_id: int, filename: str) -> Optional[Path]:
+        """Path of a local receipt; None if it does not exist or escapes receipts_dir"""
+        base = Path(self.receipts_dir).resolve()
+        path = (base / str(user_id) / filename).resolve()
+        if base not in path.parents or not path.is_file():
+            return None
+        return path
+    
+    def local_receipt_path(self, file_url: str) -> Optional[Path]:
+        """Path of a local receipt from its stored URL (receipts/{user_id}/{filename})"""
+        parts = file_url.split("/")
+        if len(parts) != 3 or parts[0] != "receipts":
+            return None
+        return self.local_path(parts[1], parts[2])
+    
+    def download_receipt(self, file_url: str) -> Optional[bytes]:
+        """Original bytes of a receipt from Supabase Storage or local storage"""
+        try:
+            if self.is_remote(file_url):
+                file_path = self._supabase_path(file_url)
+                if file_path:
+                    return self.supabase.storage.from_(self.bucket_name).download(file_path)
+                return None
+            path = self.local_receipt_path(file_url)
+            return path.read_bytes() if path else None
+        except Exception as e:
+            logger.error(f"❌ Error downloading receipt: {e}")
+            return None
+    
     def delete_receipt(self, file_url: str) -> bool:
         """Delete receipt from Supabase Storage or local storage"""
         try:
-            if self.use_supabase and "supabase" in file_url:
-                # Extract path from Supabase URL
-                # URL format: https://xxx.supabase.co/storage/v1/object/public/receipts/path
-                parts = file_url.split(f"/{self.bucket_name}/")
-                if len(parts) == 2:
-                    file_path = parts[1]
+            if self.is_remote(file_url):
+                file_path = self._supabase_path(file_url)
+                if file_path:
                     self.supabase.storage.from_(self.bucket_name).remove([file_path])
                     return True
             elif file_url.startswith('receipts/'):
@@ -108,4 +169,5 @@ class StorageService:
         }
         return content_types.get(extension.lower(), 'application/octet-stream')
 
-storage_service = StorageService()
+# Singleton instance (cliente de Supabase creado en el primer uso)
+storage_service = LazyService(StorageService)
@@ -0,0 +1,121 @@
+"""
+Thumbnail Service - Miniaturas de recibos
+Se generan una sola vez por (tamaño, recibo) y quedan en disco junto a los
+originales locales; como los nombres son UUID, una miniatura nunca queda obsoleta.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn")
+
+# Lado mayor en píxeles de cada tamaño que acepta ?size=
+THUMBNAIL_SIZES = {
+    "sm": 160,
+    "md": 480,
+    "lg": 1024,
+}
+
+
+class ThumbnailService:
+    def __init__(self, receipts_dir: str):
+        self.thumbs_dir = Path(receipts_dir) / ".thumbs"
+        # Locks por franjas: memoria acotada sin importar cuántos recibos haya
+        self._locks = [threading.Lock() for _ in range(32)]
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    def get_thumbnail(self, source: Path, user_id: int, size: str) -> Optional[Path]:
+        """
+        Ruta de la miniatura JPEG de un recibo, generándola si no existe
+        Bloqueante (PIL): llamar desde un threadpool en endpoints async
+
+        Returns:
+            Path de la miniatura o None si el original no es una imagen válida
+        """
+        target = self.thumbs_dir / size / str(user_id) / f"{source.stem}.jpg"
+        return self._cached(target, size, lambda: source, source.name)
+
+    def get_receipt_thumbnail(self, receipt_url: str, size: str) -> Optional[Path]:
+        """
+        Miniatura de un recibo a partir de la URL guardada en el gasto
+
+        Los recibos locales comparten caché con /receipts?size=; los de Supabase
+        se descargan una sola vez y su miniatura queda en disco indexada por URL.
+        """
+        from app.services.storage_service import storage_service
+
+        local = storage_service.local_receipt_path(receipt_url)
+        if local:
+            return self.get_thumbnail(local, local.parent.name, size)
+        if not storage_service.is_remote(receipt_url):
+            return None
+
+        key = hashlib.sha256(receipt_url.encode()).hexdigest()
+        target = self.thumbs_dir / size / "remote" / f"{key}.jpg"
+
+        def download():
+            data = storage_service.download_receipt(receipt_url)
+            if data is None:
+                raise FileNotFoundError(receipt_url)
+            return io.BytesIO(data)
+
+        return self._cached(target, size, download, receipt_url)
+
+    def _cached(self, target: Path, size: str, open_source: Callable, name: str) -> Optional[Path]:
+        if target.is_file():
+            return target
+
+        # Un solo proceso de generación por miniatura dentro del worker
+        with self._lock_for(str(target)):
+            if target.is_file():
+                return target
+            try:
+                from PIL import Image, ImageOps
+                
+                target.parent.mkdir(parents=True, exist_ok=True)
+                edge = THUMBNAIL_SIZES[size]
+                with Image.open(open_source()) as image:
+                    # JPEG: decodificar ya reducido (no carga la foto completa en memoria)
+                    image.draft("RGB", (edge, edge))
+                    image = ImageOps.exif_transpose(image)
+                    image.thumbnail((edge, edge))
+                    if image.mode != "RGB":
+                        image = image.convert("RGB")
+                    # Escritura atómica: otros workers nunca ven un archivo a medias
+                    tmp = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                    image.save(tmp, "JPEG", quality=80, optimize=True)
+                os.replace(tmp, target)
+                logger.info(f"🖼️ Miniatura {size} generada: {target.name}")
+                return target
+            except Exception as e:
+                logger.error(f"❌ Error generando miniatura de {name}: {e}")
+                return None
+
+
+def fetch_receipt_thumbnails(receipt_urls: Iterable[str], size: str) -> Dict[str, Optional[Path]]:
+    """
+    Miniaturas de varios recibos descargadas y generadas en paralelo
+
+    Devuelve rutas en disco (no bytes): la memoria no crece con el número
+    de recibos. Bloqueante: llamar desde un hilo o proceso de exportación.
+    """
+    urls = list(dict.fromkeys(url for url in receipt_urls if url))
+    if not urls:
+        return {}
+    workers = min(settings.RECEIPT_FETCH_WORKERS, len(urls))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        paths = pool.map(lambda url: thumbnail_service.get_receipt_thumbnail(url, size), urls)
+        return dict(zip(urls, paths))
+
+
+# Singleton instance
+thumbnail_service = ThumbnailService(os.getenv("RECEIPTS_DIR", "/data/receipts"))
@@ -0,0 +1,149 @@
+"""
+Token Service - Emisión y rotación de access/refresh tokens
+Los access tokens son cortos y llevan las claims para autorizar sin base de
+datos; los refresh tokens son opacos, se guardan hasheados y rotan en cada uso.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+import secrets
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import (
+    access_token_claims,
+    create_access_token,
+    create_refresh_token,
+    hash_refresh_token,
+    token_cache
+)
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+logger = logging.getLogger("uvicorn")
+
+
+class RefreshTokenError(Exception):
+    """Refresh token inválido, expirado, revocado o reutilizado"""
+
+
+def issue_tokens(db: Session, user: User, family_id: Optional[str] = None) -> dict:
+    """
+    Emitir un access token y un refresh token nuevo (hace commit)
+
+    Args:
+        family_id: Familia de la sesión al rotar; None abre una sesión nueva
+
+    Returns:
+        Dict con la forma del schema Token
+    """
+    refresh_token, token_hash = create_refresh_token()
+    family_id = family_id or secrets.token_hex(16)
+    db.add(RefreshToken(
+        user_id=user.id,
+        token_hash=token_hash,
+        family_id=family_id,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    db.commit()
+
+    # sid: revocar la familia también invalida sus access tokens vigentes
+    return {
+        "access_token": create_access_token(data={**access_token_claims(user), "sid": family_id}),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def rotate_refresh_token(db: Session, refresh_token: str) -> dict:
+    """
+    Canjear un refresh token por un par nuevo; el usado queda revocado
+
+    Presentar un token ya rotado indica robo: se revoca toda la familia.
+    Es el único punto donde se relee el usuario (rol y estado actualizados).
+
+    Raises:
+        RefreshTokenError
+    """
+    now = datetime.utcnow()
+    stored = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_refresh_token(refresh_token)
+    ).first()
+
+    if stored is None or stored.expires_at <= now:
+        raise RefreshTokenError("Refresh token inválido o expirado")
+
+    # UPDATE condicional: de dos refresh concurrentes con el mismo token solo gana uno
+    claimed = db.query(RefreshToken).filter(
+        RefreshToken.id == stored.id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: now}, synchronize_session=False)
+
+    if not claimed:
+        revoked = revoke_refresh_tokens(db, family_id=stored.family_id)
+        logger.warning(
+            f"🚨 Refresh token reutilizado (user_id={stored.user_id}), "
+            f"{revoked} tokens de la sesión revocados"
+        )
+        raise RefreshTokenError("Refresh token revocado")
+
+    user = db.query(User).filter(User.id == stored.user_id).first()
+    if user is None or not user.is_active:
+        db.commit()
+        raise RefreshTokenError("Usuario inactivo")
+
+    return issue_tokens(db, user, family_id=stored.family_id)
+
+
+def revoke_refresh_tokens(
+    db: Session,
+    user_id: Optional[int] = None,
+    family_id: Optional[str] = None
+) -> int:
+    """
+    Revocar refresh tokens activos de un usuario o de una sesión (hace commit)
+    También revoca en todos los workers los access tokens ya emitidos: todos
+    los del usuario (user_id) o los de la sesión (family_id, claim sid)
+
+    Returns:
+        Número de refresh tokens revocados
+    """
+    query = db.query(RefreshToken).filter(RefreshToken.revoked_at.is_(None))
+    if user_id is not None:
+        query = query.filter(RefreshToken.user_id == user_id)
+    if family_id is not None:
+        query = query.filter(RefreshToken.family_id == family_id)
+
+    revoked = query.update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+    if user_id is not None:
+        token_cache.revoke_user(user_id)
+    if family_id is not None:
+        token_cache.revoke_session(family_id)
+    return revoked
+
+
+def revoke_refresh_token(db: Session, refresh_token: str) -> int:
+    """Cerrar la sesión de un refresh token (revoca toda su familia)"""
+    stored = db.query(RefreshToken.family_id).filter(
+        RefreshToken.token_hash == hash_refresh_token(refresh_token)
+    ).first()
+    if stored is None:
+        return 0
+    return revoke_refresh_tokens(db, family_id=stored.family_id)
+
+
+def purge_expired_refresh_tokens(db: Session, now: Optional[datetime] = None) -> int:
+    """Borrar refresh tokens expirados (job diario)"""
+    now = now or datetime.utcnow()
+    deleted = db.query(RefreshToken).filter(
+        RefreshToken.expires_at < now
+    ).delete(synchronize_session=False)
+    db.commit()
+
+    if deleted:
+        logger.info(f"🧹 {deleted} refresh tokens expirados eliminados")
+    return deleted
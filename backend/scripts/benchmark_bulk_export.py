@@ -0,0 +1,91 @@
+"""
+Benchmark de la exportación masiva de gastos (Parquet y CSV)
+Genera N gastos en una base SQLite temporal (o usa DATABASE_URL existente con
+--no-seed) y mide filas/segundo y memoria máxima del proceso por formato
+Uso: python scripts/benchmark_bulk_export.py [--rows 1000000] [--batch-size 50000]
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(engine, rows: int) -> None:
+    """Usuarios, categorías, viajes, reportes y `rows` gastos en bloques"""
+    from sqlalchemy import insert
+    from app.core.database import Base
+    from app.models import Category, Expense, ExpenseStatus, Report, ReportStatus, Trip, User
+
+    Base.metadata.create_all(engine)
+    now = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@example.com", "full_name": f"Usuario {i}",
+             "hashed_password": "x", "role": "EMPLOYEE"}
+            for i in range(1, 201)
+        ])
+        conn.execute(insert(Category), [{"id": i, "name": f"Categoría {i}"} for i in range(1, 11)])
+        conn.execute(insert(Trip), [
+            {"id": i, "user_id": i % 200 + 1, "name": f"Viaje {i}", "destination": "Madrid",
+             "start_date": date(2025, 1, 1), "end_date": date(2025, 12, 31)}
+            for i in range(1, 2001)
+        ])
+        conn.execute(insert(Report), [
+            {"id": i, "user_id": i % 200 + 1, "title": f"Reporte {i}", "status": ReportStatus.SUBMITTED}
+            for i in range(1, 5001)
+        ])
+        for offset in range(0, rows, 50_000):
+            conn.execute(insert(Expense), [
+                {"user_id": i % 200 + 1, "category_id": i % 10 + 1, "trip_id": i % 2000 + 1 if i % 3 else None,
+                 "report_id": i % 5000 + 1 if i % 2 else None, "amount": 1000 + i % 90000, "currency": "USD",
+                 "merchant": f"Comercio {i % 5000}", "description": "Gasto de viaje",
+                 "expense_date": now + timedelta(minutes=i), "status": ExpenseStatus.APPROVED,
+                 "created_at": now, "updated_at": now}
+                for i in range(offset, min(offset + 50_000, rows))
+            ])
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--no-seed", action="store_true", help="Usar DATABASE_URL tal cual")
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from app.core.database import SessionLocal, engine
+    from app.models import notification, refund  # noqa: F401 (registrar todos los mappers)
+    from app.services.bulk_export import stream_expenses
+
+    if not args.no_seed:
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        print(f"🌱 {args.rows:,} gastos generados en {time.perf_counter() - start:.1f} s")
+
+    print(f"{'formato':<10} {'filas':>10} {'s':>8} {'filas/s':>10} {'MB':>8} {'RSS máx MB':>11}")
+    for export_format in ("parquet", "csv"):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            size = 0
+            for chunk in stream_expenses(db, date(2000, 1, 1), date(2100, 1, 1), export_format, args.batch_size):
+                size += len(chunk)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+        print(
+            f"{export_format:<10} {args.rows:>10,} {elapsed:>8.1f} {args.rows / elapsed:>10,.0f} "
+            f"{size / 1024 / 1024:>8.1f} {peak_rss_mb():>11.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark de la proyección de gasto de viajes activos (GET /api/trips/forecast)
+Genera N viajes activos con gastos diarios en una base SQLite temporal (o usa
+DATABASE_URL existente con --no-seed) y mide la consulta de la serie diaria, el
+cálculo vectorizado y, como referencia, el mismo cálculo viaje por viaje en Python
+Uso: python scripts/benchmark_forecast.py [--trips 10000] [--days 30] [--repeat 5]
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(engine, trips: int, days: int, today: date) -> int:
+    """Usuarios, una categoría, `trips` viajes activos y hasta 2 gastos por día transcurrido"""
+    from sqlalchemy import insert
+    from app.core.database import Base
+    from app.models import Category, Expense, ExpenseStatus, Trip, User
+
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@example.com", "full_name": f"Usuario {i}",
+             "hashed_password": "x", "role": "EMPLOYEE"}
+            for i in range(1, 501)
+        ])
+        conn.execute(insert(Category), [{"id": 1, "name": "Viáticos"}])
+        conn.execute(insert(Trip), [
+            {"id": i, "user_id": i % 500 + 1, "name": f"Viaje {i}", "destination": "Madrid",
+             "start_date": today - timedelta(days=i % days), "end_date": today + timedelta(days=i % 17),
+             "budget": 50_000 + (i % 40) * 10_000 if i % 5 else None, "status": "active"}
+            for i in range(1, trips + 1)
+        ])
+
+        expenses = []
+        total = 0
+        for i in range(1, trips + 1):
+            for day in range(i % days + 1):
+                for n in range(1 + (i + day) % 2):
+                    amount = 1_000 + (i * 37 + day * 11 + n) % 9_000
+                    expenses.append({
+                        "user_id": i % 500 + 1, "category_id": 1, "trip_id": i,
+                        "amount": amount, "amount_base": amount,
+                        "currency": "USD", "expense_date": datetime.combine(today - timedelta(days=day), datetime.min.time()),
+                        "status": ExpenseStatus.DRAFT, "created_at": now, "updated_at": now,
+                    })
+            if i % 7 == 0:
+                # Prepago antes del inicio: suma a spent pero no al ritmo diario
+                expenses.append({
+                    "user_id": i % 500 + 1, "category_id": 1, "trip_id": i,
+                    "amount": 40_000, "amount_base": 40_000, "currency": "USD",
+                    "expense_date": datetime.combine(today - timedelta(days=i % days + 10), datetime.min.time()),
+                    "status": ExpenseStatus.DRAFT, "created_at": now, "updated_at": now,
+                })
+            if i % 11 == 0:
+                # Gasto en otra moneda sin tipo de cambio: fuera de los montos
+                expenses.append({
+                    "user_id": i % 500 + 1, "category_id": 1, "trip_id": i,
+                    "amount": 5_000, "amount_base": None, "currency": "EUR",
+                    "expense_date": datetime.combine(today, datetime.min.time()),
+                    "status": ExpenseStatus.DRAFT, "created_at": now, "updated_at": now,
+                })
+            if len(expenses) >= 50_000 or i == trips:
+                conn.execute(insert(Expense), expenses)
+                total += len(expenses)
+                expenses = []
+    return total
+
+def project_loop(trip_rows: list, spend_rows: list, today: date) -> dict:
+    """Mismo cálculo viaje por viaje (referencia para comparar con project_trips)"""
+    month_start = today.replace(day=1)
+    month_end = today.replace(day=monthrange(today.year, today.month)[1])
+    days = {}
+    for trip_id, day, amount, unconverted in spend_rows:
+        days.setdefault(trip_id, []).append((date.fromisoformat(str(day)), amount, unconverted))
+
+    forecasts = []
+    for trip_id, user_id, name, destination, start, end, budget in trip_rows:
+        series = days.get(trip_id, [])
+        spent = sum(amount for _, amount, _ in series)
+        observed = sum(amount for day, amount, _ in series if start <= day <= min(today, end))
+        month_spent = sum(amount for day, amount, _ in series if month_start <= day <= month_end)
+        duration = (end - start).days + 1
+        elapsed = min(max((today - start).days + 1, 0), duration)
+        last_seen = max(today, start - timedelta(days=1))
+        remaining = min(max((end - last_seen).days, 0), duration)
+        rate = observed / elapsed if elapsed else 0.0
+        projected = round(spent + rate * remaining)
+        forecasts.append({
+            "trip_id": trip_id, "user_id": user_id, "name": name, "destination": destination,
+            "start_date": start, "end_date": end, "budget": budget, "spent": spent,
+            "daily_rate": round(rate, 2), "elapsed_days": elapsed, "remaining_days": remaining,
+            "projected_total": projected,
+            "projected_excess": projected - budget if budget else 0,
+            "projected_over_budget": bool(budget) and projected > budget,
+            "month_spent": month_spent,
+            "projected_month_total": round(month_spent + rate * max((min(end, month_end) - last_seen).days, 0)),
+            "unconverted_count": sum(unconverted for _, _, unconverted in series),
+        })
+    forecasts.sort(key=lambda f: (-f["projected_excess"], f["trip_id"]))
+    return {
+        "trips_count": len(forecasts),
+        "over_budget_count": sum(f["projected_over_budget"] for f in forecasts),
+        "trips": forecasts,
+    }
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def best_of(repeat: int, fn, *args):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trips", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=30, help="Días transcurridos máximos por viaje")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-seed", action="store_true", help="Usar DATABASE_URL tal cual")
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from app.core.database import SessionLocal, engine
+    from app.models import notification, refund  # noqa: F401 (registrar todos los mappers)
+    from app.services.forecast_service import active_trips_query, daily_spend_query, project_trips
+
+    today = date.today()
+    if not args.no_seed:
+        start = time.perf_counter()
+        expenses = seed(engine, args.trips, args.days, today)
+        print(f"🌱 {args.trips:,} viajes activos y {expenses:,} gastos generados en {time.perf_counter() - start:.1f} s")
+
+    db = SessionLocal()
+    try:
+        trips_ms, trip_rows = best_of(args.repeat, lambda: db.execute(active_trips_query()).all())
+        series_ms, spend_rows = best_of(args.repeat, lambda: db.execute(daily_spend_query()).all())
+    finally:
+        db.close()
+
+    import numpy  # noqa: F401 (sin contar la importación en la primera medición)
+    vector_ms, result = best_of(args.repeat, project_trips, trip_rows, spend_rows, today)
+    loop_ms, loop_result = best_of(args.repeat, project_loop, trip_rows, spend_rows, today)
+    assert loop_result["over_budget_count"] == result["over_budget_count"]
+    for expected, actual in zip(loop_result["trips"], result["trips"]):
+        fields = ("trip_id", "projected_total", "projected_month_total", "unconverted_count")
+        assert [expected[f] for f in fields] == [actual[f] for f in fields], (expected, actual)
+
+    print(f"{'etapa':<28} {'ms':>9}")
+    print(f"{'consulta viajes activos':<28} {trips_ms:>9.1f}")
+    print(f"{'consulta serie diaria':<28} {series_ms:>9.1f}   ({len(spend_rows):,} filas viaje-día)")
+    print(f"{'proyección vectorizada':<28} {vector_ms:>9.1f}")
+    print(f"{'proyección en bucle':<28} {loop_ms:>9.1f}   (referencia, {loop_ms / vector_ms:.1f}x)")
+    print(
+        f"\n✅ {result['trips_count']:,} viajes, {result['over_budget_count']:,} se exceden del presupuesto; "
+        f"RSS máx {peak_rss_mb():.0f} MB"
+    )
+
+if __name__ == "__main__":
+    main()
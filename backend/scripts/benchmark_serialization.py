@@ -0,0 +1,81 @@
+"""
+Benchmark de serialización de listados grandes (1k y 10k filas)
+Compara la ruta de FastAPI (validación de response_model + dump a dict +
+JSONResponse/ORJSONResponse) con FastSerializer (TypeAdapter + dump_json)
+Uso: python scripts/benchmark_serialization.py
+"""
+import sys
+import os
+import json
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.core.serialization import FastSerializer
+from app.schemas import ExpenseResponse
+
+ROW_COUNTS = [1_000, 10_000]
+REPEAT = 5
+
+def make_rows(count: int) -> list:
+    """Filas con la misma forma que los objetos ORM de Expense"""
+    base = datetime(2025, 1, 1)
+    ocr = json.dumps({"merchant": "Hotel", "amount": 120.5, "raw_text": "TOTAL 120.50\n" * 20})
+    return [
+        SimpleNamespace(
+            id=i, user_id=i % 50, category_id=i % 7, report_id=None, trip_id=i % 300,
+            amount=1000 + i, currency="USD", merchant=f"Comercio {i}",
+            description="Gasto de viaje", expense_date=base + timedelta(hours=i),
+            receipt_url=f"receipts/{i % 50}/{i}.jpg", receipt_original_name=f"{i}.jpg",
+            ocr_data=ocr, ocr_confidence=85, status="draft",
+            created_at=base, updated_at=base
+        )
+        for i in range(count)
+    ]
+
+response_adapter = TypeAdapter(List[ExpenseResponse])
+serializer = FastSerializer(List[ExpenseResponse])
+
+def fastapi_json(rows: list) -> bytes:
+    """Lo que hace FastAPI con response_model y JSONResponse"""
+    value = response_adapter.validate_python(rows, from_attributes=True)
+    content = response_adapter.dump_python(value, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def fastapi_orjson(rows: list) -> bytes:
+    """Lo mismo con ORJSONResponse como clase por defecto"""
+    value = response_adapter.validate_python(rows, from_attributes=True)
+    return orjson.dumps(response_adapter.dump_python(value, mode="json"))
+
+def fast_serializer(rows: list) -> bytes:
+    """FastSerializer: sin dict intermedio, JSON generado en pydantic-core"""
+    return serializer.dump_json(rows)
+
+def bench(fn, rows: list) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    print(f"{'filas':>8} {'ruta':<22} {'ms':>10} {'x':>6}")
+    for count in ROW_COUNTS:
+        rows = make_rows(count)
+        baseline = bench(fastapi_json, rows)
+        for name, fn in [
+            ("JSONResponse", fastapi_json),
+            ("ORJSONResponse", fastapi_orjson),
+            ("FastSerializer", fast_serializer),
+        ]:
+            elapsed = baseline if fn is fastapi_json else bench(fn, rows)
+            print(f"{count:>8} {name:<22} {elapsed:>10.1f} {baseline / elapsed:>6.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Calibrar el costo de bcrypt para una latencia objetivo
+Mide cada costo en esta máquina y sugiere el mayor cuyo hash tarda menos
+que el objetivo. Los hashes existentes se re-hashean al iniciar sesión.
+Uso: python scripts/calibrate_bcrypt.py [objetivo_ms]   (por defecto 250)
+"""
+import sys
+import time
+
+import bcrypt
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 15
+SAMPLES = 3
+
+def measure(rounds: int) -> float:
+    """Mediana de SAMPLES hashes con este costo, en ms"""
+    salt = bcrypt.gensalt(rounds=rounds)
+    timings = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+def main():
+    target_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 250.0
+    chosen = MIN_ROUNDS
+
+    print(f"Objetivo: {target_ms:.0f} ms por hash")
+    print(f"{'costo':>6} {'ms':>10}")
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = measure(rounds)
+        print(f"{rounds:>6} {elapsed:>10.1f}")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+
+    print(f"\n✅ Sugerido: BCRYPT_ROUNDS={chosen}")
+
+if __name__ == "__main__":
+    main()
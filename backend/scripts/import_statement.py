@@ -0,0 +1,59 @@
+"""
+Importar un estado de cuenta de tarjeta (CSV/XLSX) como gastos en borrador
+Alternativa CLI a POST /api/expenses/import para archivos muy grandes
+Uso: python scripts/import_statement.py archivo.csv [--user-email a@b.com] [--category "Comida"] [--chunk-size 500]
+"""
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.models import notification, refund  # noqa: F401 (registrar todos los mappers)
+from app.models.category import Category
+from app.models.user import User
+from app.services.statement_import import StatementImportError, import_statement
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--user-email", help="Usuario de las filas sin columna de usuario")
+    parser.add_argument("--category", help="Categoría (nombre) de las filas sin columna de categoría")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_id = category_id = None
+        if args.user_email:
+            user = db.query(User.id).filter(User.email == args.user_email).first()
+            if not user:
+                sys.exit(f"❌ Usuario no encontrado: {args.user_email}")
+            user_id = user.id
+        if args.category:
+            category = db.query(Category.id).filter(Category.name == args.category).first()
+            if not category:
+                sys.exit(f"❌ Categoría no encontrada: {args.category}")
+            category_id = category.id
+
+        with open(args.path, "rb") as statement:
+            events = import_statement(
+                db, statement, os.path.basename(args.path),
+                default_user_id=user_id,
+                default_category_id=category_id,
+                chunk_size=args.chunk_size
+            )
+            for event in events:
+                if event["event"] == "progress":
+                    for error in event["errors"]:
+                        print(f"   ⚠️ Fila {error['row']}: {error['error']}")
+                    print(f"📥 {event['processed']} filas procesadas, {event['imported']} importadas, {event['failed']} con error")
+                else:
+                    print(f"✅ {event['imported']} gastos importados, {event['failed']} filas con error")
+    except StatementImportError as e:
+        sys.exit(f"❌ {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
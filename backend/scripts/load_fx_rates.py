@@ -0,0 +1,40 @@
+"""
+Cargar o corregir tipos de cambio desde un archivo local (CSV/XLSX)
+Columnas: fecha, moneda, tasa (unidades de BASE_CURRENCY por 1 unidad de la moneda)
+Uso: python scripts/load_fx_rates.py tasas.csv [--no-recompute]
+"""
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.models import notification, refund  # noqa: F401 (registrar todos los mappers)
+from app.services.fx_service import FxRateError, load_rates, recompute_amount_base
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--no-recompute", action="store_true",
+                        help="No recalcular amount_base de los gastos afectados")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as rates:
+            result = load_rates(db, rates, os.path.basename(args.path))
+        for error in result["errors"]:
+            print(f"⚠️  Fila {error['row']}: {error['error']}")
+        print(f"✅ {result['loaded']} tasas cargadas, {result['failed']} filas con error")
+
+        if not args.no_recompute:
+            for currency, since in result["since"].items():
+                updated = recompute_amount_base(db, currency=currency, since=since)
+                print(f"💱 {currency}: {updated} gastos recalculados desde {since}")
+    except FxRateError as e:
+        sys.exit(f"❌ {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
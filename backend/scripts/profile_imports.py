@@ -0,0 +1,79 @@
+"""
+Perfil de tiempo de importación al arrancar la API (python -X importtime)
+Agrupa el tiempo propio de cada módulo por paquete y lo compara con el
+presupuesto de arranque. Sale con código 1 si se excede el presupuesto o si
+alguna dependencia pesada se importa al arrancar, para usarlo en CI.
+Uso: python scripts/profile_imports.py [--budget-ms 2500] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Deben cargarse en el primer uso, nunca al importar app.main
+LAZY_MODULES = ["reportlab", "openpyxl", "supabase", "google.cloud.vision", "PIL", "pandas", "pyarrow"]
+
+def run_importtime() -> list:
+    """[(módulo, self_us, cumulative_us)] de importar app.main en un proceso limpio"""
+    env = dict(os.environ)
+    env.setdefault("RECEIPTS_DIR", os.path.join(BACKEND_DIR, "receipts"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"❌ Error importando app.main:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def group_name(module: str) -> str:
+    """Paquete de terceros (sqlalchemy) o módulo de la app (app.api.export)"""
+    parts = module.split(".")
+    if parts[0] == "app":
+        return ".".join(parts[:3])
+    return parts[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "2500")))
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = run_importtime()
+    total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+
+    by_group = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_group[group_name(name)] += self_us
+
+    print(f"{'paquete':<32} {'ms':>9} {'%':>6}")
+    for name, self_us in sorted(by_group.items(), key=lambda item: -item[1])[:args.top]:
+        ms = self_us / 1000
+        print(f"{name:<32} {ms:>9.1f} {ms / total_ms * 100:>6.1f}")
+    print(f"{'TOTAL':<32} {total_ms:>9.1f}   (presupuesto {args.budget_ms:.0f} ms)")
+
+    imported = {name for name, _, _ in rows}
+    eager = [m for m in LAZY_MODULES if m in imported]
+
+    failed = False
+    if eager:
+        print(f"\n❌ Importados al arrancar (deberían ser diferidos): {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"\n❌ Arranque de {total_ms:.0f} ms excede el presupuesto de {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\n✅ Arranque dentro del presupuesto")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
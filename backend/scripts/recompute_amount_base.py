@@ -0,0 +1,36 @@
+"""
+Script para recalcular Expense.amount_base con los tipos de cambio actuales
+Usar tras corregir tasas o cambiar BASE_CURRENCY (actualiza también reports.total_amount)
+Uso: python scripts/recompute_amount_base.py [--currency EUR] [--since 2026-01-01]
+"""
+import argparse
+import os
+import sys
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.models import notification, refund  # noqa: F401 (registrar todos los mappers)
+from app.services.fx_service import recompute_amount_base
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--currency", help="Solo gastos en esta moneda")
+    parser.add_argument("--since", type=date.fromisoformat, help="Solo gastos desde esta fecha (YYYY-MM-DD)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        updated = recompute_amount_base(
+            db,
+            currency=args.currency.upper() if args.currency else None,
+            since=args.since,
+            batch_size=args.batch_size
+        )
+        print(f"✅ amount_base recalculado para {updated} gastos")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Script para recalcular los contadores de notificaciones no leídas
+Uso: python scripts/recompute_unread_counts.py [user_id]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.api.notifications import recompute_unread_counts
+
+def main():
+    """Reparar contadores de no leídas"""
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    db = SessionLocal()
+    try:
+        updated = recompute_unread_counts(db, user_id=user_id)
+        print(f"✅ Contadores recalculados para {updated} usuarios")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Script para marcar devoluciones vencidas (alternativa CLI al worker de Celery)
+Uso: python scripts/sweep_overdue_refunds.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.refund_sweeper import mark_overdue_refunds
+
+def main():
+    """Ejecutar el sweeper una vez"""
+    db = SessionLocal()
+    try:
+        updated = mark_overdue_refunds(db)
+        print(f"✅ {updated} devoluciones marcadas como vencidas")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Fixtures de pruebas: SQLite temporal, sesión, cliente HTTP y contador de queries
+Uso: cd backend && pip install pytest && python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Antes de importar la app: el engine se crea con DATABASE_URL al importar
+_tmp_dir = tempfile.mkdtemp(prefix="expense-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ["RECEIPTS_DIR"] = os.path.join(_tmp_dir, "receipts")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.security import access_token_claims, create_access_token
+from app.main import app
+from app.models import notification, refund  # noqa: F401 (registrar todos los mappers)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers():
+    """Headers con un access token emitido para el usuario"""
+    def headers(user) -> dict:
+        return {"Authorization": f"Bearer {create_access_token(access_token_claims(user))}"}
+    return headers
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager que cuenta las sentencias SQL ejecutadas dentro del bloque"""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return counter
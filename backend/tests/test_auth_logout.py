@@ -0,0 +1,35 @@
+"""
+POST /api/auth/logout: solo revoca tokens verificados, por jti y hasta su exp
+"""
+import time
+
+from app.core.security import decode_access_token, token_cache
+from app.models import User, UserRole
+
+
+def make_user(db) -> User:
+    user = User(email="user@example.com", full_name="Usuario", hashed_password="x", role=UserRole.EMPLOYEE)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_logout_rejects_unverified_tokens(db, client):
+    revoked = dict(token_cache._revoked_tokens)
+    for i in range(50):
+        response = client.post("/api/auth/logout", headers={"Authorization": f"Bearer basura{i}"})
+        assert response.status_code == 401
+    assert token_cache._revoked_tokens == revoked
+
+
+def test_logout_revokes_presented_token(db, client, auth_headers):
+    headers = auth_headers(make_user(db))
+    token = headers["Authorization"].split()[1]
+    payload = decode_access_token(token)
+
+    assert client.post("/api/auth/logout", headers=headers).status_code == 204
+    assert token_cache._revoked_tokens[payload["jti"]] == payload["exp"]
+    assert payload["exp"] > time.time()
+    assert client.get("/api/notifications/unread-count", headers=headers).status_code == 401
+    # Un token revocado ya no se puede usar para volver a cerrar sesión
+    assert client.post("/api/auth/logout", headers=headers).status_code == 401
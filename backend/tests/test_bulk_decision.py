@@ -0,0 +1,113 @@
+"""
+POST /api/reports/bulk-decision: resultados por reporte, estados, aprobaciones y contadores de no leídas
+"""
+from datetime import datetime
+
+from app.models import Approval, Category, Expense, ExpenseStatus, Report, ReportStatus, User, UserRole
+from app.models.notification import Notification
+
+
+def seed(db) -> dict:
+    manager = User(email="manager@example.com", full_name="Manager", hashed_password="x", role=UserRole.MANAGER)
+    ana = User(email="ana@example.com", full_name="Ana", hashed_password="x", role=UserRole.EMPLOYEE)
+    luis = User(email="luis@example.com", full_name="Luis", hashed_password="x", role=UserRole.EMPLOYEE)
+    category = Category(name="Comida")
+    db.add_all([manager, ana, luis, category])
+    db.flush()
+
+    def report(owner: User, title: str, status: ReportStatus, amount_base=1_000) -> Report:
+        report = Report(user_id=owner.id, title=title, status=status, submitted_at=datetime(2026, 1, 20))
+        db.add(report)
+        db.flush()
+        db.add(Expense(
+            user_id=owner.id, category_id=category.id, report_id=report.id, amount=1_000,
+            amount_base=amount_base, currency="USD" if amount_base else "EUR",
+            expense_date=datetime(2026, 1, 5),
+            status=ExpenseStatus.DRAFT if status == ReportStatus.DRAFT else ExpenseStatus.PENDING
+        ))
+        return report
+
+    reports = {
+        "approve": report(ana, "Enero", ReportStatus.SUBMITTED),
+        "reject": report(ana, "Febrero", ReportStatus.SUBMITTED),
+        "other_user": report(luis, "Marzo", ReportStatus.SUBMITTED),
+        "draft": report(luis, "Borrador", ReportStatus.DRAFT),
+        "unconverted": report(luis, "Sin tasa", ReportStatus.SUBMITTED, amount_base=None),
+    }
+    db.commit()
+    return {"manager": manager, "ana": ana, "luis": luis, **{name: r.id for name, r in reports.items()}}
+
+
+def test_bulk_decision_outcomes_and_counters(db, client, auth_headers, count_queries):
+    data = seed(db)
+    decisions = [
+        {"report_id": data["approve"], "decision": "approve"},
+        {"report_id": data["reject"], "decision": "reject", "comments": "Falta el recibo"},
+        {"report_id": data["approve"], "decision": "reject"},
+        {"report_id": 9999, "decision": "approve"},
+        {"report_id": data["draft"], "decision": "approve"},
+        {"report_id": data["unconverted"], "decision": "approve"},
+        {"report_id": data["other_user"], "decision": "approve"},
+    ]
+
+    with count_queries() as statements:
+        response = client.post(
+            "/api/reports/bulk-decision", json={"decisions": decisions}, headers=auth_headers(data["manager"])
+        )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["approved"], body["rejected"], body["skipped"]) == (2, 1, 4)
+    # Un resultado por decisión, en el orden de la petición
+    assert [(r["report_id"], r["outcome"]) for r in body["results"]] == [
+        (data["approve"], "approved"),
+        (data["reject"], "rejected"),
+        (data["approve"], "duplicate"),
+        (9999, "not_found"),
+        (data["draft"], "invalid_status"),
+        (data["unconverted"], "unconverted"),
+        (data["other_user"], "approved"),
+    ]
+
+    # Aprobaciones y notificaciones en un INSERT de varias filas cada una
+    assert sum(s.startswith("INSERT INTO approvals") for s in statements) == 1
+    assert sum(s.startswith("INSERT INTO notifications") for s in statements) == 1
+
+    db.expire_all()
+    status = {r.id: r.status for r in db.query(Report)}
+    assert status[data["approve"]] == ReportStatus.APPROVED
+    assert status[data["reject"]] == ReportStatus.REJECTED
+    assert status[data["other_user"]] == ReportStatus.APPROVED
+    assert status[data["draft"]] == ReportStatus.DRAFT
+    assert status[data["unconverted"]] == ReportStatus.SUBMITTED
+
+    expense_status = {e.report_id: e.status for e in db.query(Expense)}
+    assert expense_status[data["approve"]] == ExpenseStatus.APPROVED
+    assert expense_status[data["reject"]] == ExpenseStatus.REJECTED
+    assert expense_status[data["unconverted"]] == ExpenseStatus.PENDING
+
+    approvals = {(a.report_id, a.approved, a.approver_id, a.comments) for a in db.query(Approval)}
+    assert approvals == {
+        (data["approve"], 1, data["manager"].id, None),
+        (data["reject"], 0, data["manager"].id, "Falta el recibo"),
+        (data["other_user"], 1, data["manager"].id, None),
+    }
+
+    # Contadores de no leídas: Ana recibió dos notificaciones y Luis una
+    assert db.query(Notification).filter(Notification.user_id == data["ana"].id).count() == 2
+    assert db.get(User, data["ana"].id).unread_notifications == 2
+    assert db.get(User, data["luis"].id).unread_notifications == 1
+    unread = client.get("/api/notifications/unread-count", headers=auth_headers(data["ana"])).json()
+    assert unread["unread_count"] == 2
+
+
+def test_bulk_decision_requires_manager(db, client, auth_headers):
+    data = seed(db)
+    response = client.post(
+        "/api/reports/bulk-decision",
+        json={"decisions": [{"report_id": data["approve"], "decision": "approve"}]},
+        headers=auth_headers(data["ana"])
+    )
+    assert response.status_code == 403
+    db.expire_all()
+    assert db.get(Report, data["approve"]).status == ReportStatus.SUBMITTED
@@ -0,0 +1,108 @@
+"""
+Proyección de gasto de viajes activos (project_trips, sin base de datos)
+"""
+from datetime import date, timedelta
+
+from app.services.forecast_service import project_trips
+
+TODAY = date(2026, 1, 20)
+
+
+def trip(trip_id, start, end, budget=None):
+    return (trip_id, 1, f"Viaje {trip_id}", "Madrid", start, end, budget)
+
+
+def spend(trip_id, day, amount, unconverted=0):
+    return (trip_id, day.isoformat(), amount, unconverted)
+
+
+def by_id(result) -> dict:
+    return {t["trip_id"]: t for t in result["trips"]}
+
+
+def test_run_rate_ignores_prepaid_spend():
+    # Vuelo prepagado 20 días antes del viaje + 1000 diarios desde el inicio
+    start = TODAY - timedelta(days=1)
+    trips = [trip(1, start, TODAY + timedelta(days=8), budget=200_000)]
+    rows = [
+        spend(1, start - timedelta(days=20), 90_000),
+        spend(1, start, 1_000),
+        spend(1, TODAY, 1_000),
+    ]
+
+    forecast = by_id(project_trips(trips, rows, TODAY))[1]
+
+    assert forecast["spent"] == 92_000
+    assert forecast["daily_rate"] == 1_000
+    assert (forecast["elapsed_days"], forecast["remaining_days"]) == (2, 8)
+    # El prepago cuenta una vez como monto fijo, no en el ritmo diario
+    assert forecast["projected_total"] == 92_000 + 1_000 * 8
+    assert forecast["projected_over_budget"] is False
+
+
+def test_future_dated_spend_counts_once():
+    # Hotel pagado hoy con fecha de la última noche del viaje
+    start = TODAY - timedelta(days=3)
+    end = TODAY + timedelta(days=2)
+    rows = [spend(1, d, 500) for d in (start, start + timedelta(days=1), start + timedelta(days=2), TODAY)]
+    rows.append(spend(1, end, 30_000))
+
+    forecast = by_id(project_trips([trip(1, start, end)], rows, TODAY))[1]
+
+    assert forecast["daily_rate"] == 500
+    assert forecast["projected_total"] == 4 * 500 + 30_000 + 2 * 500
+
+
+def test_trip_not_started_and_trip_past_end():
+    upcoming = trip(1, TODAY + timedelta(days=3), TODAY + timedelta(days=9), budget=50_000)
+    overdue = trip(2, TODAY - timedelta(days=9), TODAY - timedelta(days=5), budget=1_000)
+    rows = [
+        spend(1, TODAY - timedelta(days=10), 20_000),  # prepago de un viaje que aún no empieza
+        spend(2, TODAY - timedelta(days=9), 5_000),
+        spend(2, TODAY - timedelta(days=1), 99_000),   # después del fin: no entra en el ritmo
+    ]
+
+    result = by_id(project_trips([upcoming, overdue], rows, TODAY))
+
+    assert (result[1]["elapsed_days"], result[1]["remaining_days"]) == (0, 7)
+    assert result[1]["daily_rate"] == 0
+    assert result[1]["projected_total"] == 20_000
+    assert (result[2]["elapsed_days"], result[2]["remaining_days"]) == (5, 0)
+    assert result[2]["daily_rate"] == 1_000
+    assert result[2]["projected_total"] == 104_000
+
+
+def test_month_projection_and_ordering():
+    # Del 15 de enero al 5 de febrero: quedan 11 días del viaje en enero
+    trips = [
+        trip(1, date(2026, 1, 15), date(2026, 2, 5), budget=100_000),
+        trip(2, date(2026, 1, 18), date(2026, 1, 22), budget=1_000_000),
+        trip(3, date(2026, 1, 19), date(2026, 1, 25)),
+    ]
+    rows = [spend(1, date(2026, 1, d), 6_000) for d in range(15, 21)]
+    rows += [spend(2, date(2026, 1, 18), 300), spend(3, TODAY, 100, unconverted=2)]
+
+    result = project_trips(trips, rows, TODAY)
+    first = by_id(result)[1]
+
+    assert first["month_spent"] == 36_000
+    assert first["projected_month_total"] == 36_000 + 6_000 * 11
+    assert first["projected_total"] == 36_000 + 6_000 * 16
+    assert first["projected_over_budget"] is True
+    assert result["over_budget_count"] == 1
+    # Mayor excedente proyectado primero; sin presupuesto el excedente es 0
+    assert [t["trip_id"] for t in result["trips"]] == [1, 3, 2]
+    assert by_id(result)[3]["unconverted_count"] == 2
+    assert result["unconverted_count"] == 2
+
+
+def test_ignores_trips_no_longer_active():
+    # Filas de la serie de viajes que dejaron de estar activos entre las dos consultas
+    trips = [trip(2, TODAY - timedelta(days=1), TODAY + timedelta(days=1))]
+    rows = [spend(1, TODAY, 7_000), spend(2, TODAY, 100), spend(3, TODAY, 9_000)]
+
+    result = project_trips(trips, rows, TODAY)
+
+    assert result["trips_count"] == 1
+    assert result["spent"] == 100
+    assert project_trips([], rows, TODAY)["trips_count"] == 0
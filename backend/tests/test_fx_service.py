@@ -0,0 +1,95 @@
+"""
+Tipos de cambio: conversión en memoria (RateTable) y recálculo masivo de amount_base
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models import Category, Expense, Report, ReportStatus, User, UserRole
+from app.models.fx_rate import FxRate
+from app.services import fx_service
+from app.services.fx_service import RateTable, recompute_amount_base
+
+RATES = [
+    ("EUR", date(2026, 1, 1), Decimal("1.10")),
+    ("EUR", date(2026, 1, 10), Decimal("1.20")),
+    ("GBP", date(2026, 1, 5), Decimal("1.25")),
+]
+
+
+def add_rates(db, rates=RATES) -> None:
+    db.add_all([FxRate(currency=c, rate_date=d, rate=r) for c, d, r in rates])
+    db.commit()
+
+
+@pytest.mark.parametrize("amount, currency, on, expected", [
+    (1_000, "USD", datetime(2020, 1, 1), 1_000),       # moneda base: sin tasa
+    (1_000, "EUR", datetime(2025, 12, 31), None),      # antes de la primera tasa
+    (1_000, "EUR", datetime(2026, 1, 1), 1_100),       # tasa del mismo día
+    (1_000, "EUR", datetime(2026, 1, 9, 23, 59), 1_100),  # la más reciente anterior
+    (1_000, "EUR", date(2026, 1, 10), 1_200),          # acepta date
+    (1_000, "EUR", datetime(2027, 1, 1), 1_200),
+    (5, "EUR", datetime(2026, 1, 2), 6),               # 5.5 centavos: redondeo hacia arriba
+    (1_000, "JPY", datetime(2026, 1, 10), None),       # moneda sin tasas
+])
+def test_rate_table_convert(db, amount, currency, on, expected):
+    add_rates(db)
+    assert RateTable(db).convert(amount, currency, on) == expected
+
+
+def test_rate_table_matches_sql_lookup(db):
+    add_rates(db)
+    table = RateTable(db)
+    for currency in ("EUR", "GBP", "USD"):
+        for day in range(1, 15):
+            on = datetime(2026, 1, day)
+            assert table.convert(12_345, currency, on) == fx_service.amount_base(db, 12_345, currency, on)
+
+
+def test_recompute_amount_base(db):
+    user = User(email="user@example.com", full_name="Usuario", hashed_password="x", role=UserRole.EMPLOYEE)
+    category = Category(name="Comida")
+    db.add_all([user, category])
+    db.flush()
+    draft = Report(user_id=user.id, title="Borrador", status=ReportStatus.DRAFT, total_amount=0)
+    approved = Report(user_id=user.id, title="Aprobado", status=ReportStatus.APPROVED, total_amount=777)
+    db.add_all([draft, approved])
+    db.flush()
+
+    def expense(amount, currency, day, report=None, amount_base=None) -> Expense:
+        e = Expense(
+            user_id=user.id, category_id=category.id, amount=amount, currency=currency,
+            amount_base=amount_base, expense_date=datetime(2026, 1, day),
+            report_id=report.id if report else None
+        )
+        db.add(e)
+        return e
+
+    # Gastos sin tasa al crearlos y uno con una tasa que luego se corrige
+    eur = [expense(1_000, "EUR", day, draft) for day in (2, 12)] + [expense(2_000, "EUR", 3, approved)]
+    stale = expense(1_000, "EUR", 11, amount_base=999)
+    gbp = expense(1_000, "GBP", 6)
+    usd = expense(500, "USD", 6, draft, amount_base=500)
+    db.commit()
+    add_rates(db)
+
+    updated = recompute_amount_base(db, currency="EUR", batch_size=2)
+
+    db.expire_all()
+    assert updated == 4
+    assert [e.amount_base for e in eur] == [1_100, 1_200, 2_200]
+    assert stale.amount_base == 1_200
+    assert gbp.amount_base is None  # otra moneda: fuera del filtro
+    assert usd.amount_base == 500
+    # Solo los reportes abiertos se re-sincronizan; el aprobado conserva su total
+    assert draft.total_amount == 1_100 + 1_200 + 500
+    assert approved.total_amount == 777
+
+    # since: solo gastos desde esa fecha
+    db.query(FxRate).filter(FxRate.currency == "EUR", FxRate.rate_date == date(2026, 1, 10)).update({"rate": Decimal("1.30")})
+    db.commit()
+    assert recompute_amount_base(db, currency="EUR", since=date(2026, 1, 10)) == 2
+    db.expire_all()
+    assert [e.amount_base for e in eur] == [1_100, 1_300, 2_200]
+    assert stale.amount_base == 1_300
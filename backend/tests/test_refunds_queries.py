@@ -0,0 +1,69 @@
+"""
+Presupuesto de queries de GET /api/refunds/: constante sin importar el número de filas
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models import Trip, User, UserRole
+from app.models.refund import Refund, RefundStatus
+
+QUERY_BUDGET = 1  # Un SELECT con los joins de viaje y usuario
+
+
+def seed_refunds(db, count: int) -> User:
+    admin = User(email="admin@example.com", full_name="Admin", hashed_password="x", role=UserRole.ADMIN)
+    employees = [
+        User(email=f"user{i}@example.com", full_name=f"Usuario {i}", hashed_password="x", role=UserRole.EMPLOYEE)
+        for i in range(count)
+    ]
+    db.add_all([admin, *employees])
+    db.flush()
+
+    now = datetime.utcnow()
+    for i, employee in enumerate(employees):
+        trip = Trip(
+            user_id=employee.id, name=f"Viaje {i}", destination="Madrid",
+            start_date=date.today() - timedelta(days=10), end_date=date.today() - timedelta(days=3),
+            budget=100_000, status="completed"
+        )
+        db.add(trip)
+        db.flush()
+        db.add(Refund(
+            trip_id=trip.id, user_id=employee.id, budget_amount=100_000,
+            total_expenses=100_000 + 1_000 * (i + 1), excess_amount=1_000 * (i + 1),
+            status=RefundStatus.pending, due_date=now + timedelta(days=(-1) ** i * 5)
+        ))
+    db.commit()
+    return admin
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"overdue": "true"},
+    {"status": "pending", "min_amount": 2_000, "max_amount": 40_000},
+    {"start_date": date.today().isoformat(), "end_date": date.today().isoformat()},
+])
+@pytest.mark.parametrize("rows", [5, 50])
+def test_list_refunds_constant_queries(db, client, auth_headers, count_queries, rows, params):
+    admin = seed_refunds(db, rows)
+    headers = auth_headers(admin)
+
+    with count_queries() as statements:
+        response = client.get("/api/refunds/", params=params, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json(), "el filtro debe devolver filas para que el presupuesto sea significativo"
+    assert all(refund["trip_name"] and refund["user_email"] for refund in response.json())
+    assert len(statements) == QUERY_BUDGET, statements
+
+
+def test_overdue_filter(db, client, auth_headers):
+    admin = seed_refunds(db, 6)
+    headers = auth_headers(admin)
+
+    overdue = client.get("/api/refunds/", params={"overdue": "true"}, headers=headers).json()
+    pending = client.get("/api/refunds/", params={"overdue": "false"}, headers=headers).json()
+
+    assert len(overdue) == 3 and {refund["status"] for refund in overdue} == {"overdue"}
+    assert len(pending) == 3 and {refund["status"] for refund in pending} == {"pending"}
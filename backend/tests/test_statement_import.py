@@ -0,0 +1,76 @@
+"""
+Importación de estados de cuenta: montos, fechas y archivos que dejan de poder leerse
+"""
+import io
+from datetime import datetime
+
+import pytest
+
+from app.models import Category, Expense, User, UserRole
+from app.services.statement_import import import_statement, parse_amount, parse_date
+
+
+@pytest.mark.parametrize("value, cents", [
+    ("1,234.56", 123456),
+    ("1.234,56", 123456),
+    ("$ 99.90", 9990),
+    ("12,5", 1250),
+    ("1,234", 123400),
+    ("-5", -500),
+    (10.5, 1050),
+    (7, 700),
+])
+def test_parse_amount(value, cents):
+    assert parse_amount(value) == cents
+
+
+@pytest.mark.parametrize("value", ["", None, "abc", "--"])
+def test_parse_amount_invalid(value):
+    with pytest.raises(ValueError):
+        parse_amount(value)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2026-01-05", datetime(2026, 1, 5)),
+    ("2026-01-05T10:30:00", datetime(2026, 1, 5, 10, 30)),
+    ("05/01/2026", datetime(2026, 1, 5)),
+    (datetime(2026, 1, 5, 8, 0), datetime(2026, 1, 5, 8, 0)),
+])
+def test_parse_date(value, expected):
+    assert parse_date(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "bad", "2026-13-45"])
+def test_parse_date_invalid(value):
+    with pytest.raises(ValueError):
+        parse_date(value)
+
+
+def run_import(db, content: bytes) -> list:
+    user = User(email="user@example.com", full_name="Usuario", hashed_password="x", role=UserRole.EMPLOYEE)
+    category = Category(name="Comida")
+    db.add_all([user, category])
+    db.commit()
+    return list(import_statement(db, io.BytesIO(content), "estado.csv", user.id, category.id, chunk_size=100))
+
+
+def test_import_stops_cleanly_on_non_utf8_row(db):
+    rows = "".join(f"2026-01-05,{i + 1},Comercio {i}\n" for i in range(300))
+    content = b"fecha,monto,comercio\n" + rows.encode() + "2026-01-06,5,Café\n".encode("latin-1") + b"2026-01-07,7,X\n"
+
+    events = run_import(db, content)
+
+    assert events[-2]["event"] == "error"
+    assert events[-2]["row"] == 302
+    assert events[-1] == {"event": "summary", "processed": 300, "imported": 300, "failed": 0}
+    assert db.query(Expense).count() == 300
+
+
+def test_import_stops_cleanly_on_csv_error(db):
+    content = b"fecha,monto,comercio\n2026-01-05,10,A\n2026-01-05,20,\"" + b"x" * 200_000 + b"\"\n"
+
+    events = run_import(db, content)
+
+    assert [event["event"] for event in events] == ["progress", "error", "summary"]
+    assert events[1]["row"] == 3
+    assert events[-1]["imported"] == 1
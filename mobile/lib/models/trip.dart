@@ -10,6 +10,10 @@ class Trip {
   final String status;
   final DateTime createdAt;
   final DateTime updatedAt;
+  // Agregados calculados en el servidor (GET /trips/summary y GET /trips/{id})
+  final int? spent; // En centavos
+  final int? expenseCount;
+  final double? budgetUsedPct;
 
   Trip({
     required this.id,
@@ -23,6 +27,9 @@ class Trip {
     required this.status,
     required this.createdAt,
     required this.updatedAt,
+    this.spent,
+    this.expenseCount,
+    this.budgetUsedPct,
   });
 
   factory Trip.fromJson(Map<String, dynamic> json) {
@@ -38,6 +45,9 @@ class Trip {
       status: json['status'],
       createdAt: DateTime.parse(json['created_at']),
       updatedAt: DateTime.parse(json['updated_at']),
+      spent: json['spent'],
+      expenseCount: json['expense_count'],
+      budgetUsedPct: (json['budget_used_pct'] as num?)?.toDouble(),
     );
   }
 
@@ -54,6 +64,8 @@ class Trip {
 
   double get budgetInDollars => budget != null ? budget! / 100.0 : 0.0;
 
+  double get spentInDollars => spent != null ? spent! / 100.0 : 0.0;
+
   String get statusDisplay {
     switch (status) {
       case 'active':
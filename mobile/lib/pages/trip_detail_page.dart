@@ -45,9 +45,12 @@ class _TripDetailPageState extends State<TripDetailPage> {
     try {
       final expenses = await _expenseService.getExpenses(tripId: _trip.id);
       final categories = await _expenseService.getCategories();
+      // Total gastado agregado en el servidor (en la moneda base)
+      final trip = await _tripService.getTrip(_trip.id);
       setState(() {
         _expenses = expenses;
         _categories = categories;
+        _trip = trip;
         _isLoading = false;
       });
     } catch (e) {
@@ -61,6 +64,7 @@ class _TripDetailPageState extends State<TripDetailPage> {
   }
 
   double get totalExpenses {
+    if (_trip.spent != null) return _trip.spentInDollars;
     return _expenses.fold(0.0, (sum, expense) => sum + expense.amountInDollars);
   }
 
@@ -1,3 +1,4 @@
+import 'dart:async';
 import 'package:flutter/material.dart';
 import 'package:intl/intl.dart';
 import '../models/trip.dart';
@@ -32,6 +33,7 @@ class _TripsPageState extends State<TripsPage> {
   String? _selectedStatus = 'active'; // Iniciar con "activos" por defecto
   Map<String, dynamic>? _currentUser;
   int _unreadNotifications = 0;
+  StreamSubscription<int>? _unreadSubscription;
 
   @override
   void initState() {
@@ -39,7 +41,28 @@ class _TripsPageState extends State<TripsPage> {
     print('DEBUG: TripsPage initState called');
     _loadUserInfo();
     _loadTrips();
-    _loadUnreadNotifications();
+    _watchUnreadNotifications();
+  }
+
+  @override
+  void dispose() {
+    _unreadSubscription?.cancel();
+    super.dispose();
+  }
+
+  void _watchUnreadNotifications() {
+    _unreadSubscription = _notificationService.watchUnreadCount().listen(
+      (count) {
+        if (mounted) {
+          setState(() => _unreadNotifications = count);
+        }
+      },
+      onError: (e) {
+        print('Error in notifications stream: $e');
+        // Fallback a una consulta puntual si el stream no está disponible
+        _loadUnreadNotifications();
+      },
+    );
   }
 
   Future<void> _loadUserInfo() async {
@@ -468,6 +491,26 @@ class _TripsPageState extends State<TripsPage> {
                     ),
                   ],
                 ),
+                if (trip.budgetUsedPct != null) ...[
+                  const SizedBox(height: 8),
+                  LinearProgressIndicator(
+                    value: (trip.budgetUsedPct! / 100).clamp(0.0, 1.0),
+                    backgroundColor: Colors.grey[200],
+                    valueColor: AlwaysStoppedAnimation<Color>(
+                      trip.budgetUsedPct! > 100
+                          ? Colors.red
+                          : trip.budgetUsedPct! > 80
+                              ? Colors.orange
+                              : Colors.green,
+                    ),
+                  ),
+                  const SizedBox(height: 4),
+                  Text(
+                    'Gastado: \$${trip.spentInDollars.toStringAsFixed(2)} '
+                    '(${trip.budgetUsedPct!.toStringAsFixed(1)}%, ${trip.expenseCount ?? 0} gastos)',
+                    style: TextStyle(color: Colors.grey[600], fontSize: 13),
+                  ),
+                ],
               ],
               if (trip.description != null) ...[
                 const SizedBox(height: 8),
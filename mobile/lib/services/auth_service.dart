@@ -6,19 +6,73 @@ import '../models/user.dart';
 class AuthService {
   static const String baseUrl = 'https://control-de-gastos-csi.onrender.com/api';
 
-  Future<String?> _getToken() async {
-    final prefs = await SharedPreferences.getInstance();
-    return prefs.getString('token');
-  }
+  // Renovación en curso: las peticiones simultáneas comparten un solo /refresh,
+  // porque reutilizar un refresh token ya rotado revoca toda la sesión
+  static Future<String?>? _refreshing;
+
+  Future<String?> _getToken() => getValidToken();
 
-  Future<void> _saveToken(String token) async {
+  static Future<void> _saveTokens(Map<String, dynamic> data) async {
     final prefs = await SharedPreferences.getInstance();
-    await prefs.setString('token', token);
+    await prefs.setString('token', data['access_token']);
+    if (data['refresh_token'] != null) {
+      await prefs.setString('refresh_token', data['refresh_token']);
+    }
   }
 
   Future<void> _removeToken() async {
     final prefs = await SharedPreferences.getInstance();
     await prefs.remove('token');
+    await prefs.remove('refresh_token');
+  }
+
+  /// Segundos restantes del access token según su claim exp (0 si no se puede leer)
+  static int _secondsToExpiry(String token) {
+    try {
+      final payload = jsonDecode(
+        utf8.decode(base64Url.decode(base64Url.normalize(token.split('.')[1]))),
+      );
+      final exp = payload['exp'] as int;
+      return exp - DateTime.now().millisecondsSinceEpoch ~/ 1000;
+    } catch (_) {
+      return 0;
+    }
+  }
+
+  /// Access token vigente; si expira en menos de un minuto se renueva con el refresh token
+  static Future<String?> getValidToken() async {
+    final prefs = await SharedPreferences.getInstance();
+    final token = prefs.getString('token');
+    if (token == null || _secondsToExpiry(token) > 60) return token;
+    if (prefs.getString('refresh_token') == null) return token;
+
+    _refreshing ??= _refresh().whenComplete(() => _refreshing = null);
+    return _refreshing!;
+  }
+
+  static Future<String?> _refresh() async {
+    final prefs = await SharedPreferences.getInstance();
+    try {
+      final response = await http.post(
+        Uri.parse('$baseUrl/auth/refresh'),
+        headers: {'Content-Type': 'application/json'},
+        body: jsonEncode({'refresh_token': prefs.getString('refresh_token')}),
+      );
+      if (response.statusCode == 200) {
+        final data = jsonDecode(response.body);
+        await _saveTokens(data);
+        return data['access_token'];
+      }
+      if (response.statusCode == 401) {
+        // Sesión revocada o expirada: volver a iniciar sesión
+        await prefs.remove('token');
+        await prefs.remove('refresh_token');
+        return null;
+      }
+    } catch (e) {
+      print('DEBUG AuthService - Error al renovar token: $e');
+    }
+    return prefs.getString('token');
   }
 
   Future<Map<String, dynamic>> register({
@@ -71,9 +125,8 @@ class AuthService {
 
       if (response.statusCode == 200) {
         final data = jsonDecode(response.body);
-        final token = data['access_token'];
-        await _saveToken(token);
-        return token;
+        await _saveTokens(data);
+        return data['access_token'];
       } else {
         final error = jsonDecode(response.body);
         throw Exception(error['detail'] ?? 'Credenciales inválidas');
@@ -84,6 +137,23 @@ class AuthService {
   }
 
   Future<void> logout() async {
+    final prefs = await SharedPreferences.getInstance();
+    final token = prefs.getString('token');
+    final refreshToken = prefs.getString('refresh_token');
+    if (token != null) {
+      try {
+        await http.post(
+          Uri.parse('$baseUrl/auth/logout'),
+          headers: {
+            'Content-Type': 'application/json',
+            'Authorization': 'Bearer $token',
+          },
+          body: refreshToken != null ? jsonEncode({'refresh_token': refreshToken}) : null,
+        );
+      } catch (_) {
+        // Sin conexión: la sesión local se cierra igual
+      }
+    }
     await _removeToken();
   }
 
@@ -1,17 +1,14 @@
 import 'dart:convert';
 import 'dart:io';
 import 'package:http/http.dart' as http;
-import 'package:shared_preferences/shared_preferences.dart';
 import '../models/expense.dart';
 import '../models/category.dart';
+import 'auth_service.dart';
 
 class ExpenseService {
   static const String baseUrl = 'https://control-de-gastos-csi.onrender.com/api';
 
-  Future<String?> _getToken() async {
-    final prefs = await SharedPreferences.getInstance();
-    return prefs.getString('token');
-  }
+  Future<String?> _getToken() => AuthService.getValidToken();
 
   Future<List<Expense>> getExpenses({
     int? categoryId,
@@ -6,10 +6,10 @@ import 'package:csv/csv.dart';
 import 'package:intl/intl.dart';
 import 'package:open_file/open_file.dart';
 import 'package:http/http.dart' as http;
-import 'package:shared_preferences/shared_preferences.dart';
 import 'package:permission_handler/permission_handler.dart';
 import '../models/report.dart';
 import '../models/expense.dart';
+import 'auth_service.dart';
 
 class ExportService {
   final dateFormat = DateFormat('dd/MM/yyyy');
@@ -206,10 +206,7 @@ class ExportService {
   // Métodos para descargar desde el backend
   final String baseUrl = 'https://control-de-gastos-csi.onrender.com/api';
 
-  Future<String?> _getToken() async {
-    final prefs = await SharedPreferences.getInstance();
-    return prefs.getString('token');
-  }
+  Future<String?> _getToken() => AuthService.getValidToken();
 
   Future<File?> downloadPDFFromBackend(int reportId) async {
     try {
@@ -1,6 +1,8 @@
 import 'package:http/http.dart' as http;
-import 'package:shared_preferences/shared_preferences.dart';
+import 'dart:async';
 import 'dart:convert';
+import 'dart:math';
+import 'auth_service.dart';
 
 class NotificationModel {
   final int id;
@@ -37,10 +39,7 @@ class NotificationModel {
 class NotificationService {
   final String baseUrl = 'https://control-de-gastos-csi.onrender.com/api';
 
-  Future<String?> _getToken() async {
-    final prefs = await SharedPreferences.getInstance();
-    return prefs.getString('token');
-  }
+  Future<String?> _getToken() => AuthService.getValidToken();
 
   Future<List<NotificationModel>> getNotifications({bool unreadOnly = false}) async {
     try {
@@ -69,10 +68,13 @@ class NotificationService {
     }
   }
 
-  Future<int> getUnreadCount() async {
+  Future<int> getUnreadCount() async => await _fetchUnreadCount() ?? 0;
+
+  /// Contador de no leídas o null si no se pudo consultar.
+  Future<int?> _fetchUnreadCount() async {
     try {
       final token = await _getToken();
-      if (token == null) return 0;
+      if (token == null) return null;
 
       final response = await http.get(
         Uri.parse('$baseUrl/notifications/unread-count'),
@@ -85,10 +87,80 @@ class NotificationService {
         final data = json.decode(response.body);
         return data['unread_count'] ?? 0;
       }
-      return 0;
+      return null;
     } catch (e) {
-      return 0;
+      return null;
+    }
+  }
+
+  /// Escucha el stream SSE y emite el contador de no leídas en tiempo real.
+  /// Reemplaza el polling de [getUnreadCount].
+  ///
+  /// Si la conexión se cierra o falla (reinicio del servidor, red, 503 por
+  /// límite de conexiones) consulta el contador una vez y reconecta con
+  /// backoff exponencial (1 s a 60 s) hasta que se cancele la suscripción.
+  Stream<int> watchUnreadCount() {
+    late final StreamController<int> controller;
+    http.Client? client;
+    var cancelled = false;
+
+    Future<void> run() async {
+      var attempt = 0;
+      while (!cancelled) {
+        client = http.Client();
+        try {
+          final token = await _getToken();
+          if (token == null) break;
+
+          final request = http.Request(
+            'GET',
+            Uri.parse('$baseUrl/notifications/stream'),
+          );
+          request.headers['Authorization'] = 'Bearer $token';
+          request.headers['Accept'] = 'text/event-stream';
+
+          final response = await client!.send(request);
+          if (response.statusCode == 200) {
+            String? event;
+            await for (final line in response.stream
+                .transform(utf8.decoder)
+                .transform(const LineSplitter())) {
+              if (line.startsWith('event:')) {
+                event = line.substring(6).trim();
+              } else if (line.startsWith('data:') && event == 'unread_count') {
+                final data = json.decode(line.substring(5).trim());
+                controller.add(data['unread_count'] ?? 0);
+                attempt = 0;
+              } else if (line.isEmpty) {
+                event = null;
+              }
+            }
+          }
+        } catch (e) {
+          if (!cancelled) print('Stream de notificaciones interrumpido: $e');
+        } finally {
+          client?.close();
+        }
+        if (cancelled) break;
+
+        // Mantener el badge al día mientras se reconecta
+        final count = await _fetchUnreadCount();
+        if (count != null && !cancelled) controller.add(count);
+
+        await Future.delayed(Duration(seconds: min(1 << attempt, 60)));
+        attempt = min(attempt + 1, 6);
+      }
+      await controller.close();
     }
+
+    controller = StreamController<int>(
+      onListen: run,
+      onCancel: () {
+        cancelled = true;
+        client?.close();
+      },
+    );
+    return controller.stream;
   }
 
   Future<void> markAsRead(int notificationId) async {
@@ -1,15 +1,12 @@
 import 'dart:convert';
 import 'package:http/http.dart' as http;
-import 'package:shared_preferences/shared_preferences.dart';
 import '../models/refund.dart';
+import 'auth_service.dart';
 
 class RefundService {
   static const String baseUrl = 'https://control-de-gastos-csi.onrender.com/api';
 
-  Future<String?> _getToken() async {
-    final prefs = await SharedPreferences.getInstance();
-    return prefs.getString('token');
-  }
+  Future<String?> _getToken() => AuthService.getValidToken();
 
   Future<List<Refund>> getRefunds({
     String? status,
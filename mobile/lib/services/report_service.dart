@@ -1,16 +1,13 @@
 import 'dart:convert';
 import 'package:http/http.dart' as http;
-import 'package:shared_preferences/shared_preferences.dart';
 import '../models/report.dart';
 import '../models/expense.dart';
+import 'auth_service.dart';
 
 class ReportService {
   static const String baseUrl = 'https://control-de-gastos-csi.onrender.com/api';
 
-  Future<String?> _getToken() async {
-    final prefs = await SharedPreferences.getInstance();
-    return prefs.getString('token');
-  }
+  Future<String?> _getToken() => AuthService.getValidToken();
 
   Future<List<Report>> getReports({String? status}) async {
     try {
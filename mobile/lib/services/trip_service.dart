@@ -1,22 +1,21 @@
 import 'dart:convert';
 import 'package:http/http.dart' as http;
-import 'package:shared_preferences/shared_preferences.dart';
 import '../models/trip.dart';
 import '../models/report.dart';
+import 'auth_service.dart';
 
 class TripService {
   static const String baseUrl = 'https://control-de-gastos-csi.onrender.com/api';
 
-  Future<String?> _getToken() async {
-    final prefs = await SharedPreferences.getInstance();
-    return prefs.getString('token');
-  }
+  Future<String?> _getToken() => AuthService.getValidToken();
 
+  /// Viajes con gasto, cantidad de gastos y % de presupuesto ya agregados en
+  /// el servidor (una sola consulta, sin pedir los gastos de cada viaje).
   Future<List<Trip>> getTrips({String? status}) async {
     final token = await _getToken();
     if (token == null) throw Exception('No token found');
 
-    var url = '$baseUrl/trips/';
+    var url = '$baseUrl/trips/summary';
     if (status != null) {
       url += '?status=$status';
     }